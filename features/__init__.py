@@ -9,7 +9,13 @@ This package exposes ``load_pipeline`` which attempts to import
 from importlib import import_module
 from typing import Any
 
-__all__ = ["load_pipeline", "run_pipeline", "compute_features", "from_db"]
+__all__ = [
+    "load_pipeline",
+    "run_pipeline",
+    "compute_features",
+    "compute_features_panel",
+    "from_db",
+]
 
 
 def __getattr__(name: str):
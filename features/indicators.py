@@ -0,0 +1,185 @@
+"""NumPy indicator library used by the feature pipeline.
+
+Indicators work on a ``(symbol, time)`` matrix with one row per symbol. Rows
+start at column 0 and are padded with NaN on the right, so rolling windows
+never cross symbols and recursive indicators advance every symbol with one
+vectorised step per time column. :func:`to_matrix` and :func:`from_matrix`
+convert between that layout and the long ``(symbol, t)`` frame.
+"""
+
+from __future__ import annotations
+
+import re
+
+import numpy as np
+import pandas as pd
+
+TRADING_DAYS = 252
+GARCH_ALPHA = 0.10
+GARCH_BETA = 0.85
+IV_DAYS = 30
+
+POSITIVE_WORDS = frozenset(
+    """beat beats boost bullish climb climbs gain gains growth high jump jumps
+    outperform profit rally record rise rises soar soars strong surge surges
+    upgrade upgraded win""".split()
+)
+NEGATIVE_WORDS = frozenset(
+    """bearish cut cuts decline declines downgrade downgraded drop drops fall
+    falls fraud lawsuit loss losses low miss misses plunge plunges probe
+    recall slump slumps weak""".split()
+)
+_WORD = re.compile(r"[a-z]+")
+
+
+def to_matrix(
+    values: np.ndarray, row: np.ndarray, col: np.ndarray, shape: tuple[int, int]
+) -> np.ndarray:
+    """Scatter long ``values`` into a NaN-padded ``shape`` matrix."""
+    out = np.full(shape, np.nan)
+    out[row, col] = values
+    return out
+
+
+def from_matrix(matrix: np.ndarray, row: np.ndarray, col: np.ndarray) -> np.ndarray:
+    """Gather the long values back out of ``matrix``."""
+    return matrix[row, col]
+
+
+def shift(x: np.ndarray, periods: int = 1) -> np.ndarray:
+    """Shift every row right by ``periods`` columns, filling with NaN."""
+    out = np.full_like(x, np.nan)
+    out[:, periods:] = x[:, :-periods]
+    return out
+
+
+def pct_change(x: np.ndarray, periods: int = 1) -> np.ndarray:
+    """Relative change over ``periods`` columns."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return x / shift(x, periods) - 1
+
+
+def rolling_mean(x: np.ndarray, window: int) -> np.ndarray:
+    """Mean of the last ``window`` columns, NaN unless all of them are set."""
+    valid = ~np.isnan(x)
+    csum = np.cumsum(np.where(valid, x, 0.0), axis=1)
+    count = np.cumsum(valid, axis=1)
+    sums = csum.copy()
+    sums[:, window:] -= csum[:, :-window]
+    counts = count.copy()
+    counts[:, window:] -= count[:, :-window]
+    return np.where(counts == window, sums / window, np.nan)
+
+
+def rolling_std(x: np.ndarray, window: int, ddof: int = 1) -> np.ndarray:
+    """Standard deviation of the last ``window`` columns."""
+    mean = rolling_mean(x, window)
+    var = (rolling_mean(x * x, window) - mean * mean) * window / (window - ddof)
+    return np.sqrt(np.clip(var, 0, None))
+
+
+def true_range(high: np.ndarray, low: np.ndarray, close: np.ndarray) -> np.ndarray:
+    """Largest of the bar range and the gaps from the previous close."""
+    prev = shift(close)
+    return np.fmax(high - low, np.fmax(np.abs(high - prev), np.abs(low - prev)))
+
+
+def wilder_mean(
+    x: np.ndarray, window: int, init: np.ndarray | None = None, start: int = 0
+) -> np.ndarray:
+    """Wilder's smoothed average of ``x`` (an EMA with ``alpha = 1/window``).
+
+    Rows are seeded at column ``window`` with the plain mean of columns
+    ``1..window`` (column 0 of a differenced series is empty). With ``init``
+    the average at column ``start`` is taken from it instead and smoothing
+    resumes from there, which lets a later run continue a saved state.
+    """
+    out = np.full_like(x, np.nan)
+    if init is None:
+        carry, start = np.full(len(x), np.nan), 0
+    else:
+        carry = np.array(init, dtype=float)
+        out[:, start] = carry
+    for j in range(start + 1, x.shape[1]):
+        carry = (carry * (window - 1) + x[:, j]) / window
+        if j == window:
+            seed = x[:, 1 : window + 1].mean(axis=1)
+            carry = np.where(np.isnan(carry), seed, carry)
+        out[:, j] = carry
+    return out
+
+
+def rsi(
+    close: np.ndarray,
+    window: int = 14,
+    init: tuple[np.ndarray, np.ndarray] | None = None,
+    start: int = 0,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Wilder RSI of ``close``.
+
+    Returns
+    -------
+    tuple of numpy.ndarray
+        ``(rsi, avg_gain, avg_loss)``; the averages at a column can be passed
+        back as ``init`` with that column as ``start`` to resume smoothing.
+    """
+    change = close - shift(close)
+    gain = np.where(change > 0, change, 0.0)
+    loss = np.where(change < 0, -change, 0.0)
+    gain_init, loss_init = (None, None) if init is None else init
+    avg_gain = wilder_mean(gain, window, gain_init, start)
+    avg_loss = wilder_mean(loss, window, loss_init, start)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        value = 100 - 100 / (1 + avg_gain / avg_loss)
+    value = np.where((avg_loss == 0) & (avg_gain > 0), 100.0, value)
+    value = np.where((avg_loss == 0) & (avg_gain == 0), 50.0, value)
+    return value, avg_gain, avg_loss
+
+
+def log_returns(close: np.ndarray) -> np.ndarray:
+    """Daily log returns."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.log(close / shift(close))
+
+
+def realized_vol(returns: np.ndarray, window: int = 30) -> np.ndarray:
+    """Annualised standard deviation of the last ``window`` returns."""
+    return rolling_std(returns, window) * np.sqrt(TRADING_DAYS)
+
+
+def garch_variance(
+    returns: np.ndarray,
+    long_var: np.ndarray,
+    alpha: float = GARCH_ALPHA,
+    beta: float = GARCH_BETA,
+    init: np.ndarray | None = None,
+    start: int = 0,
+) -> np.ndarray:
+    """Next-day variance forecast from a GARCH(1,1) recursion.
+
+    ``h[t] = (1 - alpha - beta) * long_var[t] + alpha * r[t]**2 + beta * h[t-1]``
+    with fixed ``alpha``/``beta`` and the long-run variance targeted to
+    ``long_var``. Rows start at their first finite ``long_var`` unless
+    ``init`` gives the forecast at column ``start``.
+    """
+    omega = 1 - alpha - beta
+    out = np.full_like(returns, np.nan)
+    if init is None:
+        carry, start = np.full(len(returns), np.nan), 0
+    else:
+        carry = np.array(init, dtype=float)
+        out[:, start] = carry
+    for j in range(start + 1, returns.shape[1]):
+        step = omega * long_var[:, j] + alpha * returns[:, j] ** 2 + beta * carry
+        carry = np.where(np.isnan(carry), long_var[:, j], step)
+        out[:, j] = carry
+    return out
+
+
+def headline_sentiment(titles: pd.Series) -> pd.Series:
+    """Score headlines in ``[-1, 1]`` from positive and negative word counts."""
+    words = titles.fillna("").str.lower().str.findall(_WORD).explode()
+    pos = words.isin(POSITIVE_WORDS).groupby(level=0).sum()
+    neg = words.isin(NEGATIVE_WORDS).groupby(level=0).sum()
+    total = (pos + neg).replace(0, np.nan)
+    return ((pos - neg) / total).fillna(0.0).reindex(titles.index, fill_value=0.0)
@@ -2,14 +2,56 @@
 
 from __future__ import annotations
 
+import json
+import logging
+import time
+from contextlib import contextmanager
 from pathlib import Path
 import os
+import sqlite3
+from typing import Iterator
 
+import numpy as np
 import pandas as pd
 
-from trading_platform.collector import api
+from trading_platform import telemetry
+from trading_platform.collector import api, backfill, db
+from trading_platform.config import Config
 from trading_platform.reports import REPORTS_DIR
 
+from . import indicators
+from .store import write_features
+
+PRICE_COLUMNS = ["t", "open", "high", "low", "close"]
+# Indicators computed from bars; rows are kept once all of them are defined
+BAR_FEATURES = [
+    "atr14",
+    "gap_pct",
+    "momentum",
+    "sma20",
+    "rsi14",
+    "hv30",
+    "garch_sigma",
+]
+CONTEXT_FEATURES = ["iv30", "iv_edge", "uoa", "news_sent"]
+# Option chain snapshot columns: only each symbol's newest, unlabelled row has
+# them, so they feed the playbook score but not model training
+SNAPSHOT_FEATURES = ["iv30", "iv_edge", "uoa"]
+# Recursive indicator state saved by incremental runs
+STATE_COLUMNS = ["avg_gain", "avg_loss", "garch_var"]
+# Extra calendar days loaded before the window so the 30-bar indicators are
+# defined from its first day
+WARMUP = "50d"
+# Bars kept per symbol for incremental runs: the provisional (newest) row plus
+# the 31 before it, enough for its 30-day volatility (31 closes)
+TAIL_BARS = 32
+STORE_DIR = "feature_store"
+# Kept inside the store; ``_`` names are skipped by store reads
+STATE_FILE = "_incremental_state.json"
+STATE_VERSION = 2
+# Backfill checkpoint kept beside the database: <db stem>.backfill.json
+BACKFILL_SUFFIX = ".backfill.json"
+
 
 class NoData(Exception):
     pass
@@ -32,37 +74,413 @@ def fetch_prices(symbol: str, start: str, end: str) -> pd.DataFrame:
     return df[["t", "open", "high", "low", "close"]]
 
 
-def compute_features(df: pd.DataFrame) -> pd.DataFrame:
-    df = df.sort_values("t").reset_index(drop=True)
-    prev_close = df["close"].shift(1)
-    tr = pd.concat(
-        [
-            df["high"] - df["low"],
-            (df["high"] - prev_close).abs(),
-            (df["low"] - prev_close).abs(),
-        ],
-        axis=1,
-    ).max(axis=1)
-    df["atr14"] = tr.rolling(14).mean()
-    df["gap_pct"] = df["close"].pct_change()
-    df["momentum"] = df["close"].pct_change(5)
-    df.dropna(inplace=True)
-    df["target"] = (df["close"].shift(-1) > df["close"]).astype(int)
+def from_db(
+    conn: sqlite3.Connection, symbols: list[str], start: str, end: str
+) -> pd.DataFrame:
+    """Load daily bars of ``symbols`` between two dates from ``ohlcv``.
+
+    All symbols are read with one query, passing the list as a single JSON
+    parameter so large universes stay within SQLite's variable limit.
+
+    Parameters
+    ----------
+    conn : sqlite3.Connection
+        Database holding the ``ohlcv`` table.
+    symbols : list of str
+        Ticker symbols to load.
+    start, end : str
+        Inclusive date range ``YYYY-MM-DD``.
+
+    Returns
+    -------
+    pandas.DataFrame
+        Columns ``symbol``, ``t`` (``YYYY-MM-DD``), ``open``, ``high``,
+        ``low``, ``close`` and ``volume`` sorted by symbol and date.
+    """
+    lo = int(pd.Timestamp(start, tz="UTC").value // 1_000_000)
+    hi = int((pd.Timestamp(end, tz="UTC") + pd.Timedelta(days=1)).value // 1_000_000)
+    df = pd.read_sql(
+        "SELECT symbol, t, open, high, low, close, volume FROM ohlcv "
+        "WHERE symbol IN (SELECT value FROM json_each(?)) AND t >= ? AND t < ? "
+        "ORDER BY symbol, t",
+        conn,
+        params=(json.dumps(list(symbols)), lo, hi),
+    )
+    df["t"] = pd.to_datetime(df["t"], unit="ms").dt.date.astype(str)
+    return df
+
+
+def load_prices(cfg, symbols: list[str], start: str, end: str) -> pd.DataFrame:
+    """Return daily bars for ``symbols``, downloading only what is missing.
+
+    With a ``db_file`` on ``cfg`` the gaps in ``ohlcv`` up to yesterday are
+    filled by :func:`trading_platform.collector.backfill.backfill` and
+    everything is read back with :func:`from_db`. Its checkpoint is kept next
+    to the database file (:data:`BACKFILL_SUFFIX`), so days Polygon has no
+    bar for are not requested again on every run. Today's still-forming bar
+    is left to the collector. Without a database each symbol is fetched over
+    HTTP.
+    """
+    db_file = getattr(cfg, "db_file", None)
+    if not db_file:
+        frames = []
+        for sym in symbols:
+            df = fetch_prices(sym, start, end)
+            df.insert(0, "symbol", sym)
+            frames.append(df)
+        return pd.concat(frames, ignore_index=True)
+    conn = db.init_db(db_file, cfg if isinstance(cfg, Config) else None)
+    try:
+        yesterday = (
+            (pd.Timestamp.now(tz="UTC") - pd.Timedelta(days=1)).date().isoformat()
+        )
+        if start <= min(end, yesterday):
+            path = conn.execute("PRAGMA database_list").fetchone()[2]
+            checkpoint = Path(path).with_suffix(BACKFILL_SUFFIX) if path else None
+            backfill.backfill(
+                conn, symbols, start, min(end, yesterday), checkpoint=checkpoint
+            )
+        df = from_db(conn, symbols, start, end)
+    finally:
+        conn.close()
+    if df.empty:
+        raise NoData(",".join(symbols))
+    missing = sorted(set(symbols) - set(df["symbol"]))
+    if missing:
+        logging.warning("No bars for %s", ",".join(missing))
+    return df
+
+
+@contextmanager
+def _timed(name: str, timings: dict[str, float] | None) -> Iterator[None]:
+    """Record the duration of one indicator in telemetry and ``timings``."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        telemetry.INDICATOR_SECONDS.labels(name).observe(elapsed)
+        if timings is not None:
+            timings[name] = timings.get(name, 0.0) + elapsed
+
+
+def options_context(
+    conn: sqlite3.Connection, symbols: list[str], asof: str
+) -> pd.DataFrame:
+    """Aggregate the stored option chain snapshot per symbol.
+
+    ``iv30`` is the mean implied volatility of contracts expiring within
+    :data:`~features.indicators.IV_DAYS` days of ``asof`` and ``uoa`` the
+    ratio of total option volume to open interest.
+    """
+    horizon = (pd.Timestamp(asof) + pd.Timedelta(days=indicators.IV_DAYS)).date()
+    return pd.read_sql(
+        "SELECT symbol, "
+        "AVG(CASE WHEN expiration > ? AND expiration <= ? AND iv > 0 THEN iv END) "
+        "AS iv30, SUM(volume) / NULLIF(SUM(open_interest), 0) AS uoa "
+        "FROM option_chain WHERE symbol IN (SELECT value FROM json_each(?)) "
+        "AND expiration >= ? GROUP BY symbol",
+        conn,
+        params=(asof, horizon.isoformat(), json.dumps(list(symbols)), asof),
+    )
+
+
+def news_context(
+    conn: sqlite3.Connection, symbols: list[str], start: str, end: str
+) -> pd.DataFrame:
+    """Return the mean headline sentiment per symbol and publication day."""
+    df = pd.read_sql(
+        "SELECT symbol, title, substr(published_at, 1, 10) AS t FROM news "
+        "WHERE symbol IN (SELECT value FROM json_each(?)) "
+        "AND substr(published_at, 1, 10) BETWEEN ? AND ?",
+        conn,
+        params=(json.dumps(list(symbols)), start, end),
+    )
+    df["news_sent"] = indicators.headline_sentiment(df["title"])
+    return df.groupby(["symbol", "t"], as_index=False)["news_sent"].mean()
+
+
+def load_context(cfg, prices: pd.DataFrame, start: str, end: str):
+    """Return option and news features per ``(symbol, t)`` from the database.
+
+    The option chain is a current snapshot, so its values are attached to
+    each symbol's newest bar only; see :data:`SNAPSHOT_FEATURES`. Returns
+    ``None`` without a ``db_file``.
+    """
+    db_file = getattr(cfg, "db_file", None)
+    if not db_file or prices.empty:
+        return None
+    symbols = list(prices["symbol"].unique())
+    conn = db.init_db(db_file, cfg if isinstance(cfg, Config) else None)
+    try:
+        options = options_context(conn, symbols, end)
+        news = news_context(conn, symbols, start, end)
+    finally:
+        conn.close()
+    options["t"] = options["symbol"].map(prices.groupby("symbol")["t"].max())
+    return options.merge(news, on=["symbol", "t"], how="outer")
+
+
+def _indicator_frame(
+    df: pd.DataFrame,
+    context: pd.DataFrame | None = None,
+    carry: list[float] | None = None,
+    start: int = 0,
+    timings: dict[str, float] | None = None,
+) -> pd.DataFrame:
+    """Return sorted bars with every indicator and :data:`STATE_COLUMNS`.
+
+    No rows are dropped. ``carry`` holds the :data:`STATE_COLUMNS` values of
+    row ``start`` of a single-symbol frame and resumes the recursive
+    indicators from there.
+    """
+    with _timed("layout", timings):
+        df = df.dropna(subset=PRICE_COLUMNS)
+        df = df.sort_values(["symbol", "t"], kind="mergesort").reset_index(drop=True)
+        symbol = df["symbol"].to_numpy()
+        n = len(df)
+        first = np.ones(n, dtype=bool)
+        first[1:] = symbol[1:] != symbol[:-1]
+        starts = np.flatnonzero(first)
+        row = np.cumsum(first) - 1
+        col = np.arange(n) - starts[row]
+        shape = (len(starts), int(col.max()) + 1 if n else 0)
+
+        def matrix(name: str) -> np.ndarray:
+            return indicators.to_matrix(df[name].to_numpy(float), row, col, shape)
+
+        high, low, close = matrix("high"), matrix("low"), matrix("close")
+        out: dict[str, np.ndarray] = {}
+    with _timed("atr14", timings):
+        tr = indicators.true_range(high, low, close)
+        out["atr14"] = indicators.rolling_mean(tr, 14)
+    with _timed("gap_pct", timings):
+        out["gap_pct"] = indicators.pct_change(close)
+    with _timed("momentum", timings):
+        out["momentum"] = indicators.pct_change(close, 5)
+    with _timed("sma20", timings):
+        out["sma20"] = indicators.rolling_mean(close, 20)
+    with _timed("rsi14", timings):
+        init = None if carry is None else (carry[0], carry[1])
+        out["rsi14"], out["avg_gain"], out["avg_loss"] = indicators.rsi(
+            close, 14, init, start
+        )
+    with _timed("hv30", timings):
+        returns = indicators.log_returns(close)
+        hv = indicators.realized_vol(returns, 30)
+        out["hv30"] = hv
+    with _timed("garch_sigma", timings):
+        long_var = (hv / np.sqrt(indicators.TRADING_DAYS)) ** 2
+        h = indicators.garch_variance(
+            returns, long_var, init=None if carry is None else carry[2], start=start
+        )
+        out["garch_var"] = h
+        out["garch_sigma"] = np.sqrt(h * indicators.TRADING_DAYS)
+        out["garch_spike"] = (out["garch_sigma"] > hv).astype(float)
+    for name, values in out.items():
+        df[name] = indicators.from_matrix(values, row, col)
+    df["garch_spike"] = df["garch_spike"].astype(int)
+    with _timed("context", timings):
+        if context is not None and not context.empty:
+            ctx = context.reindex(columns=["symbol", "t", "iv30", "uoa", "news_sent"])
+            ctx = ctx.groupby(["symbol", "t"], as_index=False).last()
+            df = df.merge(ctx, on=["symbol", "t"], how="left")
+        else:
+            df = df.assign(iv30=np.nan, uoa=np.nan, news_sent=np.nan)
+        df["iv_edge"] = (df["iv30"] - df["hv30"]).fillna(0.0)
+        df["uoa"] = df["uoa"].fillna(0.0)
+        df["news_sent"] = df["news_sent"].fillna(0.0)
+    columns = [c for c in df.columns if c not in CONTEXT_FEATURES + STATE_COLUMNS]
+    return df[columns + CONTEXT_FEATURES + STATE_COLUMNS]
+
+
+def _finish(frame: pd.DataFrame) -> pd.DataFrame:
+    """Drop warm-up rows and state columns and add the next-day ``target``."""
+    keep = frame[BAR_FEATURES].notna().all(axis=1)
+    df = frame[keep].drop(columns=STATE_COLUMNS).reset_index(drop=True)
+    symbol = df.pop("symbol").to_numpy()
+    close = df["close"].to_numpy()
+    same = np.append(symbol[1:] == symbol[:-1], False)
+    df["target"] = (same & (np.roll(close, -1) > close)).astype(int)
+    df["symbol"] = symbol
     return df
 
 
+def compute_features_panel(
+    df: pd.DataFrame,
+    context: pd.DataFrame | None = None,
+    timings: dict[str, float] | None = None,
+) -> pd.DataFrame:
+    """Compute the feature schema for every symbol of a long frame at once.
+
+    Bars are laid out as a ``(symbol, time)`` matrix and each indicator of
+    :mod:`features.indicators` runs over all symbols together, so the cost no
+    longer grows with a Python loop over symbols. Rows are dropped until
+    every indicator in :data:`BAR_FEATURES` is defined.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        Daily bars with ``symbol``, ``t``, ``open``, ``high``, ``low`` and
+        ``close`` columns for any number of symbols.
+    context : pandas.DataFrame, optional
+        ``iv30``, ``uoa`` and ``news_sent`` per ``symbol`` and ``t`` as
+        returned by :func:`load_context`; missing values count as neutral.
+    timings : dict, optional
+        Receives the seconds spent on each indicator.
+
+    Returns
+    -------
+    pandas.DataFrame
+        One row per usable bar in symbol order with the ``symbol`` column
+        last.
+    """
+    return _finish(_indicator_frame(df, context, timings=timings))
+
+
+def compute_features(df: pd.DataFrame) -> pd.DataFrame:
+    """Compute features for the bars of a single symbol.
+
+    See :func:`compute_features_panel`.
+    """
+    return compute_features_panel(df.assign(symbol="")).drop(columns="symbol")
+
+
+def _save_state(path: Path, state: dict) -> None:
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_text(json.dumps({"version": STATE_VERSION, "symbols": state}))
+    os.replace(tmp, path)
+
+
+def _load_state(path: Path) -> dict:
+    data = json.loads(path.read_text())
+    if not isinstance(data, dict) or data.get("version") != STATE_VERSION:
+        return {}
+    return data["symbols"]
+
+
+def _incremental(
+    prices: pd.DataFrame,
+    entry: dict | None,
+    since: str,
+    context: pd.DataFrame | None = None,
+) -> tuple[pd.DataFrame, dict | None] | None:
+    """Compute rows for one symbol from its stored state and newer bars.
+
+    Without a state entry the rows from ``since`` are computed from the whole
+    of ``prices``. Returns ``None`` when nothing changed since the state was
+    saved, otherwise the new rows and the state to save (``None`` while the
+    symbol has too little history to resume from).
+    """
+    bars = prices[["symbol", *PRICE_COLUMNS]].astype(
+        {c: float for c in PRICE_COLUMNS[1:]}
+    )
+    bars = bars.sort_values("t")
+    carry, start = None, 0
+    if entry:
+        tail = entry["bars"]
+        since = tail[-1][0]
+        bars = bars[bars["t"] >= since]
+        unchanged = bars[PRICE_COLUMNS].values.tolist() == [tail[-1]]
+        if bars.empty or (unchanged and context is None):
+            return None
+        known = pd.DataFrame(tail[:-1], columns=PRICE_COLUMNS)
+        known.insert(0, "symbol", bars["symbol"].iloc[0])
+        bars = pd.concat([known, bars], ignore_index=True)
+        carry, start = entry["carry"], len(tail) - 2
+    frame = _indicator_frame(bars, context, carry, start)
+    feats = _finish(frame)
+    feats = feats[feats["t"] >= since]
+    last = frame.tail(TAIL_BARS)
+    state = None
+    if len(last) == TAIL_BARS and last[STATE_COLUMNS].iloc[-2].notna().all():
+        state = {
+            "bars": last[PRICE_COLUMNS].values.tolist(),
+            "carry": last[STATE_COLUMNS].iloc[-2].tolist(),
+        }
+    return feats, state
+
+
+def _run_incremental(cfg, symbols: list[str], start: str, end: str, root: Path) -> None:
+    """Merge the rows new since the previous run into the store at ``root``.
+
+    Per-symbol tails and recursive indicator state are kept in
+    :data:`STATE_FILE` inside the store. Only bars from each symbol's
+    provisional row onwards are loaded; symbols without a state get the full
+    window and a missing state starts over.
+    """
+    state_path = root / STATE_FILE
+    state: dict[str, dict] = {}
+    if state_path.exists():
+        state = _load_state(state_path)
+    resumed = bool(state)
+    known = [sym for sym in symbols if sym in state]
+    fresh = [sym for sym in symbols if sym not in state]
+    first_day = (pd.Timestamp(start) - pd.Timedelta(WARMUP)).date().isoformat()
+    frames = []
+    if known:
+        lo = min(state[sym]["bars"][-1][0] for sym in known)
+        frames.append(load_prices(cfg, known, lo, end))
+    if fresh:
+        frames.append(load_prices(cfg, fresh, first_day, end))
+    prices = pd.concat(frames, ignore_index=True)
+    context = load_context(cfg, prices, first_day if fresh else lo, end)
+    by_symbol = {} if context is None else dict(list(context.groupby("symbol")))
+    rows = []
+    for sym, df in prices.groupby("symbol", sort=False):
+        result = _incremental(df, state.get(sym), start, by_symbol.get(sym))
+        if result is None:
+            continue
+        feats, entry = result
+        if entry is None:
+            state.pop(sym, None)
+        else:
+            state[sym] = entry
+        rows.append(feats)
+    if resumed and not rows:
+        return
+    new = pd.concat(rows, ignore_index=True)
+    write_features(root, new, replace=() if resumed else symbols)
+    root.mkdir(parents=True, exist_ok=True)
+    _save_state(state_path, state)
+
+
 def run_pipeline(cfg, symbols: list[str], since: str = "90d") -> str:
+    """Compute features for ``symbols`` and write them to the feature store.
+
+    By default the whole ``since`` window is recomputed, after loading
+    :data:`WARMUP` extra days of bars, and replaces the symbols' rows in the
+    store. With ``cfg.incremental_features`` set, each symbol's last
+    :data:`TAIL_BARS` bars and indicator state are persisted and later runs
+    only compute rows from the previous provisional row onwards, merging them
+    into the store.
+
+    Returns
+    -------
+    str
+        Store directory, read with :func:`features.store.read_features`.
+    """
     start = (pd.Timestamp.utcnow() - pd.Timedelta(since)).date().isoformat()
     end = pd.Timestamp.utcnow().date().isoformat()
     out_dir = Path(os.getenv("REPORTS_DIR", getattr(cfg, "reports_dir", REPORTS_DIR)))
-    out_dir.mkdir(parents=True, exist_ok=True)
-    all_frames = []
-    for sym in symbols:
-        df = fetch_prices(sym, start, end)
-        feats = compute_features(df)
-        feats["symbol"] = sym
-        all_frames.append(feats)
-    full = pd.concat(all_frames, ignore_index=True)
-    csv_path = out_dir / "features.csv"
-    full.to_csv(csv_path, index=False)
-    return str(csv_path)
+    root = out_dir / STORE_DIR
+    root.mkdir(parents=True, exist_ok=True)
+    if getattr(cfg, "incremental_features", False):
+        _run_incremental(cfg, symbols, start, end, root)
+        return str(root)
+    first_day = (pd.Timestamp(start) - pd.Timedelta(WARMUP)).date().isoformat()
+    prices = load_prices(cfg, symbols, first_day, end)
+    context = load_context(cfg, prices, first_day, end)
+    timings: dict[str, float] = {}
+    full = compute_features_panel(
+        prices[["symbol", *PRICE_COLUMNS]], context, timings=timings
+    )
+    full = full[full["t"] >= start]
+    logging.info(
+        "Feature timings: %s",
+        ", ".join(f"{name}={sec:.3f}s" for name, sec in timings.items()),
+    )
+    write_features(root, full, replace=symbols)
+    # the replaced rows no longer match any saved incremental state
+    (root / STATE_FILE).unlink(missing_ok=True)
+    return str(root)
@@ -0,0 +1,250 @@
+"""Partitioned on-disk feature store.
+
+Rows live under ``<root>/symbol=<SYMBOL>/month=<YYYY-MM>/`` in one file per
+partition (hive layout). With ``pyarrow`` installed the files are Parquet:
+``t`` is stored as a date, the other columns keep their dtypes and reads go
+through :mod:`pyarrow.dataset`, which prunes partitions and pushes column
+projection and the symbol/date filters down to the files. Without it, or
+without the ``parquet`` extra, the same layout is written as CSV and
+filtered with pandas.
+"""
+
+from __future__ import annotations
+
+import datetime as _dt
+import os
+import shutil
+from pathlib import Path
+from typing import Iterable
+
+import pandas as pd
+
+try:  # optional: Parquet files and pushdown reads
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:  # CSV partitions instead
+    pa = ds = pq = None
+
+PART_FILE = "part-0.parquet" if pq is not None else "part-0.csv"
+# Columns encoded in the directory names rather than the files
+PARTITION_COLUMNS = ("symbol", "month")
+
+
+def _month(day: str | None) -> str | None:
+    return None if day is None else str(day)[:7]
+
+
+def _partitions(
+    root: Path,
+    symbols: Iterable[str] | None = None,
+    start: str | None = None,
+    end: str | None = None,
+) -> list[Path]:
+    """Return existing partition files matching the filters."""
+    wanted = None if symbols is None else {f"symbol={s}" for s in symbols}
+    lo, hi = _month(start), _month(end)
+    files = []
+    for sym_dir in sorted(root.glob("symbol=*")):
+        if wanted is not None and sym_dir.name not in wanted:
+            continue
+        for month_dir in sorted(sym_dir.glob("month=*")):
+            month = month_dir.name.split("=", 1)[1]
+            if (lo and month < lo) or (hi and month > hi):
+                continue
+            if (month_dir / PART_FILE).exists():
+                files.append(month_dir / PART_FILE)
+    return files
+
+
+def _read_part(path: Path) -> pd.DataFrame:
+    if pq is not None:
+        df = pq.read_table(path).to_pandas(date_as_object=False)
+    else:
+        df = pd.read_csv(path, parse_dates=["t"])
+    return df.drop(columns=[c for c in PARTITION_COLUMNS if c in df.columns])
+
+
+def _write_part(path: Path, df: pd.DataFrame) -> None:
+    """Write one partition atomically; ``_``-prefixed files are ignored on read."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name("_" + path.name)
+    if pq is not None:
+        table = pa.Table.from_pandas(df.assign(t=df["t"].dt.date), preserve_index=False)
+        pq.write_table(table, tmp)
+    else:
+        df.to_csv(tmp, index=False, date_format="%Y-%m-%d")
+    os.replace(tmp, path)
+
+
+def write_features(
+    root: str | Path, df: pd.DataFrame, replace: Iterable[str] = ()
+) -> int:
+    """Merge feature rows into the store at ``root``.
+
+    Each touched ``(symbol, month)`` partition is read, combined with the new
+    rows keeping the newest row per ``t`` and rewritten, so appending a
+    recomputed provisional row replaces the stored one.
+
+    Parameters
+    ----------
+    root : str or Path
+        Store directory.
+    df : pandas.DataFrame
+        Feature rows with ``symbol`` and ``t`` columns.
+    replace : iterable of str, optional
+        Symbols whose stored rows are dropped before writing.
+
+    Returns
+    -------
+    int
+        Number of rows written.
+    """
+    root = Path(root)
+    for symbol in replace:
+        shutil.rmtree(root / f"symbol={symbol}", ignore_errors=True)
+    if df.empty:
+        return 0
+    frame = df.assign(t=pd.to_datetime(df["t"]))
+    month = frame["t"].dt.strftime("%Y-%m")
+    for (symbol, key), part in frame.groupby([frame["symbol"], month], sort=False):
+        path = root / f"symbol={symbol}" / f"month={key}" / PART_FILE
+        part = part.drop(columns="symbol")
+        if path.exists():
+            part = pd.concat([_read_part(path), part], ignore_index=True)
+            part = part.drop_duplicates("t", keep="last")
+        _write_part(path, part.sort_values("t").reset_index(drop=True))
+    return len(frame)
+
+
+def _read_arrow(
+    root: Path,
+    symbols: list[str] | None,
+    start: str | None,
+    end: str | None,
+    columns: list[str] | None,
+) -> pd.DataFrame:
+    partitioning = ds.partitioning(
+        pa.schema([("symbol", pa.string()), ("month", pa.string())]), flavor="hive"
+    )
+    dataset = ds.dataset(root, format="parquet", partitioning=partitioning)
+    expr = ds.scalar(True)
+    if symbols is not None:
+        expr &= ds.field("symbol").isin(symbols)
+    if start is not None:
+        day = pa.scalar(_dt.date.fromisoformat(str(start)[:10]), pa.date32())
+        expr &= (ds.field("month") >= _month(start)) & (ds.field("t") >= day)
+    if end is not None:
+        day = pa.scalar(_dt.date.fromisoformat(str(end)[:10]), pa.date32())
+        expr &= (ds.field("month") <= _month(end)) & (ds.field("t") <= day)
+    names = dataset.schema.names
+    if columns is None:
+        columns = [c for c in names if c != "month"]
+    table = dataset.to_table(columns=[c for c in columns if c in names], filter=expr)
+    return table.to_pandas(date_as_object=False)
+
+
+def _read_csv_parts(
+    root: Path,
+    symbols: list[str] | None,
+    start: str | None,
+    end: str | None,
+    columns: list[str] | None,
+) -> pd.DataFrame:
+    frames = []
+    for path in _partitions(root, symbols, start, end):
+        df = _read_part(path)
+        df.insert(0, "symbol", path.parent.parent.name.split("=", 1)[1])
+        frames.append(df)
+    if not frames:
+        return pd.DataFrame(columns=columns or [])
+    df = pd.concat(frames, ignore_index=True)
+    if start is not None:
+        df = df[df["t"] >= pd.Timestamp(start)]
+    if end is not None:
+        df = df[df["t"] <= pd.Timestamp(end)]
+    if columns is not None:
+        df = df[[c for c in columns if c in df.columns]]
+    return df
+
+
+def _read_file(
+    path: Path,
+    symbols: list[str] | None,
+    start: str | None,
+    end: str | None,
+    columns: list[str] | None,
+) -> pd.DataFrame:
+    """Read a single features CSV or Parquet file with the same filters."""
+    if path.suffix == ".parquet":
+        df = pd.read_parquet(path)
+    else:
+        df = pd.read_csv(path)
+    if {"symbol", "t"}.issubset(df.columns):
+        # keep the newest copy of a row written more than once
+        df = df.drop_duplicates(["symbol", "t"], keep="last")
+    if symbols is not None and "symbol" in df.columns:
+        df = df[df["symbol"].isin(symbols)]
+    if (start is not None or end is not None) and "t" in df.columns:
+        t = pd.to_datetime(df["t"])
+        keep = pd.Series(True, index=df.index)
+        if start is not None:
+            keep &= t >= pd.Timestamp(start)
+        if end is not None:
+            keep &= t <= pd.Timestamp(end)
+        df = df[keep]
+    if columns is not None:
+        df = df[[c for c in columns if c in df.columns]]
+    return df.reset_index(drop=True)
+
+
+def read_features(
+    root: str | Path,
+    symbols: Iterable[str] | None = None,
+    start: str | None = None,
+    end: str | None = None,
+    columns: Iterable[str] | None = None,
+) -> pd.DataFrame:
+    """Load feature rows from the store, reading only what is asked for.
+
+    Parameters
+    ----------
+    root : str or Path
+        Store directory. A single features CSV or Parquet file is accepted as
+        well and filtered in memory.
+    symbols : iterable of str, optional
+        Symbols to load; all when omitted.
+    start, end : str, optional
+        Inclusive ``YYYY-MM-DD`` bounds on ``t``.
+    columns : iterable of str, optional
+        Columns to load; names missing from the store are skipped.
+
+    Returns
+    -------
+    pandas.DataFrame
+        Matching rows sorted by ``symbol`` and ``t`` where present. From the
+        store ``t`` is a ``datetime64`` column.
+    """
+    root = Path(root)
+    symbols = None if symbols is None else list(symbols)
+    columns = None if columns is None else list(dict.fromkeys(columns))
+    if root.is_file():
+        return _read_file(root, symbols, start, end, columns)
+    if not _partitions(root):
+        return pd.DataFrame(columns=columns or [])
+    reader = _read_arrow if ds is not None else _read_csv_parts
+    df = reader(root, symbols, start, end, columns)
+    order = [c for c in ("symbol", "t") if c in df.columns]
+    if order:
+        df = df.sort_values(order, kind="mergesort")
+    return df.reset_index(drop=True)
+
+
+def stored_days(root: str | Path, symbols: Iterable[str] | None = None) -> pd.Series:
+    """Return the distinct days stored for ``symbols`` in ascending order.
+
+    Only the ``t`` column is read, so callers can turn a row count or window
+    length into ``start`` bounds for :func:`read_features`.
+    """
+    t = read_features(root, symbols, columns=["t"]).get("t", pd.Series(dtype=object))
+    return pd.Series(pd.to_datetime(t).drop_duplicates().sort_values().to_numpy())
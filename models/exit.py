@@ -8,6 +8,7 @@ from datetime import datetime
 import pandas as pd
 
 from trading_platform import portfolio
+from trading_platform.collector import db
 
 
 def update_unrealized_pnl(
@@ -20,7 +21,7 @@ def update_unrealized_pnl(
     Parameters
     ----------
     conn : sqlite3.Connection
-        Database connection containing the ``realtime_quotes`` table.
+        Database connection containing the ``latest_quotes`` table.
     portfolio_file : str, optional
         Path to ``portfolio.csv`` with open positions.
     pnl_file : str, optional
@@ -37,19 +38,14 @@ def update_unrealized_pnl(
     if positions.empty:
         return portfolio.save_pnl(pnl_df, pnl_file)
 
-    cur = conn.cursor()
     for _, pos in positions.iterrows():
         symbol = pos["symbol"]
         qty = float(pos["qty"])
         avg_price = float(pos["avg_price"])
-        cur.execute(
-            "SELECT price FROM realtime_quotes WHERE symbol=? ORDER BY t DESC LIMIT 1",
-            (symbol,),
-        )
-        row = cur.fetchone()
+        row = db.latest_quote(conn, symbol)
         if row is None:
             continue
-        price = float(row[0])
+        price = float(row[1])
         unrealized = qty * (price - avg_price)
         entry = {
             "date": datetime.utcnow().date().isoformat(),
@@ -14,6 +14,9 @@ import pandas as pd
 from sklearn.metrics import roc_auc_score
 from sklearn.model_selection import cross_val_score, train_test_split
 
+from features.pipeline import SNAPSHOT_FEATURES
+from features.store import read_features, stored_days
+
 BEST_PARAMS_FILE = Path("models/best_params.json")
 
 
@@ -29,17 +32,31 @@ class TrainResult:
     window_days: int
 
 
-def _read_features(path: str) -> pd.DataFrame:
-    file = Path(path)
-    if file.suffix == ".parquet":
-        df = pd.read_parquet(file)
-    else:
-        df = pd.read_csv(file)
+def _read_features(
+    path: str, symbols: list[str] | None = None, window_days: int | None = None
+) -> pd.DataFrame:
+    """Read ``symbols`` over the last ``window_days`` before their newest day."""
+    start = None
+    if window_days is not None:
+        days = stored_days(path, symbols)
+        if not days.empty:
+            start = (days.iloc[-1] - timedelta(days=window_days)).date().isoformat()
+    df = read_features(path, symbols, start=start)
     if "t" in df.columns:
         df["t"] = pd.to_datetime(df["t"])
     return df
 
 
+def _features_hash(path: str) -> str:
+    """Hash a features file or every partition file of a feature store."""
+    source = Path(path)
+    digest = hashlib.sha256()
+    files = sorted(source.rglob("part-*")) if source.is_dir() else [source]
+    for file in files:
+        digest.update(file.read_bytes())
+    return digest.hexdigest()
+
+
 def _load_best_params(symbol: str) -> dict[str, Any] | None:
     if BEST_PARAMS_FILE.exists():
         data = json.loads(BEST_PARAMS_FILE.read_text())
@@ -89,14 +106,24 @@ def train(
     tune: bool = False,
     symbol: str = "model",
 ) -> TrainResult:
-    """Train LightGBM model from features file with rolling window and drift guard."""
+    """Train LightGBM model from features file with rolling window and drift guard.
+
+    Only the rows of ``symbol`` within ``window_days`` of its newest day are
+    read; the default ``"model"`` name trains on every stored symbol.
+    """
 
-    df = _read_features(features_csv)
+    symbols = None if symbol == "model" else [symbol]
+    df = _read_features(features_csv, symbols, window_days)
     if df.empty:
         raise ValueError("no feature rows available")
     if "target" not in df.columns:
         df["target"] = (df["close"].shift(-1) > df["close"]).astype(int)
-        df.dropna(subset=["target"], inplace=True)
+    # the newest bar has no next day, so its target is a placeholder
+    if "symbol" in df.columns:
+        newest = df.groupby("symbol")["t"].transform("max")
+        df = df[df["t"] < newest]
+    else:
+        df = df[df["t"] < df["t"].max()]
 
     cutoff = df["t"].max() - timedelta(days=window_days)
     df = df[df["t"] >= cutoff]
@@ -104,7 +131,11 @@ def train(
         raise ValueError("not enough rows for window")
 
     if feature_cols is None:
-        feature_cols = [c for c in df.columns if c not in {"t", "target"}]
+        # the store's ``symbol`` and date columns are not model inputs, and
+        # option snapshots only exist on the unlabelled newest rows
+        numeric = df.select_dtypes(include=["number", "bool"]).columns
+        skip = {"t", "target", *SNAPSHOT_FEATURES}
+        feature_cols = [c for c in numeric if c not in skip]
     X = df[feature_cols]
     y = df["target"]
 
@@ -151,7 +182,7 @@ def train(
     model_path = model_dir_path / f"{symbol}_{timestamp}.pkl"
     booster.save_model(model_path)
 
-    features_hash = hashlib.sha256(Path(features_csv).read_bytes()).hexdigest()
+    features_hash = _features_hash(features_csv)
     metadata = {
         "features_hash": features_hash,
         "params": params,
@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+"""Benchmark WebSocket message decoding throughput per JSON backend and event type.
+
+``<backend>/dict`` rows decode to dictionaries with the :mod:`.codec` backend
+and normalise fields per event, as consumers did before typed events. The
+``msgspec/typed`` row decodes straight into :class:`.events.Trade` and
+:class:`.events.Quote` structs, independent of ``JSON_BACKEND``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib.util
+import json
+import random
+import time
+
+from trading_platform.collector import codec, events
+
+SYMBOLS = [f"S{i:03d}" for i in range(100)]
+
+
+def _messages(count: int, batch: int) -> list[bytes]:
+    """Return ``count`` Polygon-style messages with ``batch`` events each."""
+    out = []
+    for m in range(count):
+        events = []
+        for i in range(batch):
+            sym = random.choice(SYMBOLS)
+            t = 1_700_000_000_000 + m * batch + i
+            if i % 2:
+                events.append(
+                    {"ev": "T", "sym": sym, "p": 100 + i * 0.01, "s": 100, "t": t}
+                )
+            else:
+                events.append(
+                    {
+                        "ev": "Q",
+                        "sym": sym,
+                        "bp": 99.99,
+                        "bs": 5,
+                        "ap": 100.01,
+                        "as": 7,
+                        "t": t,
+                    }
+                )
+        out.append(json.dumps(events).encode())
+    return out
+
+
+def _dicts(messages: list[bytes]) -> None:
+    """Decode to dictionaries and normalise fields per event, as before."""
+    for message in messages:
+        for evt in codec.decode_events(message):
+            ev = evt.get("ev")
+            evt.get("sym") or evt.get("symbol")
+            evt.get("p") or evt.get("bp") or evt.get("ap")
+            evt.get("t") or evt.get("timestamp")
+            if ev == "T":
+                evt.get("s") or evt.get("size") or evt.get("v")
+
+
+def _typed(messages: list[bytes]) -> None:
+    """Decode to :class:`Trade`/:class:`Quote` structs and read their fields."""
+    for message in messages:
+        for evt in events.decode(message):
+            evt.symbol
+            evt.price
+            evt.t
+            if type(evt) is events.Trade:
+                evt.size
+
+
+def _best(func, messages: list[bytes], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(messages)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(messages: list[bytes], repeat: int) -> dict[str, float]:
+    """Return events per second for every installed dict backend and typed."""
+    count = sum(len(json.loads(m)) for m in messages)
+    results = {}
+    previous = codec.BACKEND
+    for name in codec.BACKENDS:
+        if importlib.util.find_spec(name) is None:
+            continue
+        codec.use(name)
+        results[f"{name}/dict"] = count / _best(_dicts, messages, repeat)
+    codec.use(previous)
+    results["msgspec/typed"] = count / _best(_typed, messages, repeat)
+    return results
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--messages", type=int, default=20_000)
+    parser.add_argument("--batch", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+    results = run(_messages(args.messages, args.batch), args.repeat)
+    base = results["json/dict"]
+    print(f"{'backend':<16}{'events/s':>14}{'speedup':>10}")
+    for name, rate in results.items():
+        print(f"{name:<16}{rate:>14,.0f}{rate / base:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
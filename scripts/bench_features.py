@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+"""Benchmark a per-symbol pandas feature loop against the panel engine.
+
+With ``--indicators`` the seconds spent on each indicator of the panel run are
+printed per universe size as well.
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from features import pipeline
+from tests._reference import assert_same_features, loop_features
+
+SIZES = (10, 500, 5_000)
+
+
+def _prices(symbols: int, days: int, seed: int = 0) -> pd.DataFrame:
+    """Return ``days`` random-walk daily bars for ``symbols`` symbols."""
+    rng = np.random.default_rng(seed)
+    close = 100 + rng.normal(size=(symbols, days)).cumsum(axis=1)
+    spread = rng.uniform(0.5, 2.0, size=(symbols, days))
+    dates = pd.bdate_range("2025-01-02", periods=days).strftime("%Y-%m-%d")
+    return pd.DataFrame(
+        {
+            "symbol": np.repeat([f"S{i:04d}" for i in range(symbols)], days),
+            "t": np.tile(dates, symbols),
+            "open": (close + rng.normal(scale=0.5, size=close.shape)).ravel(),
+            "high": (close + spread).ravel(),
+            "low": (close - spread).ravel(),
+            "close": close.ravel(),
+        }
+    )
+
+
+def _best(func, prices: pd.DataFrame, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(prices)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(sizes: tuple[int, ...], days: int, repeat: int) -> list[tuple]:
+    """Return ``(symbols, loop_s, panel_s, timings)`` for each universe size."""
+    results = []
+    for symbols in sizes:
+        prices = _prices(symbols, days)
+        timings: dict[str, float] = {}
+        panel = pipeline.compute_features_panel(prices, timings=timings)
+        assert_same_features(loop_features(prices), panel)
+        results.append(
+            (
+                symbols,
+                _best(loop_features, prices, repeat),
+                _best(pipeline.compute_features_panel, prices, repeat),
+                timings,
+            )
+        )
+    return results
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--symbols",
+        default=",".join(map(str, SIZES)),
+        help="Comma-separated universe sizes",
+    )
+    parser.add_argument("--days", type=int, default=63, help="Bars per symbol")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--indicators", action="store_true", help="Print per-indicator timings"
+    )
+    args = parser.parse_args(argv)
+    sizes = tuple(int(s) for s in args.symbols.split(",") if s)
+    results = run(sizes, args.days, args.repeat)
+    print(f"{'symbols':>8}{'loop s':>10}{'panel s':>10}{'speedup':>10}")
+    for symbols, loop, panel, _ in results:
+        print(f"{symbols:>8}{loop:>10.3f}{panel:>10.3f}{loop / panel:>9.1f}x")
+    if args.indicators:
+        names = list(results[0][3])
+        print()
+        print(f"{'symbols':>8}" + "".join(f"{name:>13}" for name in names))
+        for symbols, _, _, timings in results:
+            print(
+                f"{symbols:>8}"
+                + "".join(f"{timings[name] * 1000:>11.1f}ms" for name in names)
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python
+"""Benchmark the dashboard's hot reads with and without the covering indexes.
+
+The database is built at the current schema and filled with synthetic ticks,
+daily bars and headlines. The overview and news reads run the same SQL as
+``/api/overview`` and ``/api/news`` (:data:`~trading_platform.collector.db.
+OVERVIEW_SQL` and :data:`~trading_platform.collector.db.NEWS_SQL`), the
+overview over a ``--watchlist``-sized symbol list, and the latest-quote read
+goes through :func:`~trading_platform.collector.db.latest_quote`. Only the
+``idx_*`` indexes of migration 1 still present are dropped for the "before"
+timings; the latest quote is keyed by symbol and serves as a baseline.
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from trading_platform.collector import db
+
+SYMBOLS = [f"S{i:04d}" for i in range(500)]
+
+
+def queries(watchlist: int) -> dict:
+    """Return ``{name: (run, params)}`` for the benchmarked reads."""
+    overview = db.OVERVIEW_SQL.format(",".join("?" * watchlist))
+    return {
+        "latest quote": (
+            lambda conn, args: db.latest_quote(conn, *args),
+            lambda: (random.choice(SYMBOLS),),
+        ),
+        "overview": (
+            lambda conn, args: conn.execute(overview, args).fetchall(),
+            lambda: tuple(random.sample(SYMBOLS, watchlist)),
+        ),
+        "news": (
+            lambda conn, args: conn.execute(db.NEWS_SQL).fetchall(),
+            lambda: (),
+        ),
+    }
+
+
+def _populate(conn, rows: int) -> None:
+    """Fill ``realtime_quotes``, ``ohlcv`` and ``news`` with synthetic rows."""
+    day_ms = 86_400_000
+    days = max(rows // len(SYMBOLS), 1)
+    conn.executemany(
+        "INSERT INTO realtime_quotes VALUES (?,?,?)",
+        ((SYMBOLS[i % len(SYMBOLS)], i, 100.0 + i % 7) for i in range(rows)),
+    )
+    conn.executemany(
+        "INSERT INTO ohlcv VALUES (?,?,?,?,?,?,?)",
+        (
+            (sym, d * day_ms, 1.0, 2.0, 0.5, 1.5, 100.0)
+            for d in range(days)
+            for sym in SYMBOLS
+        ),
+    )
+    conn.executemany(
+        "INSERT INTO news(symbol, title, url, published_at) VALUES (?,?,?,?)",
+        (
+            (
+                SYMBOLS[i % len(SYMBOLS)],
+                f"headline {i}",
+                f"https://example.com/{i}",
+                f"2025-{1 + i % 12:02d}-{1 + i % 28:02d}T{i % 24:02d}:00:00Z",
+            )
+            for i in range(rows // 10)
+        ),
+    )
+    conn.commit()
+
+
+def _time(conn, run, params, repeat: int) -> float:
+    """Return the median latency in milliseconds over ``repeat`` runs."""
+    samples = []
+    for _ in range(repeat):
+        args = params()
+        start = time.perf_counter()
+        run(conn, args)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def run(rows: int, repeat: int, watchlist: int = 10) -> dict[str, tuple[float, float]]:
+    """Return ``{query: (before_ms, after_ms)}`` on a ``rows``-sized database."""
+    reads = queries(watchlist)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "bench.db"
+        conn = db.init_db(str(path))
+        indexes = conn.execute(
+            "SELECT name FROM sqlite_master WHERE type='index' AND name LIKE 'idx_%'"
+        ).fetchall()
+        for (index,) in indexes:
+            conn.execute(f"DROP INDEX {index}")
+        _populate(conn, rows)
+        conn.execute("ANALYZE")
+        before = {
+            name: _time(conn, fn, params, repeat)
+            for name, (fn, params) in reads.items()
+        }
+        for (index,) in indexes:
+            conn.execute(next(sql for sql in db.MIGRATIONS[0] if index in sql))
+        conn.execute("ANALYZE")
+        after = {
+            name: _time(conn, fn, params, repeat)
+            for name, (fn, params) in reads.items()
+        }
+        conn.close()
+    return {name: (before[name], after[name]) for name in reads}
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--watchlist", type=int, default=10)
+    args = parser.parse_args(argv)
+    results = run(args.rows, args.repeat, args.watchlist)
+    print(f"{'query':<14}{'before ms':>12}{'after ms':>12}{'speedup':>10}")
+    for name, (before, after) in results.items():
+        print(f"{name:<14}{before:>12.3f}{after:>12.3f}{before / after:>9.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,16 +4,21 @@ from pathlib import Path
 
 import pandas as pd
 
-from trading_platform import backtest, metrics
+from features.pipeline import STORE_DIR
+from trading_platform import backtest, metrics, reports
+from trading_platform.config import load_config
 
 
 def main() -> None:
-    """Run a 30-day backtest using the latest model and features."""
-    features = sorted(Path("features").rglob("features.csv"))
+    """Run a 30-day backtest of the configured symbol with the latest model."""
+    store = reports.REPORTS_DIR / STORE_DIR
+    features = [store] if store.is_dir() else []
+    features = features or sorted(Path("features").rglob("features.csv"))
     models = sorted(Path("models").rglob("model_*.txt"))
     if not features or not models:
         raise SystemExit("no features or models available")
-    csv = backtest.backtest(str(features[-1]), str(models[-1]))
+    symbol = load_config([]).symbols.split(",")[0]
+    csv = backtest.backtest(str(features[-1]), str(models[-1]), symbol=symbol)
     df = pd.read_csv(csv)
     sharpe = metrics.sharpe_ratio(df["total"].astype(float).diff().dropna())
     print(f"Sharpe {sharpe:.2f}")
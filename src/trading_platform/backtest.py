@@ -6,6 +6,7 @@ from pathlib import Path
 import lightgbm as lgb
 import pandas as pd
 
+from features.store import read_features
 from trading_platform.reports import REPORTS_DIR
 
 
@@ -14,14 +15,30 @@ def backtest(
     model_path: str,
     days: int = 30,
     out_file: str = str(REPORTS_DIR / "pnl.csv"),
+    symbol: str | None = None,
 ) -> str:
-    """Run a simple prediction-based backtest and append to an equity curve."""
-    df = pd.read_csv(features_csv)
-    df["t"] = pd.to_datetime(df["t"])
-    df = df.sort_values("t")
+    """Run a simple prediction-based backtest and append to an equity curve.
 
-    feature_cols = [c for c in df.columns if c not in {"t", "target"}]
+    ``features_csv`` may be a feature store directory or a single file; only
+    the last ``days + 1`` days of ``symbol`` are read, with the model's input
+    columns, ``t`` and ``close``. ``symbol`` is required when the features
+    hold more than one symbol.
+    """
     booster = lgb.Booster(model_file=model_path)
+    feature_cols = list(booster.feature_name())
+    symbols = None if symbol is None else [symbol]
+    index = read_features(features_csv, symbols, columns=["symbol", "t"])
+    if "symbol" in index.columns and index["symbol"].nunique() > 1:
+        raise ValueError("features hold several symbols; pass symbol")
+    stored = pd.to_datetime(index["t"]).drop_duplicates().sort_values()
+    start = None
+    if len(stored) > days:
+        start = stored.iloc[-(days + 1)].date().isoformat()
+    df = read_features(
+        features_csv, symbols, start=start, columns=["t", "close", *feature_cols]
+    )
+    df["t"] = pd.to_datetime(df["t"])
+    df = df.sort_values("t")
 
     df = df.tail(days + 1)
     df["pred"] = booster.predict(df[feature_cols])
@@ -33,7 +50,7 @@ def backtest(
     pnl = pd.DataFrame(
         {
             "date": df["t"].dt.date.astype(str),
-            "symbol": Path(features_csv).stem.upper(),
+            "symbol": symbol or Path(features_csv).stem.upper(),
             "unrealized": 0.0,
             "realized": df["profit"],
             "total": df["equity"],
@@ -55,8 +72,15 @@ def main(argv: list[str] | None = None) -> None:
     parser.add_argument("model_path")
     parser.add_argument("--days", type=int, default=30)
     parser.add_argument("--out-file", default=str(REPORTS_DIR / "pnl.csv"))
+    parser.add_argument("--symbol")
     args = parser.parse_args(argv)
-    backtest(args.features_csv, args.model_path, days=args.days, out_file=args.out_file)
+    backtest(
+        args.features_csv,
+        args.model_path,
+        days=args.days,
+        out_file=args.out_file,
+        symbol=args.symbol,
+    )
 
 
 if __name__ == "__main__":
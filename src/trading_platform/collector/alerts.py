@@ -9,6 +9,7 @@ from typing import List, Optional
 from trading_platform.reports import REPORTS_DIR
 
 from .. import notifier
+from .events import Trade
 
 ALERT_LOG = str(REPORTS_DIR / "alerts.log")
 
@@ -20,9 +21,11 @@ class AlertAggregator:
         self.webhook_url = webhook_url or os.getenv("SLACK_WEBHOOK_URL")
         self._messages: List[str] = []
 
-    def add_trade(self, symbol: str, size: int) -> None:
-        """Record a large trade alert."""
-        self._messages.append(f"Large trade {symbol} size {size}")
+    def add_trade(self, trade: Trade | str, size: int | None = None) -> None:
+        """Record a large trade alert from a :class:`Trade` or symbol and size."""
+        if type(trade) is Trade:
+            trade, size = trade.symbol, trade.size
+        self._messages.append(f"Large trade {trade} size {size}")
 
     def add_news(self, title: str, url: str) -> None:
         """Record a news headline alert."""
@@ -1,19 +1,22 @@
 import json
 import logging
 import os
+import threading
 import time
 import datetime as dt
 from datetime import datetime
 import pandas_market_calendars as mcal
-from typing import Optional
+from typing import NamedTuple, Optional
 import zoneinfo
 
-import requests
 from requests import HTTPError
 
 MARKET_STATUS_URL = "https://api.polygon.io/v1/marketstatus/now"
 
+from .. import telemetry
+from . import cache, codec, db, ratelimit, rows
 from .alerts import AlertAggregator
+from .session import get_session
 
 
 def _get_polygon_key() -> str:
@@ -34,18 +37,75 @@ def _get_news_key() -> str:
 
 WS_URL = "wss://delayed.polygon.io/stocks"
 REALTIME_WS_URL = "wss://socket.polygon.io/stocks"
-RATE_LIMIT_SEC = 1
 CACHE_QUOTE_MS = 5 * 1000
+MINUTE_MS = 60 * 1000
+DAY_MS = 24 * 60 * MINUTE_MS
+MINUTE_BARS_MAX_DAYS = 7
 CACHE_TTL = int(os.getenv("CACHE_TTL", "0"))
 
-_HTTP_CACHE: dict[str, tuple[float, dict]] = {}
-
 # US/Eastern timezone for session checks
 EASTERN = zoneinfo.ZoneInfo("America/New_York")
 
 
 nyse = mcal.get_calendar("NYSE")
 
+SESSION_WINDOW_DAYS = 365
+
+
+class SessionTimes(NamedTuple):
+    """Session bounds for one trading day as epoch milliseconds."""
+
+    open_ms: int
+    close_ms: int
+    options_open_ms: int
+    options_close_ms: int
+
+
+_SESSIONS: dict[dt.date, SessionTimes] = {}
+_SESSIONS_BUILT: dt.date | None = None
+_SESSIONS_LOCK = threading.Lock()
+
+
+def _build_sessions(start: dt.date, end: dt.date) -> dict[dt.date, SessionTimes]:
+    """Return NYSE session bounds for every trading day in ``[start, end]``."""
+    schedule = nyse.schedule(start_date=start, end_date=end)
+    table: dict[dt.date, SessionTimes] = {}
+    for open_t, close_t in zip(schedule["market_open"], schedule["market_close"]):
+        open_t = open_t.tz_convert(EASTERN)
+        close_t = close_t.tz_convert(EASTERN)
+        table[open_t.date()] = SessionTimes(
+            open_t.value // 1_000_000,
+            close_t.value // 1_000_000,
+            open_t.replace(hour=9, minute=30).value // 1_000_000,
+            close_t.replace(hour=16, minute=0).value // 1_000_000,
+        )
+    return table
+
+
+def session_times(day: dt.date) -> SessionTimes | None:
+    """Return the session bounds for ``day`` or ``None`` if the market is shut.
+
+    Lookups hit a table covering the next ``SESSION_WINDOW_DAYS`` days that is
+    rebuilt once per calendar day; dates outside it are computed on demand.
+    """
+    global _SESSIONS, _SESSIONS_BUILT
+    today = dt.date.today()
+    if _SESSIONS_BUILT != today:
+        with _SESSIONS_LOCK:
+            if _SESSIONS_BUILT != today:
+                _SESSIONS = _build_sessions(
+                    today - dt.timedelta(days=1),
+                    today + dt.timedelta(days=SESSION_WINDOW_DAYS),
+                )
+                _SESSIONS_BUILT = today
+    if (
+        today - dt.timedelta(days=1)
+        <= day
+        <= today + dt.timedelta(days=SESSION_WINDOW_DAYS)
+    ):
+        return _SESSIONS.get(day)
+    return _build_sessions(day, day).get(day)
+
 
 def is_equity_session(now: datetime | None = None) -> bool:
     """Return ``True`` if equities are trading now based on NYSE calendar."""
@@ -53,12 +113,11 @@ def is_equity_session(now: datetime | None = None) -> bool:
     if os.getenv("TESTING"):
         return True
     now = now or datetime.now(EASTERN)
-    schedule = nyse.schedule(start_date=now.date(), end_date=now.date())
-    if schedule.empty:
+    times = session_times(now.date())
+    if times is None:
         return False
-    open_t = schedule.iloc[0]["market_open"].tz_convert(EASTERN)
-    close_t = schedule.iloc[0]["market_close"].tz_convert(EASTERN)
-    return open_t <= now <= close_t
+    now_ms = int(now.timestamp() * 1000)
+    return times.open_ms <= now_ms <= times.close_ms
 
 
 def is_options_session(now: datetime | None = None) -> bool:
@@ -67,23 +126,18 @@ def is_options_session(now: datetime | None = None) -> bool:
     if os.getenv("TESTING"):
         return True
     now = now or datetime.now(EASTERN)
-    schedule = nyse.schedule(start_date=now.date(), end_date=now.date())
-    if schedule.empty:
+    times = session_times(now.date())
+    if times is None:
         return False
-    open_t = (
-        schedule.iloc[0]["market_open"].tz_convert(EASTERN).replace(hour=9, minute=30)
-    )
-    close_t = (
-        schedule.iloc[0]["market_close"].tz_convert(EASTERN).replace(hour=16, minute=0)
-    )
-    return open_t <= now <= close_t
+    now_ms = int(now.timestamp() * 1000)
+    return times.options_open_ms <= now_ms <= times.options_close_ms
 
 
 def is_market_open(asset: str = "stocks") -> bool:
     """Return ``True`` if the Polygon market for ``asset`` is open."""
 
     try:
-        resp = requests.get(
+        resp = get_session().get(
             MARKET_STATUS_URL, params={"apiKey": _get_polygon_key()}, timeout=5
         )
         resp.raise_for_status()
@@ -101,19 +155,31 @@ class NoData(Exception):
 def rate_limited_get(
     url: str, params: Optional[dict] = None, max_retries: int = 3
 ) -> dict:
-    """Perform a GET request with caching and rate limiting."""
-    key = url + json.dumps(params or {}, sort_keys=True)
-    now = time.time()
-    if CACHE_TTL > 0:
-        cached = _HTTP_CACHE.get(key)
-        if cached and now - cached[0] < CACHE_TTL:
+    """Perform a GET request with caching and per-host rate limiting.
+
+    Requests only wait when the host's token bucket in
+    :mod:`trading_platform.collector.ratelimit` is exhausted. Responses are
+    kept in the shared :mod:`trading_platform.collector.cache` for the
+    endpoint's TTL, falling back to ``CACHE_TTL`` for unlisted endpoints.
+    """
+    key = cache.cache_key(url, params)
+    ttl = cache.ttl_for(url, CACHE_TTL)
+    if ttl > 0:
+        cached = cache.get_cache().get(key)
+        if cached is not None:
             logging.debug("Cache hit for %s", key)
-            return cached[1]
+            return cached
 
     for attempt in range(max_retries):
-        time.sleep(RATE_LIMIT_SEC)
+        ratelimit.acquire(url)
         logging.debug("GET %s params=%s", url, params)
-        resp = requests.get(url, params=params, timeout=10)
+        start = time.perf_counter()
+        try:
+            resp = get_session().get(url, params=params, timeout=10)
+        except Exception:
+            telemetry.observe_request(url, "error", time.perf_counter() - start)
+            raise
+        telemetry.observe_request(url, resp.status_code, time.perf_counter() - start)
         if resp.status_code == 403:
             text = resp.text.lower()
             if "market" in text:
@@ -133,13 +199,12 @@ def rate_limited_get(
                 time.sleep(2**attempt)
                 continue
         resp.raise_for_status()
-        data = resp.json()
-        if CACHE_TTL > 0:
-            _HTTP_CACHE[key] = (now, data)
+        data = codec.loads(resp.content)
+        cache.get_cache().set(key, data, ttl)
         return data
 
     resp.raise_for_status()
-    return resp.json()
+    return codec.loads(resp.content)
 
 
 def fetch_prev_close(symbol: str) -> dict:
@@ -181,28 +246,76 @@ def fetch_open_close(symbol: str, date: str) -> dict:
     return results[0]
 
 
-def fetch_trades(symbol: str, limit: int = 50) -> dict:
-    """Return the latest ``limit`` trades."""
+def iter_pages(url: str, params: Optional[dict] = None):
+    """Yield every page of a Polygon response by following ``next_url``."""
+    while url:
+        data = rate_limited_get(url, params)
+        if not data:
+            return
+        yield data
+        url = data.get("next_url")
+        params = {"apiKey": _get_polygon_key()}
 
-    if not is_equity_session():
-        logging.info("Market closed – skipping fetch_trades for %s", symbol)
-        return {}
 
-    url = f"https://api.polygon.io/v3/trades/{symbol}"
+def _fetch_ticks(
+    kind: str,
+    symbol: str,
+    limit: int,
+    start_ms: Optional[int],
+    end_ms: Optional[int],
+) -> dict:
+    """Return ``/v3/{kind}`` results, paging through a time window if given.
+
+    The window ``[start_ms, end_ms)`` is half-open so adjacent windows do not
+    overlap. It is fetched whatever the session, because an outage may end
+    after the close.
+    """
+    url = f"https://api.polygon.io/v3/{kind}/{symbol}"
     params = {"limit": limit, "apiKey": _get_polygon_key()}
-    return rate_limited_get(url, params)
+    if start_ms is None and end_ms is None:
+        if not is_equity_session():
+            logging.info("Market closed – skipping fetch_%s for %s", kind, symbol)
+            return {}
+        return rate_limited_get(url, params)
+    params.update(order="asc", sort="timestamp")
+    if start_ms is not None:
+        params["timestamp.gte"] = start_ms * 1_000_000
+    if end_ms is not None:
+        params["timestamp.lt"] = end_ms * 1_000_000
+    results = []
+    for page in iter_pages(url, params):
+        results.extend(page.get("results", []))
+    return {"results": results}
+
+
+def fetch_trades(
+    symbol: str,
+    limit: int = 50,
+    start_ms: Optional[int] = None,
+    end_ms: Optional[int] = None,
+) -> dict:
+    """Return the latest ``limit`` trades.
 
+    With ``start_ms``/``end_ms`` (epoch milliseconds) return every trade from
+    ``start_ms`` up to but excluding ``end_ms`` instead, ``limit`` per page,
+    oldest first.
+    """
+    return _fetch_ticks("trades", symbol, limit, start_ms, end_ms)
 
-def fetch_quotes(symbol: str, limit: int = 50) -> dict:
-    """Return the latest ``limit`` quotes."""
 
-    if not is_equity_session():
-        logging.info("Market closed – skipping fetch_quotes for %s", symbol)
-        return {}
+def fetch_quotes(
+    symbol: str,
+    limit: int = 50,
+    start_ms: Optional[int] = None,
+    end_ms: Optional[int] = None,
+) -> dict:
+    """Return the latest ``limit`` quotes.
 
-    url = f"https://api.polygon.io/v3/quotes/{symbol}"
-    params = {"limit": limit, "apiKey": _get_polygon_key()}
-    return rate_limited_get(url, params)
+    With ``start_ms``/``end_ms`` (epoch milliseconds) return every quote from
+    ``start_ms`` up to but excluding ``end_ms`` instead, ``limit`` per page,
+    oldest first.
+    """
+    return _fetch_ticks("quotes", symbol, limit, start_ms, end_ms)
 
 
 def fetch_snapshot_tickers() -> dict:
@@ -237,48 +350,78 @@ def fetch_ohlcv(conn, symbol: str):
     url = f"https://api.polygon.io/v2/aggs/ticker/{symbol}/range/1/day/{start}/{end}"
     params = {"adjusted": "true", "apiKey": _get_polygon_key()}
     data = rate_limited_get(url, params)
-    for bar in data.get("results", []):
-        c.execute(
-            "INSERT OR REPLACE INTO ohlcv VALUES (?,?,?,?,?,?,?)",
-            (
-                symbol,
-                bar["t"],
-                bar["o"],
-                bar["h"],
-                bar["l"],
-                bar["c"],
-                bar["v"],
-            ),
-        )
-    conn.commit()
+    db.insert_rows(conn, "ohlcv", rows.bar_rows(symbol, data.get("results", [])))
+
 
+def minute_bars_window(
+    conn, symbol: str, now_ms: Optional[int] = None
+) -> Optional[tuple]:
+    """Return the ``(from, to)`` range of minute bars still to fetch.
 
-def fetch_minute_bars(conn, symbol: str):
-    """Fetch the last trading day's minute aggregates."""
+    Resumes at the newest bar fetched over REST, kept in ``fetch_state``
+    rather than read from ``minute_bars`` so rows from other writers do not
+    move it. That bar is requested again because it may have been fetched
+    before its minute ended. The range reaches back at most
+    ``MINUTE_BARS_MAX_DAYS``; without a watermark the last trading day is
+    fetched. Returns ``None`` when the newest bar is the current minute.
+    """
+    end = int(time.time() * 1000) if now_ms is None else now_ms
+    last = db.fetch_mark(conn, symbol, "minute_bars")
+    if last is None:
+        today = dt.date.fromtimestamp(end / 1000)
+        return str(today - dt.timedelta(days=1)), str(today)
+    if last + MINUTE_MS > end:
+        return None
+    return max(last, end - MINUTE_BARS_MAX_DAYS * DAY_MS), end
+
+
+def fetch_minute_bars(conn, symbol: str) -> int:
+    """Fetch minute aggregates newer than the stored ones.
+
+    Every page of the range is followed via ``next_url`` and only bars that
+    are new or differ from the stored row are written.
+
+    Returns
+    -------
+    int
+        Number of rows written.
+    """
     logging.info("Fetching minute bars for %s", symbol)
     if not is_equity_session():
         logging.info("Market closed – skipping fetch_minute_bars for %s", symbol)
-        return
-    end = dt.date.today()
-    start = end - dt.timedelta(days=1)
+        return 0
+    window = minute_bars_window(conn, symbol)
+    if window is None:
+        return 0
+    start, end = window
     url = f"https://api.polygon.io/v2/aggs/ticker/{symbol}/range/1/minute/{start}/{end}"
-    params = {"adjusted": "true", "apiKey": _get_polygon_key(), "limit": 50000}
-    data = rate_limited_get(url, params)
-    c = conn.cursor()
-    for bar in data.get("results", []):
-        c.execute(
-            "INSERT OR REPLACE INTO minute_bars VALUES (?,?,?,?,?,?,?)",
-            (
-                symbol,
-                bar["t"],
-                bar["o"],
-                bar["h"],
-                bar["l"],
-                bar["c"],
-                bar["v"],
-            ),
-        )
-    conn.commit()
+    params = {
+        "adjusted": "true",
+        "sort": "asc",
+        "limit": 50000,
+        "apiKey": _get_polygon_key(),
+    }
+    bars = [
+        bar
+        for page in iter_pages(url, params)
+        for bar in rows.bar_rows(symbol, page.get("results", []))
+    ]
+    return store_minute_bars(conn, symbol, bars)
+
+
+def store_minute_bars(conn, symbol: str, bars: list[tuple]) -> int:
+    """Write fetched minute ``bars`` that changed and advance the watermark.
+
+    Returns
+    -------
+    int
+        Number of rows written.
+    """
+    changed = db.changed_bars(conn, "minute_bars", symbol, bars)
+    written = db.insert_rows(conn, "minute_bars", changed)
+    if bars:
+        db.set_fetch_mark(conn, symbol, "minute_bars", max(bar[1] for bar in bars))
+    return written
 
 
 def fetch_realtime_quote(conn, symbol: str):
@@ -287,12 +430,7 @@ def fetch_realtime_quote(conn, symbol: str):
     if not is_equity_session():
         logging.info("Market closed – skipping fetch_realtime_quote for %s", symbol)
         return
-    c = conn.cursor()
-    c.execute(
-        "SELECT t FROM realtime_quotes WHERE symbol=? ORDER BY t DESC LIMIT 1",
-        (symbol,),
-    )
-    row = c.fetchone()
+    row = db.latest_quote(conn, symbol)
     if row and int(time.time() * 1000) - row[0] < CACHE_QUOTE_MS:
         return
     snap_url = "https://api.polygon.io/v3/snapshot"
@@ -306,11 +444,7 @@ def fetch_realtime_quote(conn, symbol: str):
     ts = session.get("last_updated")
     if not price:
         return
-    c.execute(
-        "INSERT OR REPLACE INTO realtime_quotes VALUES (?,?,?)",
-        (symbol, ts, price),
-    )
-    conn.commit()
+    db.insert_rows(conn, "realtime_quotes", [(symbol, ts, price)])
 
 
 def fetch_option_chain(conn, symbol: str):
@@ -332,37 +466,9 @@ def fetch_option_chain(conn, symbol: str):
     url = f"https://api.polygon.io/v3/snapshot/options/{symbol}"
     params = {"apiKey": _get_polygon_key(), "greeks": "true"}
     data = rate_limited_get(url, params)
-    options = data.get("results", [])
-    for opt in options:
-        details = opt.get("details", {})
-        greeks = opt.get("greeks", {})
-        last_quote = opt.get("last_quote", {})
-        ticker = details.get("ticker")
-        c.execute(
-            "INSERT OR REPLACE INTO option_chain VALUES (?,?,?,?,?,?,?,?,?,?,?)",
-            (
-                symbol,
-                ticker,
-                details.get("expiration_date"),
-                details.get("strike_price"),
-                details.get("contract_type"),
-                (
-                    last_quote.get("bid", {}).get("p")
-                    if isinstance(last_quote.get("bid"), dict)
-                    else None
-                ),
-                (
-                    last_quote.get("ask", {}).get("p")
-                    if isinstance(last_quote.get("ask"), dict)
-                    else None
-                ),
-                opt.get("implied_volatility"),
-                greeks.get("delta"),
-                opt.get("day", {}).get("volume"),
-                opt.get("open_interest"),
-            ),
-        )
-    conn.commit()
+    db.insert_rows(
+        conn, "option_chain", rows.option_rows(symbol, data.get("results", []))
+    )
 
 
 def fetch_fundamentals(conn, symbol: str):
@@ -393,17 +499,9 @@ def fetch_corporate_actions(conn, symbol: str):
     url = "https://api.polygon.io/v3/reference/splits"
     params = {"ticker": symbol, "apiKey": _get_polygon_key(), "limit": 10}
     data = rate_limited_get(url, params)
-    for act in data.get("results", []):
-        conn.execute(
-            "INSERT OR REPLACE INTO corporate_actions VALUES (?,?,?,?)",
-            (
-                symbol,
-                act.get("execution_date"),
-                "split",
-                json.dumps(act),
-            ),
-        )
-    conn.commit()
+    db.insert_rows(
+        conn, "corporate_actions", rows.split_rows(symbol, data.get("results", []))
+    )
 
 
 def fetch_indicator_sma(conn, symbol: str):
@@ -420,12 +518,8 @@ def fetch_indicator_sma(conn, symbol: str):
         "apiKey": _get_polygon_key(),
     }
     data = rate_limited_get(url, params)
-    for val in data.get("results", {}).get("values", []):
-        conn.execute(
-            "INSERT OR REPLACE INTO indicators VALUES (?,?,?,?)",
-            (symbol, val.get("timestamp"), "sma50", val.get("value")),
-        )
-    conn.commit()
+    values = data.get("results", {}).get("values", [])
+    db.insert_rows(conn, "indicators", rows.sma_rows(symbol, values))
 
 
 def fetch_news(
@@ -458,17 +552,13 @@ def fetch_news(
     }
     data = rate_limited_get(url, params)
     articles = data.get("articles", [])
-    c = conn.cursor()
-    for art in articles:
-        c.execute(
-            "INSERT INTO news(symbol, title, url, published_at) VALUES (?,?,?,?)",
-            (
-                symbol,
-                art.get("title"),
-                art.get("url"),
-                art.get("publishedAt"),
-            ),
-        )
-        if aggregator:
+    db.insert_rows(
+        conn,
+        "news",
+        rows.news_rows(symbol, articles),
+        columns=rows.NEWS_COLUMNS,
+        replace=False,
+    )
+    if aggregator:
+        for art in articles:
             aggregator.add_news(art.get("title", ""), art.get("url", ""))
-    conn.commit()
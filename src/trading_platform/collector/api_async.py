@@ -11,41 +11,45 @@ from typing import Optional
 
 import aiohttp
 
-from . import api
+from .. import telemetry
+from . import api, cache, codec, db, ratelimit, rows
 
 API_KEY = None  # maintained for backward compatibility
 NEWS_API_KEY = None
 WS_URL = api.WS_URL
 REALTIME_WS_URL = api.REALTIME_WS_URL
-RATE_LIMIT_SEC = api.RATE_LIMIT_SEC
 CACHE_TTL = api.CACHE_TTL
-
-_HTTP_CACHE: dict[str, tuple[float, dict]] = {}
+DEFAULT_CONCURRENCY = 8
 
 
 async def rate_limited_get(
     session: aiohttp.ClientSession, url: str, params: Optional[dict] = None
 ) -> dict:
-    """Perform a GET request with caching and rate limiting."""
-    key = url + json.dumps(params or {}, sort_keys=True)
-    now = time.time()
-    if CACHE_TTL > 0:
-        cached = _HTTP_CACHE.get(key)
-        if cached and now - cached[0] < CACHE_TTL:
+    """Perform a GET request with caching and per-host rate limiting."""
+    key = cache.cache_key(url, params)
+    ttl = cache.ttl_for(url, CACHE_TTL)
+    if ttl > 0:
+        cached = cache.get_cache().get(key)
+        if cached is not None:
             logging.debug("Cache hit for %s", key)
-            return cached[1]
+            return cached
 
-    await asyncio.sleep(RATE_LIMIT_SEC)
+    await ratelimit.acquire_async(url)
     logging.debug("GET %s params=%s", url, params)
-    async with session.get(url, params=params) as resp:
-        if resp.status == 403:
-            raise aiohttp.ClientResponseError(
-                resp.request_info, resp.history, status=resp.status
-            )
-        resp.raise_for_status()
-        data = await resp.json()
-    if CACHE_TTL > 0:
-        _HTTP_CACHE[key] = (now, data)
+    start = time.perf_counter()
+    status = "error"
+    try:
+        async with session.get(url, params=params) as resp:
+            status = resp.status
+            if resp.status == 403:
+                raise aiohttp.ClientResponseError(
+                    resp.request_info, resp.history, status=resp.status
+                )
+            resp.raise_for_status()
+            data = codec.loads(await resp.read())
+    finally:
+        telemetry.observe_request(url, status, time.perf_counter() - start)
+    cache.get_cache().set(key, data, ttl)
     return data
 
 
@@ -65,20 +69,65 @@ async def fetch_ohlcv(session: aiohttp.ClientSession, conn, symbol: str) -> None
     url = f"https://api.polygon.io/v2/aggs/ticker/{symbol}/range/1/day/{start}/{end}"
     params = {"adjusted": "true", "apiKey": api._get_polygon_key()}
     data = await rate_limited_get(session, url, params)
-    for bar in data.get("results", []):
-        c.execute(
-            "INSERT OR REPLACE INTO ohlcv VALUES (?,?,?,?,?,?,?)",
-            (
-                symbol,
-                bar["t"],
-                bar["o"],
-                bar["h"],
-                bar["l"],
-                bar["c"],
-                bar["v"],
-            ),
-        )
-    conn.commit()
+    db.insert_rows(conn, "ohlcv", rows.bar_rows(symbol, data.get("results", [])))
+
+
+async def iter_pages(
+    session: aiohttp.ClientSession, url: str, params: Optional[dict] = None
+):
+    """Yield every page of a Polygon response by following ``next_url``."""
+    while url:
+        data = await rate_limited_get(session, url, params)
+        if not data:
+            return
+        yield data
+        url = data.get("next_url")
+        params = {"apiKey": api._get_polygon_key()}
+
+
+async def fetch_minute_bars(session: aiohttp.ClientSession, conn, symbol: str) -> int:
+    """Fetch minute aggregates newer than the stored ones.
+
+    See :func:`trading_platform.collector.api.fetch_minute_bars`.
+    """
+    logging.info("Fetching minute bars for %s", symbol)
+    window = api.minute_bars_window(conn, symbol)
+    if window is None:
+        return 0
+    start, end = window
+    url = f"https://api.polygon.io/v2/aggs/ticker/{symbol}/range/1/minute/{start}/{end}"
+    params = {
+        "adjusted": "true",
+        "sort": "asc",
+        "limit": 50000,
+        "apiKey": api._get_polygon_key(),
+    }
+    bars = []
+    async for page in iter_pages(session, url, params):
+        bars.extend(rows.bar_rows(symbol, page.get("results", [])))
+    return api.store_minute_bars(conn, symbol, bars)
+
+
+async def fetch_realtime_quote(
+    session: aiohttp.ClientSession, conn, symbol: str
+) -> None:
+    """Fetch a recent trade price via the snapshot endpoint and cache it."""
+    logging.info("Fetching snapshot quote for %s", symbol)
+    row = db.latest_quote(conn, symbol)
+    if row and int(time.time() * 1000) - row[0] < api.CACHE_QUOTE_MS:
+        return
+    url = "https://api.polygon.io/v3/snapshot"
+    params = {"ticker": symbol, "apiKey": api._get_polygon_key()}
+    data = await rate_limited_get(session, url, params)
+    results = data.get("results", [])
+    if not results:
+        return
+    snap = results[0].get("session", {})
+    price = snap.get("price")
+    ts = snap.get("last_updated")
+    if not price:
+        return
+    db.insert_rows(conn, "realtime_quotes", [(symbol, ts, price)])
 
 
 async def fetch_option_chain(session: aiohttp.ClientSession, conn, symbol: str) -> None:
@@ -94,39 +143,56 @@ async def fetch_option_chain(session: aiohttp.ClientSession, conn, symbol: str)
     url = f"https://api.polygon.io/v3/snapshot/options/{symbol}"
     params = {"apiKey": api._get_polygon_key(), "greeks": "true"}
     data = await rate_limited_get(session, url, params)
-    options = data.get("results", [])
-    for opt in options:
-        details = opt.get("details", {})
-        greeks = opt.get("greeks", {})
-        last_quote = opt.get("last_quote", {})
-        ticker = details.get("ticker")
-        c.execute(
-            "INSERT OR REPLACE INTO option_chain VALUES (?,?,?,?,?,?,?,?,?,?,?)",
-            (
-                symbol,
-                ticker,
-                details.get("expiration_date"),
-                details.get("strike_price"),
-                details.get("contract_type"),
-                (
-                    last_quote.get("bid", {}).get("p")
-                    if isinstance(last_quote.get("bid"), dict)
-                    else None
-                ),
-                (
-                    last_quote.get("ask", {}).get("p")
-                    if isinstance(last_quote.get("ask"), dict)
-                    else None
-                ),
-                opt.get("implied_volatility"),
-                greeks.get("delta"),
-                opt.get("day", {}).get("volume"),
-                opt.get("open_interest"),
-            ),
-        )
+    db.insert_rows(
+        conn, "option_chain", rows.option_rows(symbol, data.get("results", []))
+    )
+
+
+async def fetch_fundamentals(session: aiohttp.ClientSession, conn, symbol: str) -> None:
+    """Fetch fundamental data and store raw JSON."""
+    logging.info("Fetching fundamentals for %s", symbol)
+    url = "https://api.polygon.io/vX/reference/financials"
+    params = {"ticker": symbol, "limit": 1, "apiKey": api._get_polygon_key()}
+    data = await rate_limited_get(session, url, params)
+    if not data.get("results"):
+        return
+    conn.execute(
+        "INSERT OR REPLACE INTO fundamentals VALUES (?,?,?)",
+        (symbol, int(time.time()), json.dumps(data["results"][0])),
+    )
     conn.commit()
 
 
+async def fetch_corporate_actions(
+    session: aiohttp.ClientSession, conn, symbol: str
+) -> None:
+    """Fetch recent split events for the symbol."""
+    logging.info("Fetching corporate actions for %s", symbol)
+    url = "https://api.polygon.io/v3/reference/splits"
+    params = {"ticker": symbol, "apiKey": api._get_polygon_key(), "limit": 10}
+    data = await rate_limited_get(session, url, params)
+    db.insert_rows(
+        conn, "corporate_actions", rows.split_rows(symbol, data.get("results", []))
+    )
+
+
+async def fetch_indicator_sma(
+    session: aiohttp.ClientSession, conn, symbol: str
+) -> None:
+    """Fetch a 50 day simple moving average."""
+    logging.info("Fetching SMA indicator for %s", symbol)
+    url = f"https://api.polygon.io/v1/indicators/sma/{symbol}"
+    params = {
+        "timespan": "day",
+        "window": 50,
+        "series_type": "close",
+        "apiKey": api._get_polygon_key(),
+    }
+    data = await rate_limited_get(session, url, params)
+    values = data.get("results", {}).get("values", [])
+    db.insert_rows(conn, "indicators", rows.sma_rows(symbol, values))
+
+
 from .alerts import AlertAggregator
 
 
@@ -148,21 +214,16 @@ async def fetch_news(
     }
     data = await rate_limited_get(session, url, params)
     articles = data.get("articles", [])
-    c = conn.cursor()
-    for art in articles:
-        c.execute(
-            "INSERT OR REPLACE INTO news VALUES (?,?,?,?,?)",
-            (
-                symbol,
-                art.get("publishedAt"),
-                art.get("title"),
-                art.get("url"),
-                art.get("source", {}).get("name"),
-            ),
-        )
-        if aggregator:
+    db.insert_rows(
+        conn,
+        "news",
+        rows.news_rows(symbol, articles),
+        columns=rows.NEWS_COLUMNS,
+        replace=False,
+    )
+    if aggregator:
+        for art in articles:
             aggregator.add_news(art.get("title", ""), art.get("url", ""))
-    conn.commit()
 
 
 async def fetch_all(
@@ -176,3 +237,79 @@ async def fetch_all(
             fetch_option_chain(session, conn, symbol),
             fetch_news(session, conn, symbol, aggregator=aggregator),
         )
+
+
+async def fetch_symbol(
+    session: aiohttp.ClientSession,
+    conn,
+    symbol: str,
+    aggregator: AlertAggregator | None = None,
+) -> None:
+    """Fetch every endpoint collected by ``collector.main`` for ``symbol``.
+
+    Every endpoint runs to completion before this returns, so none is left
+    using ``session`` after it closes. Failed endpoints are logged and the
+    first error is raised.
+    """
+    fetches = {
+        "ohlcv": fetch_ohlcv(session, conn, symbol),
+        "minute_bars": fetch_minute_bars(session, conn, symbol),
+        "realtime_quote": fetch_realtime_quote(session, conn, symbol),
+        "option_chain": fetch_option_chain(session, conn, symbol),
+        "fundamentals": fetch_fundamentals(session, conn, symbol),
+        "corporate_actions": fetch_corporate_actions(session, conn, symbol),
+        "indicator_sma": fetch_indicator_sma(session, conn, symbol),
+        "news": fetch_news(session, conn, symbol, aggregator=aggregator),
+    }
+    results = await asyncio.gather(*fetches.values(), return_exceptions=True)
+    errors = [
+        (name, res)
+        for name, res in zip(fetches, results)
+        if isinstance(res, BaseException)
+    ]
+    for name, exc in errors:
+        logging.warning("Fetching %s %s failed: %s", symbol, name, exc)
+    if errors:
+        raise errors[0][1]
+
+
+async def fetch_universe(
+    conn,
+    symbols: list[str],
+    concurrency: int = DEFAULT_CONCURRENCY,
+    aggregator: AlertAggregator | None = None,
+) -> dict[str, BaseException]:
+    """Fetch all endpoints for ``symbols`` concurrently over one session.
+
+    Parameters
+    ----------
+    conn : sqlite3.Connection
+        Database connection.
+    symbols : list[str]
+        Ticker symbols to collect.
+    concurrency : int, default ``DEFAULT_CONCURRENCY``
+        Maximum number of symbols fetched at the same time.
+    aggregator : AlertAggregator, optional
+        Alert aggregator that receives news headlines.
+
+    Returns
+    -------
+    dict[str, BaseException]
+        Errors keyed by symbol for symbols whose fetch failed.
+    """
+    sem = asyncio.Semaphore(max(concurrency, 1))
+
+    async def bounded(session: aiohttp.ClientSession, symbol: str) -> None:
+        async with sem:
+            await fetch_symbol(session, conn, symbol, aggregator=aggregator)
+
+    async with aiohttp.ClientSession() as session:
+        results = await asyncio.gather(
+            *(bounded(session, sym) for sym in symbols), return_exceptions=True
+        )
+    errors: dict[str, BaseException] = {}
+    for sym, res in zip(symbols, results):
+        if isinstance(res, BaseException):
+            logging.error("Fetching %s failed: %s", sym, res)
+            errors[sym] = res
+    return errors
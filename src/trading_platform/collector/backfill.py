@@ -1,11 +1,238 @@
+"""Chunked, parallel and resumable historical OHLCV backfill."""
+
+from __future__ import annotations
+
 import argparse
 import datetime as _dt
+import json
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Iterable
 
 from ..load_env import load_env
-from . import api, db
+from . import api, db, rows
+
+CHUNK_DAYS = 365
+DEFAULT_CONCURRENCY = 4
+
+# Daily bars are stamped at midnight New York time. Adding twelve hours puts
+# a midnight stamp of any zone from UTC-12 to UTC+12 on its own UTC date.
+_HALF_DAY_SEC = 43_200
+_BAR_DAY = f"date(t / 1000 + {_HALF_DAY_SEC}, 'unixepoch')"
+
+
+def trading_days(start: _dt.date, end: _dt.date) -> list[_dt.date]:
+    """Return NYSE trading days in ``[start, end]``."""
+    return [d.date() for d in api.nyse.valid_days(start, end)]
+
+
+def missing_days(
+    conn, symbols: Iterable[str], start: _dt.date, end: _dt.date
+) -> dict[str, list[_dt.date]]:
+    """Return the trading days in ``[start, end]`` without a bar per symbol.
+
+    Expected ``(symbol, day)`` pairs are compared with the stored bars in one
+    ``EXCEPT`` query.
+    """
+    symbols = list(symbols)
+    days = trading_days(start, end)
+    if not symbols or not days:
+        return {}
+    conn.execute("CREATE TEMP TABLE IF NOT EXISTS _bf_symbols (symbol TEXT)")
+    conn.execute("CREATE TEMP TABLE IF NOT EXISTS _bf_days (day TEXT)")
+    try:
+        conn.executemany("INSERT INTO _bf_symbols VALUES (?)", [(s,) for s in symbols])
+        conn.executemany("INSERT INTO _bf_days VALUES (?)", [(str(d),) for d in days])
+        lo = int(_dt.datetime.combine(start, _dt.time.min).timestamp() * 1000)
+        hi = int(_dt.datetime.combine(end, _dt.time.max).timestamp() * 1000)
+        found = conn.execute(
+            "SELECT symbol, day FROM _bf_symbols CROSS JOIN _bf_days "
+            f"EXCEPT SELECT symbol, {_BAR_DAY} FROM ohlcv "
+            "WHERE symbol IN (SELECT symbol FROM _bf_symbols) "
+            "AND t BETWEEN ? AND ? ORDER BY 1, 2",
+            (lo - 86_400_000, hi + 86_400_000),
+        ).fetchall()
+    finally:
+        conn.execute("DELETE FROM _bf_symbols")
+        conn.execute("DELETE FROM _bf_days")
+    missing: dict[str, list[_dt.date]] = {}
+    for symbol, day in found:
+        missing.setdefault(symbol, []).append(_dt.date.fromisoformat(day))
+    return missing
+
+
+def chunk_ranges(
+    days: list[_dt.date], all_days: list[_dt.date], chunk_days: int = CHUNK_DAYS
+) -> list[tuple[_dt.date, _dt.date]]:
+    """Group sorted ``days`` into runs of consecutive trading days.
+
+    Runs are split so no range spans more than ``chunk_days`` calendar days.
+    """
+    index = {d: i for i, d in enumerate(all_days)}
+    ranges: list[tuple[_dt.date, _dt.date]] = []
+    first = prev = None
+    for day in days:
+        if (
+            first is not None
+            and index[day] == index[prev] + 1
+            and (day - first).days < chunk_days
+        ):
+            prev = day
+            continue
+        if first is not None:
+            ranges.append((first, prev))
+        first = prev = day
+    if first is not None:
+        ranges.append((first, prev))
+    return ranges
+
+
+class Checkpoint:
+    """JSON record of the day ranges already backfilled per symbol.
+
+    Ranges are kept even when Polygon returned no bars for them (holidays
+    missing from the calendar, halts, dates before a listing) so a resumed
+    run does not request them again. Only ranges fetched in full and ending
+    before yesterday are recorded, as later bars may not be published yet.
+
+    Parameters
+    ----------
+    path : str or Path, optional
+        File to load and update; ``None`` keeps the state in memory.
+    """
+
+    def __init__(self, path: str | Path | None = None) -> None:
+        self.path = Path(path) if path else None
+        self.done: dict[str, list[list[str]]] = {}
+        if self.path and self.path.exists():
+            self.done = json.loads(self.path.read_text()).get("done", {})
+
+    def covers(self, symbol: str, day: _dt.date) -> bool:
+        """Whether ``day`` lies in a completed range of ``symbol``."""
+        iso = str(day)
+        return any(lo <= iso <= hi for lo, hi in self.done.get(symbol, ()))
+
+    def mark(self, symbol: str, start: _dt.date, end: _dt.date) -> None:
+        """Record ``[start, end]`` as done and persist the file atomically."""
+        self.done.setdefault(symbol, []).append([str(start), str(end)])
+        if self.path:
+            tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+            tmp.write_text(json.dumps({"done": self.done}))
+            os.replace(tmp, self.path)
+
+
+def _fetch_chunk(
+    symbol: str, start: _dt.date, end: _dt.date, key: str
+) -> tuple[list[tuple], bool]:
+    """Return ``ohlcv`` rows for one chunk and whether every page arrived.
+
+    Pages stop early when Polygon answers without data, such as a 403 for a
+    closed market.
+    """
+    url = f"https://api.polygon.io/v2/aggs/ticker/{symbol}/range/1/day/{start}/{end}"
+    params = {"adjusted": "true", "sort": "asc", "limit": 50000, "apiKey": key}
+    bars: list[tuple] = []
+    last = None
+    for last in api.iter_pages(url, params):
+        bars.extend(rows.bar_rows(symbol, last.get("results", [])))
+    return bars, last is not None and not last.get("next_url")
 
 
-def fetch_range(conn, symbol: str, start: str, end: str) -> int:
+def backfill(
+    conn,
+    symbols: Iterable[str],
+    start: str,
+    end: str,
+    chunk_days: int = CHUNK_DAYS,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    checkpoint: str | Path | None = None,
+) -> dict[str, int]:
+    """Download the missing daily bars of ``symbols`` between two dates.
+
+    Missing trading days are found up front, grouped into chunks of at most
+    ``chunk_days`` and fetched by ``concurrency`` threads sharing the
+    collector's rate limit. Each chunk is written with one bulk insert from
+    the calling thread and, once all its pages arrived, its days before
+    yesterday are recorded in ``checkpoint``; failed chunks are logged and
+    left for the next run.
+
+    Parameters
+    ----------
+    conn : sqlite3.Connection
+        Database connection with an ``ohlcv`` table.
+    symbols : iterable of str
+        Ticker symbols to backfill.
+    start, end : str
+        Inclusive date range ``YYYY-MM-DD``.
+    chunk_days : int, default 365
+        Maximum calendar days per request.
+    concurrency : int, default 4
+        Number of chunks fetched in parallel.
+    checkpoint : str or Path, optional
+        JSON file allowing an interrupted backfill to resume.
+
+    Returns
+    -------
+    dict[str, int]
+        Bars inserted per symbol.
+    """
+    s = _dt.date.fromisoformat(start)
+    e = _dt.date.fromisoformat(end)
+    if s > e:
+        raise ValueError("start date after end date")
+    symbols = list(dict.fromkeys(symbols))
+    state = Checkpoint(checkpoint)
+    all_days = trading_days(s, e)
+    missing = missing_days(conn, symbols, s, e)
+    chunks = [
+        (symbol, lo, hi)
+        for symbol in symbols
+        for lo, hi in chunk_ranges(
+            [d for d in missing.get(symbol, []) if not state.covers(symbol, d)],
+            all_days,
+            chunk_days,
+        )
+    ]
+    inserted = dict.fromkeys(symbols, 0)
+    if not chunks:
+        return inserted
+    key = api._get_polygon_key()
+    # Bars of yesterday and later may still be published
+    settled = _dt.date.today() - _dt.timedelta(days=2)
+    logging.info("Backfilling %d chunks for %d symbols", len(chunks), len(symbols))
+    with ThreadPoolExecutor(max_workers=max(concurrency, 1)) as pool:
+        futures = {pool.submit(_fetch_chunk, *chunk, key): chunk for chunk in chunks}
+        for future in as_completed(futures):
+            symbol, lo, hi = futures[future]
+            try:
+                bars, complete = future.result()
+            except Exception as exc:
+                logging.error("Backfill %s %s..%s failed: %s", symbol, lo, hi, exc)
+                continue
+            wanted = {str(d) for d in missing[symbol] if lo <= d <= hi}
+            new = []
+            for bar in bars:
+                day = _bar_day(bar[1])
+                if day in wanted:
+                    wanted.discard(day)
+                    new.append(bar)
+            inserted[symbol] += db.insert_rows(conn, "ohlcv", new)
+            if not complete:
+                logging.warning("Backfill %s %s..%s stopped early", symbol, lo, hi)
+            elif lo <= settled:
+                state.mark(symbol, lo, min(hi, settled))
+    return inserted
+
+
+def _bar_day(t: int) -> str:
+    """Return the trading date of a daily bar stamped ``t`` (epoch ms)."""
+    stamp = t / 1000 + _HALF_DAY_SEC
+    return str(_dt.datetime.fromtimestamp(stamp, _dt.timezone.utc).date())
+
+
+def fetch_range(conn, symbol: str, start: str, end: str, **kwargs) -> int:
     """Download missing OHLCV rows for the given date range.
 
     Parameters
@@ -18,59 +245,43 @@ def fetch_range(conn, symbol: str, start: str, end: str) -> int:
         Start date ``YYYY-MM-DD``.
     end : str
         End date ``YYYY-MM-DD``.
+    **kwargs
+        Passed to :func:`backfill`.
 
     Returns
     -------
     int
         Number of bars inserted into the database.
     """
-    s = _dt.date.fromisoformat(start)
-    e = _dt.date.fromisoformat(end)
-    if s > e:
-        raise ValueError("start date after end date")
-
-    url = f"https://api.polygon.io/v2/aggs/ticker/{symbol}/range/1/day/{s}/{e}"
-    params = {"adjusted": "true", "apiKey": api._get_polygon_key()}
-    data = api.rate_limited_get(url, params)
-    inserted = 0
-    c = conn.cursor()
-    for bar in data.get("results", []):
-        ts = bar["t"]
-        cur = c.execute(
-            "SELECT 1 FROM ohlcv WHERE symbol=? AND t=?", (symbol, ts)
-        ).fetchone()
-        if cur:
-            continue
-        c.execute(
-            "INSERT OR REPLACE INTO ohlcv VALUES (?,?,?,?,?,?,?)",
-            (
-                symbol,
-                ts,
-                bar["o"],
-                bar["h"],
-                bar["l"],
-                bar["c"],
-                bar["v"],
-            ),
-        )
-        inserted += 1
-    conn.commit()
-    return inserted
+    return backfill(conn, [symbol], start, end, **kwargs)[symbol]
 
 
 def main(argv: list[str] | None = None) -> int:
     """CLI entry point for backfilling missing bars."""
     load_env()
     parser = argparse.ArgumentParser(description="Backfill historical OHLCV")
-    parser.add_argument("symbol", help="Ticker symbol")
+    parser.add_argument("symbol", help="Ticker symbol or comma-separated list")
     parser.add_argument("start", help="Start date YYYY-MM-DD")
     parser.add_argument("end", help="End date YYYY-MM-DD")
     parser.add_argument("--db-file", default="market_data.db")
+    parser.add_argument("--chunk-days", type=int, default=CHUNK_DAYS)
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    parser.add_argument(
+        "--checkpoint", default=None, help="JSON file to resume an interrupted run"
+    )
     args = parser.parse_args(argv)
 
     conn = db.init_db(args.db_file)
-    count = fetch_range(conn, args.symbol, args.start, args.end)
-    print(f"Inserted {count} rows")
+    counts = backfill(
+        conn,
+        [s for s in args.symbol.split(",") if s],
+        args.start,
+        args.end,
+        chunk_days=args.chunk_days,
+        concurrency=args.concurrency,
+        checkpoint=args.checkpoint,
+    )
+    print(f"Inserted {sum(counts.values())} rows")
     return 0
 
 
@@ -0,0 +1,317 @@
+"""Incremental OHLCV bar aggregation from streamed trades."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import sqlite3
+from collections import deque
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+
+from . import db
+from .events import Trade
+
+# Bar width in milliseconds and ring capacity (completed bars kept) per interval
+INTERVALS: dict[str, int] = {"1s": 1_000, "1m": 60_000, "5m": 300_000}
+CAPACITY: dict[str, int] = {"1s": 900, "1m": 1_440, "5m": 288}
+DEFAULT_INTERVALS = ("1s", "1m", "5m")
+# Completed bars of these intervals are written to the mapped table
+DEFAULT_TABLES: dict[str, str] = {"1m": "stream_minute_bars"}
+DEFAULT_LATENESS_MS = 2_000
+DEFAULT_FLUSH_MS = 1_000
+# Trades are remembered this long (in stream time) to drop repeated prints
+DEFAULT_DEDUPE_MS = 15 * 60 * 1000
+
+COLUMNS = ("t", "open", "high", "low", "close", "volume")
+
+
+class BarRing:
+    """Fixed-size ring of completed bars plus the bar being built.
+
+    Completed bars live in preallocated NumPy arrays; the open bar is kept in
+    plain attributes so each trade only touches Python scalars. Late trades
+    for a bar missing from the ring, such as backfilled outage prints, insert
+    that bar in time order while it is newer than the oldest retained one.
+
+    Parameters
+    ----------
+    width : int
+        Bar width in milliseconds.
+    capacity : int
+        Number of completed bars retained; older bars are overwritten.
+    """
+
+    def __init__(self, width: int, capacity: int) -> None:
+        self.width = width
+        self.capacity = max(capacity, 1)
+        self.t = np.zeros(self.capacity, dtype=np.int64)
+        self.ohlcv = np.zeros((self.capacity, 5), dtype=np.float64)
+        # Time of the trade that set each bar's close
+        self.last = np.zeros(self.capacity, dtype=np.int64)
+        self.closed = 0
+        self.first: int | None = None
+        self.start: int | None = None
+        self.latest = -1
+        self.open = self.high = self.low = self.close = 0.0
+        self.volume = 0.0
+        self.last_t = 0
+
+    def add(self, t: int, price: float, size: float) -> list[int]:
+        """Apply a trade and return ring slots of bars completed or amended."""
+        start = t - t % self.width
+        if start == self.start:
+            if price > self.high:
+                self.high = price
+            elif price < self.low:
+                self.low = price
+            if t >= self.last_t:
+                self.close = price
+                self.last_t = t
+            self.volume += size
+            return []
+        if start > self.latest:
+            done = [] if self.start is None else [self._close()]
+            if self.first is None:
+                self.first = start
+            self.start = self.latest = start
+            self.open = self.high = self.low = self.close = price
+            self.volume = size
+            self.last_t = t
+            return done
+        return self._amend(t, start, price, size)
+
+    def roll(self, watermark: int) -> list[int]:
+        """Complete the open bar if it ended before ``watermark``."""
+        if self.start is not None and self.start + self.width <= watermark:
+            slot = self._close()
+            self.start = None
+            return [slot]
+        return []
+
+    def row(self, slot: int) -> tuple:
+        """Return ``(t, open, high, low, close, volume)`` stored at ``slot``."""
+        return (int(self.t[slot]), *self.ohlcv[slot].tolist())
+
+    def frame(self, include_open: bool = True) -> pd.DataFrame:
+        """Return retained bars in time order as a DataFrame."""
+        n = min(self.closed, self.capacity)
+        order = np.arange(self.closed - n, self.closed) % self.capacity
+        t = self.t[order]
+        values = self.ohlcv[order]
+        if include_open and self.start is not None:
+            t = np.append(t, self.start)
+            values = np.vstack(
+                [values, [self.open, self.high, self.low, self.close, self.volume]]
+            )
+        df = pd.DataFrame(values, columns=COLUMNS[1:])
+        df.insert(0, "t", t)
+        return df
+
+    def _close(self) -> int:
+        slot = self.closed % self.capacity
+        self.t[slot] = self.start
+        self.ohlcv[slot] = (self.open, self.high, self.low, self.close, self.volume)
+        self.last[slot] = self.last_t
+        self.closed += 1
+        return slot
+
+    def _amend(self, t: int, start: int, price: float, size: float) -> list[int]:
+        """Fold a late trade into its completed bar, inserting a missing one."""
+        n = min(self.closed, self.capacity)
+        slots = np.flatnonzero(self.t[:n] == start) if n else ()
+        if not len(slots):
+            return self._insert(t, start, price, size)
+        slot = int(slots[0])
+        bar = self.ohlcv[slot]
+        bar[1] = max(bar[1], price)
+        bar[2] = min(bar[2], price)
+        if t >= self.last[slot]:
+            bar[3] = price
+            self.last[slot] = t
+        bar[4] += size
+        return [slot]
+
+    def _insert(self, t: int, start: int, price: float, size: float) -> list[int]:
+        """Add a completed bar for ``start`` between the retained ones."""
+        n = min(self.closed, self.capacity)
+        order = np.arange(self.closed - n, self.closed) % self.capacity
+        times = self.t[order]
+        if n == self.capacity and start < times[0]:
+            return []
+        pos = int(np.searchsorted(times, start))
+        times = np.insert(times, pos, start)
+        values = np.insert(self.ohlcv[order], pos, (price,) * 4 + (size,), axis=0)
+        last = np.insert(self.last[order], pos, t)
+        if len(times) > self.capacity:
+            times, values, last = times[1:], values[1:], last[1:]
+            pos -= 1
+        # Rewritten oldest first from slot 0, so the next close overwrites
+        # the oldest bar
+        m = len(times)
+        self.t[:m], self.ohlcv[:m], self.last[:m] = times, values, last
+        self.closed = m
+        return [pos]
+
+
+class BarAggregator:
+    """Maintain rolling bars per symbol and queue completed ones for writing.
+
+    Bars complete when a later trade for the symbol arrives or when the
+    stream's event-time watermark (newest trade time seen, less
+    ``lateness_ms``) passes their end, so the delayed feed works the same as
+    the real-time one. Late trades amend bars still held in the ring, or
+    rebuild missing ones, and the bar is written again. The first bar of each
+    symbol started before its first trade was seen, so it is only kept in
+    memory and never written. A trade with the same time, price and size as
+    one added in the last ``dedupe_ms`` is taken for a repeat, such as a
+    backfilled print the stream already delivered, and ignored.
+
+    Parameters
+    ----------
+    intervals : iterable of str, default ("1s", "1m", "5m")
+        Keys of :data:`INTERVALS` to maintain.
+    tables : dict, default ``{"1m": "stream_minute_bars"}``
+        Tables receiving completed bars of each interval.
+    lateness_ms : int, default 2000
+        How long a bar stays open after its end for out-of-order trades.
+    dedupe_ms : int, default 900000
+        How long, in stream time, a trade is remembered to drop repeats.
+    """
+
+    def __init__(
+        self,
+        intervals: Iterable[str] = DEFAULT_INTERVALS,
+        tables: dict[str, str] | None = None,
+        lateness_ms: int = DEFAULT_LATENESS_MS,
+        dedupe_ms: int = DEFAULT_DEDUPE_MS,
+    ) -> None:
+        self.intervals = tuple(intervals)
+        unknown = set(self.intervals) - set(INTERVALS)
+        if unknown:
+            raise ValueError(f"Unknown bar intervals: {sorted(unknown)}")
+        self.tables = DEFAULT_TABLES if tables is None else tables
+        self.lateness = lateness_ms
+        self.dedupe = dedupe_ms
+        self.watermark = 0
+        # Keys of recent trades, and (watermark, key) in the order they came
+        self._seen: set[tuple] = set()
+        self._seen_order: deque[tuple[int, tuple]] = deque()
+        self._rings: dict[str, dict[str, BarRing]] = {}
+        self._pending: dict[str, dict[tuple[str, int], tuple]] = {}
+
+    def _symbol_rings(self, symbol: str) -> dict[str, BarRing]:
+        rings = self._rings.get(symbol)
+        if rings is None:
+            rings = {
+                name: BarRing(INTERVALS[name], CAPACITY[name])
+                for name in self.intervals
+            }
+            self._rings[symbol] = rings
+        return rings
+
+    def add(self, trade: Trade) -> None:
+        """Fold ``trade`` into every interval of its symbol."""
+        if not trade.symbol or not trade.price or not trade.t:
+            return
+        key = (trade.symbol, trade.t, trade.price, trade.size)
+        if key in self._seen:
+            return
+        if trade.t > self.watermark:
+            self.watermark = trade.t
+        self._remember(key)
+        for name, ring in self._symbol_rings(trade.symbol).items():
+            done = ring.add(trade.t, trade.price, trade.size)
+            if done:
+                self._queue(trade.symbol, name, ring, done)
+
+    def _remember(self, key: tuple) -> None:
+        order = self._seen_order
+        cutoff = self.watermark - self.dedupe
+        while order and order[0][0] < cutoff:
+            self._seen.discard(order.popleft()[1])
+        self._seen.add(key)
+        order.append((self.watermark, key))
+
+    def roll(self, now: int | None = None) -> None:
+        """Complete bars that ended before ``now`` (default: the watermark)."""
+        cutoff = (self.watermark if now is None else now) - self.lateness
+        for symbol, rings in self._rings.items():
+            for name, ring in rings.items():
+                done = ring.roll(cutoff)
+                if done:
+                    self._queue(symbol, name, ring, done)
+
+    def _queue(self, symbol: str, name: str, ring: BarRing, slots: list[int]) -> None:
+        table = self.tables.get(name)
+        if table is None:
+            return
+        pending = self._pending.setdefault(table, {})
+        for slot in slots:
+            row = ring.row(slot)
+            if row[0] <= ring.first:
+                continue
+            pending[(symbol, row[0])] = (symbol, *row)
+
+    def pending(self) -> int:
+        """Number of completed bars waiting to be written."""
+        return sum(len(rows) for rows in self._pending.values())
+
+    def flush(self, conn: sqlite3.Connection) -> int:
+        """Write queued bars and return the number of rows written."""
+        pending, self._pending = self._pending, {}
+        written = 0
+        for table, rows in pending.items():
+            try:
+                written += db.insert_rows(conn, table, list(rows.values()))
+            except sqlite3.Error as exc:
+                logging.error("Dropping %d %s bars: %s", len(rows), table, exc)
+        return written
+
+    def bars(
+        self, symbol: str, interval: str = "1m", include_open: bool = True
+    ) -> pd.DataFrame:
+        """Return the retained ``interval`` bars of ``symbol``."""
+        ring = self._rings.get(symbol, {}).get(interval)
+        if ring is None:
+            return pd.DataFrame(columns=COLUMNS)
+        return ring.frame(include_open)
+
+
+async def record_bars(
+    sub,
+    conn: sqlite3.Connection,
+    aggregator: BarAggregator | None = None,
+    flush_ms: int = DEFAULT_FLUSH_MS,
+) -> BarAggregator:
+    """Aggregate trades from hub ``sub`` and write completed bars.
+
+    Parameters
+    ----------
+    sub : Subscription
+        Trade subscription from a :class:`~.stream_async.StreamHub`, created
+        with ``backfill=True`` so bars of an outage are rebuilt.
+    conn : sqlite3.Connection
+        Database receiving completed bars.
+    aggregator : BarAggregator, optional
+        Aggregator to feed, created with the defaults when omitted.
+    flush_ms : int, default 1000
+        Interval between writes of completed bars.
+    """
+    agg = aggregator or BarAggregator()
+    loop = asyncio.get_running_loop()
+    next_flush = loop.time() + flush_ms / 1000
+    async for evt in sub:
+        if type(evt) is Trade:
+            agg.add(evt)
+        if loop.time() >= next_flush:
+            next_flush = loop.time() + flush_ms / 1000
+            agg.roll()
+            agg.flush(conn)
+    # Bars still open when the stream ended may lack trades, so only those
+    # past the watermark are written
+    agg.roll()
+    agg.flush(conn)
+    return agg
@@ -0,0 +1,197 @@
+"""Conflating Socket.IO broadcaster for dashboard quote updates."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import threading
+from collections import Counter
+from typing import Callable, Iterable
+
+OVERVIEW_ROOM = "overview"
+INTERVAL_MS = int(os.getenv("OVERVIEW_INTERVAL_MS", "250"))
+# Longest watchlist a client may send
+MAX_WATCH_SYMBOLS = 50
+# Redis hash of watch-set rooms and the number of clients in each
+WATCH_SETS_KEY = "overview:watch_sets"
+
+
+def watch_room(symbols: Iterable[str]) -> str:
+    """Return the room shared by clients watching exactly ``symbols``."""
+    return "watch:" + ",".join(sorted(set(symbols)))
+
+
+def room_symbols(room: str) -> list[str]:
+    """Return the symbols of a :func:`watch_room` name."""
+    return room.split(":", 1)[1].split(",")
+
+
+class WatchSets:
+    """Count the clients in each :func:`watch_room` of this process."""
+
+    def __init__(self) -> None:
+        self._counts: Counter[str] = Counter()
+        self._lock = threading.Lock()
+
+    def add(self, symbols: Iterable[str]) -> str:
+        """Register one more client watching ``symbols`` and return its room."""
+        room = watch_room(symbols)
+        with self._lock:
+            self._counts[room] += 1
+        return room
+
+    def discard(self, room: str) -> None:
+        """Drop one client from ``room``, forgetting the room when empty."""
+        with self._lock:
+            self._counts[room] -= 1
+            if self._counts[room] <= 0:
+                del self._counts[room]
+
+    def rooms(self) -> list[str]:
+        """Return the watch-set rooms holding at least one client."""
+        with self._lock:
+            return list(self._counts)
+
+
+class RedisWatchSets(WatchSets):
+    """Watch-set counts kept in Redis, shared with ``stream-hub``.
+
+    Parameters
+    ----------
+    client : redis.Redis
+        Connection holding the :data:`WATCH_SETS_KEY` hash.
+    """
+
+    def __init__(self, client) -> None:
+        self.client = client
+
+    def add(self, symbols: Iterable[str]) -> str:
+        room = watch_room(symbols)
+        self.client.hincrby(WATCH_SETS_KEY, room, 1)
+        return room
+
+    def discard(self, room: str) -> None:
+        if self.client.hincrby(WATCH_SETS_KEY, room, -1) <= 0:
+            self.client.hdel(WATCH_SETS_KEY, room)
+
+    def rooms(self) -> list[str]:
+        try:
+            rooms = self.client.hkeys(WATCH_SETS_KEY)
+        except Exception as exc:
+            logging.warning("Watch sets unavailable: %s", exc)
+            return []
+        return [r.decode() if isinstance(r, bytes) else r for r in rooms]
+
+
+def make_watch_sets(redis_url: str | None = None) -> WatchSets:
+    """Return watch sets kept in Redis at ``redis_url``, or in process."""
+    if redis_url:
+        try:
+            import redis
+
+            return RedisWatchSets(redis.Redis.from_url(redis_url))
+        except ImportError:  # pragma: no cover - redis is a dependency
+            logging.warning("redis not installed; watch sets stay in process")
+    return WatchSets()
+
+
+class QuoteBroadcaster:
+    """Keep the latest quote per symbol and emit them in periodic batches.
+
+    Every ``interval_ms`` the pending quotes are sent as one ``event`` frame
+    (a list of ``{"symbol", "p"}`` objects) to ``default_room``. Clients
+    watching a few symbols join the :func:`watch_room` of their watchlist
+    instead, and each such room registered in ``watch_sets`` gets one frame
+    holding its pending symbols, so every client receives at most one frame
+    per interval. With :class:`RedisWatchSets` a broadcaster in another
+    process (``stream-hub`` emitting through the Socket.IO message queue)
+    sees the rooms of the web clients. Quotes published between flushes
+    overwrite each other, so a busy symbol costs one entry per frame however
+    often it ticks.
+
+    Parameters
+    ----------
+    emit : callable
+        Socket.IO ``emit(event, data, to=room)`` function.
+    interval_ms : int, default ``OVERVIEW_INTERVAL_MS`` or 250
+        Flush period in milliseconds.
+    event : str, default "overview_quotes"
+        Event name of the batched frames.
+    default_room : str or None, default "overview"
+        Room receiving every symbol; ``None`` disables it.
+    watch_sets : WatchSets, optional
+        Registry of watch-set rooms to emit to; ``None`` emits to
+        ``default_room`` only.
+    """
+
+    def __init__(
+        self,
+        emit: Callable,
+        interval_ms: int = INTERVAL_MS,
+        event: str = "overview_quotes",
+        default_room: str | None = OVERVIEW_ROOM,
+        watch_sets: WatchSets | None = None,
+    ) -> None:
+        self.emit = emit
+        self.interval = interval_ms / 1000
+        self.event = event
+        self.default_room = default_room
+        self.watch_sets = watch_sets
+        self._pending: dict[str, dict] = {}
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._stop = threading.Event()
+
+    def publish(self, symbol: str, price: float) -> None:
+        """Record the latest ``price`` for ``symbol``."""
+        with self._lock:
+            self._pending[symbol] = {"symbol": symbol, "p": price}
+
+    def flush(self) -> int:
+        """Emit pending quotes and return the number of frames sent."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+        frames = 0
+        if self.default_room is not None:
+            self.emit(self.event, list(pending.values()), to=self.default_room)
+            frames += 1
+        rooms = self.watch_sets.rooms() if self.watch_sets is not None else ()
+        for room in rooms:
+            quotes = [pending[s] for s in room_symbols(room) if s in pending]
+            if quotes:
+                self.emit(self.event, quotes, to=room)
+                frames += 1
+        return frames
+
+    async def run(self) -> None:
+        """Flush every interval until cancelled, flushing once more on exit."""
+        try:
+            while True:
+                await asyncio.sleep(self.interval)
+                self.flush()
+        finally:
+            self.flush()
+
+    def start(self) -> None:
+        """Flush from a background thread, for synchronous producers."""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+
+        def loop() -> None:
+            while not self._stop.wait(self.interval):
+                self.flush()
+
+        self._thread = threading.Thread(target=loop, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the background thread and flush remaining quotes."""
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+        self.flush()
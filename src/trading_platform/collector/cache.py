@@ -0,0 +1,189 @@
+"""Bounded LRU/TTL cache for REST responses shared by the collectors."""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from . import codec
+
+MAX_ENTRIES = int(os.getenv("HTTP_CACHE_MAX_ENTRIES", "1024"))
+MAX_BYTES = int(os.getenv("HTTP_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+CACHE_PATH = os.getenv("HTTP_CACHE_PATH")
+
+# Seconds to keep responses per endpoint, matched on URL path prefix. Paths not
+# listed fall back to ``CACHE_TTL``; ``CACHE_TTL=0`` disables caching entirely.
+ENDPOINT_TTLS: list[tuple[str, float]] = [
+    ("/vX/reference/financials", 86400),
+    ("/v3/reference/splits", 86400),
+    ("/v1/indicators/", 3600),
+    ("/v1/marketstatus/", 30),
+    ("/v2/snapshot/", 5),
+    ("/v3/snapshot", 5),
+]
+
+# Query parameters excluded from cache keys so secrets never reach the disk.
+_SECRET_PARAMS = {"apiKey"}
+
+
+def cache_key(url: str, params: dict | None = None) -> str:
+    """Return the cache key for ``url`` and ``params`` without API keys."""
+    clean = {k: v for k, v in (params or {}).items() if k not in _SECRET_PARAMS}
+    return url + json.dumps(clean, sort_keys=True, default=str)
+
+
+def ttl_for(url: str, default: float = 0) -> float:
+    """Return the cache TTL in seconds for ``url``.
+
+    ``default`` is the global TTL: when it is ``0`` or less caching is off
+    and :data:`ENDPOINT_TTLS` are not applied either.
+    """
+    if default <= 0:
+        return 0
+    path = urlsplit(url).path
+    for prefix, ttl in ENDPOINT_TTLS:
+        if path.startswith(prefix):
+            return ttl
+    return default
+
+
+class ResponseCache:
+    """Thread-safe LRU cache with per-entry expiry and optional SQLite backing.
+
+    Entries are kept serialised and every hit is decoded afresh, so callers
+    may modify the returned response without changing the cache.
+
+    Parameters
+    ----------
+    max_entries : int
+        Maximum number of responses kept in memory.
+    max_bytes : int
+        Maximum total size of the serialised responses kept in memory.
+    path : str or Path, optional
+        SQLite file used to persist entries across restarts.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = MAX_ENTRIES,
+        max_bytes: int = MAX_BYTES,
+        path: str | os.PathLike[str] | None = None,
+    ) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._disk: sqlite3.Connection | None = None
+        if path:
+            self._open_disk(Path(path))
+
+    def _open_disk(self, path: Path) -> None:
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(path, check_same_thread=False)
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS http_cache (
+                    key TEXT PRIMARY KEY,
+                    expires REAL,
+                    body TEXT
+                )"""
+            )
+            conn.execute("DELETE FROM http_cache WHERE expires < ?", (time.time(),))
+            conn.commit()
+        except sqlite3.Error as exc:
+            logging.warning("HTTP cache disk backend disabled: %s", exc)
+            return
+        self._disk = conn
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def nbytes(self) -> int:
+        """Total serialised size of in-memory entries."""
+        return self._bytes
+
+    def get(self, key: str) -> dict | None:
+        """Return the cached response for ``key`` or ``None`` if absent/expired."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    return codec.loads(entry[1])
+                self._drop(key)
+            if self._disk is None:
+                return None
+            row = self._disk.execute(
+                "SELECT expires, body FROM http_cache WHERE key=?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[0] <= now:
+                self._disk.execute("DELETE FROM http_cache WHERE key=?", (key,))
+                self._disk.commit()
+                return None
+            self._store(key, row[0], row[1])
+            return codec.loads(row[1])
+
+    def set(self, key: str, data: dict, ttl: float) -> None:
+        """Cache ``data`` under ``key`` for ``ttl`` seconds."""
+        if ttl <= 0:
+            return
+        body = codec.dumps(data)
+        expires = time.time() + ttl
+        with self._lock:
+            self._store(key, expires, body)
+            if self._disk is not None:
+                self._disk.execute(
+                    "INSERT OR REPLACE INTO http_cache VALUES (?,?,?)",
+                    (key, expires, body),
+                )
+                self._disk.commit()
+
+    def clear(self) -> None:
+        """Remove all entries from memory and disk."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            if self._disk is not None:
+                self._disk.execute("DELETE FROM http_cache")
+                self._disk.commit()
+
+    def _store(self, key: str, expires: float, body: str) -> None:
+        if len(body) > self.max_bytes:
+            return
+        self._drop(key)
+        self._entries[key] = (expires, body)
+        self._bytes += len(body)
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            _, (_, old) = self._entries.popitem(last=False)
+            self._bytes -= len(old)
+
+    def _drop(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= len(entry[1])
+
+
+_CACHE: ResponseCache | None = None
+_CACHE_LOCK = threading.Lock()
+
+
+def get_cache() -> ResponseCache:
+    """Return the process-wide response cache."""
+    global _CACHE
+    if _CACHE is None:
+        with _CACHE_LOCK:
+            if _CACHE is None:
+                _CACHE = ResponseCache(MAX_ENTRIES, MAX_BYTES, CACHE_PATH)
+    return _CACHE
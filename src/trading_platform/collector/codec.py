@@ -0,0 +1,93 @@
+"""Pluggable JSON codec for WebSocket messages and REST payloads.
+
+The fastest installed backend is used: ``orjson``, then ``msgspec``, then the
+standard library. Set ``JSON_BACKEND`` to ``orjson``, ``msgspec`` or ``json``
+to force one.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+from typing import Any, Callable
+
+Backend = tuple[Callable[[Any], Any], Callable[[Any], str], type[Exception]]
+
+
+def _stdlib() -> Backend:
+    return json.loads, json.dumps, ValueError
+
+
+def _orjson() -> Backend:
+    import orjson
+
+    return orjson.loads, lambda obj: orjson.dumps(obj).decode(), ValueError
+
+
+def _msgspec() -> Backend:
+    import msgspec
+
+    decoder = msgspec.json.Decoder()
+    encoder = msgspec.json.Encoder()
+    return (
+        decoder.decode,
+        lambda obj: encoder.encode(obj).decode(),
+        msgspec.DecodeError,
+    )
+
+
+BACKENDS: dict[str, Callable[[], Backend]] = {
+    "orjson": _orjson,
+    "msgspec": _msgspec,
+    "json": _stdlib,
+}
+
+
+def use(name: str | None = None) -> str:
+    """Select the codec backend and return its name.
+
+    Parameters
+    ----------
+    name : str, optional
+        Backend to use. ``None`` picks the first importable backend in
+        :data:`BACKENDS` order.
+    """
+    global loads, dumps, DecodeError, BACKEND
+    names = [name] if name else list(BACKENDS)
+    for candidate in names:
+        factory = BACKENDS.get(candidate)
+        if factory is None:
+            logging.warning("Unknown JSON backend %s; using stdlib", candidate)
+            continue
+        try:
+            loads, dumps, DecodeError = factory()
+        except ImportError:
+            if name:
+                logging.warning("JSON backend %s not installed; using stdlib", name)
+            continue
+        BACKEND = candidate
+        return BACKEND
+    loads, dumps, DecodeError = _stdlib()
+    BACKEND = "json"
+    return BACKEND
+
+
+loads, dumps, DecodeError = _stdlib()
+BACKEND = "json"
+use(os.getenv("JSON_BACKEND") or None)
+
+
+def decode_events(message: str | bytes) -> list[dict]:
+    """Return the list of events in a WebSocket ``message``.
+
+    Malformed messages yield an empty list and a single event object is
+    wrapped in a list, so stream loops can iterate the result directly.
+    """
+    try:
+        events = loads(message)
+    except DecodeError:
+        return []
+    if isinstance(events, dict):
+        return [events]
+    return events if isinstance(events, list) else []
@@ -1,36 +1,172 @@
 import sqlite3
 from pathlib import Path
 
+from trading_platform import telemetry
+from trading_platform.config import Config
+from trading_platform.db import connect
 from trading_platform.reports import REPORTS_DIR
 
+# Ordered schema migrations; migration ``n`` brings ``PRAGMA user_version`` to
+# ``n``. Append new entries, never edit applied ones.
+MIGRATIONS: list[tuple[str, ...]] = [
+    # 1: covering indexes for the latest-quote, overview and news reads
+    (
+        "CREATE INDEX IF NOT EXISTS idx_realtime_quotes_symbol_t "
+        "ON realtime_quotes(symbol, t, price)",
+        "CREATE INDEX IF NOT EXISTS idx_ohlcv_t ON ohlcv(t, symbol, close)",
+        "CREATE INDEX IF NOT EXISTS idx_news_published "
+        "ON news(published_at, title, url)",
+    ),
+    # 2: tick store keyed by (symbol_id, t) plus a maintained latest quote;
+    # ``realtime_quotes`` becomes a writable view over it
+    (
+        """CREATE TABLE IF NOT EXISTS symbols (
+            id INTEGER PRIMARY KEY,
+            symbol TEXT NOT NULL UNIQUE
+        )""",
+        """CREATE TABLE IF NOT EXISTS ticks (
+            symbol_id INTEGER NOT NULL,
+            t INTEGER NOT NULL,
+            price REAL,
+            PRIMARY KEY(symbol_id, t)
+        ) WITHOUT ROWID""",
+        """CREATE TABLE IF NOT EXISTS latest_quotes (
+            symbol TEXT PRIMARY KEY,
+            t INTEGER NOT NULL,
+            price REAL
+        ) WITHOUT ROWID""",
+        # Plain UPDATE/INSERT instead of UPSERT: an outer INSERT OR REPLACE
+        # would override the trigger's conflict clause and could move
+        # ``latest_quotes`` backwards in time.
+        """CREATE TRIGGER IF NOT EXISTS ticks_latest AFTER INSERT ON ticks
+        BEGIN
+            UPDATE latest_quotes SET t = NEW.t, price = NEW.price
+            WHERE symbol = (SELECT symbol FROM symbols WHERE id = NEW.symbol_id)
+            AND t <= NEW.t;
+            INSERT INTO latest_quotes(symbol, t, price)
+            SELECT symbol, NEW.t, NEW.price FROM symbols
+            WHERE id = NEW.symbol_id
+            AND NOT EXISTS (
+                SELECT 1 FROM latest_quotes l WHERE l.symbol = symbols.symbol
+            );
+        END""",
+        "INSERT INTO symbols(symbol) SELECT DISTINCT symbol FROM realtime_quotes "
+        "WHERE symbol IS NOT NULL",
+        "INSERT OR REPLACE INTO ticks(symbol_id, t, price) "
+        "SELECT s.id, q.t, q.price FROM realtime_quotes q "
+        "JOIN symbols s ON s.symbol = q.symbol ORDER BY q.t",
+        "DROP TABLE realtime_quotes",
+        """CREATE VIEW realtime_quotes AS
+            SELECT s.symbol AS symbol, k.t AS t, k.price AS price
+            FROM ticks k JOIN symbols s ON s.id = k.symbol_id""",
+        # Symbols are added with NOT EXISTS rather than INSERT OR IGNORE so an
+        # outer INSERT OR REPLACE cannot reassign an existing symbol id.
+        """CREATE TRIGGER realtime_quotes_insert
+        INSTEAD OF INSERT ON realtime_quotes
+        BEGIN
+            INSERT INTO symbols(symbol) SELECT NEW.symbol
+            WHERE NOT EXISTS (SELECT 1 FROM symbols WHERE symbol = NEW.symbol);
+            INSERT OR REPLACE INTO ticks(symbol_id, t, price) VALUES (
+                (SELECT id FROM symbols WHERE symbol = NEW.symbol), NEW.t, NEW.price
+            );
+        END""",
+    ),
+    # 3: bars built from the trade stream, kept apart from the REST
+    # aggregates in ``minute_bars`` so neither overwrites the other
+    (
+        """CREATE TABLE IF NOT EXISTS stream_minute_bars (
+            symbol TEXT,
+            t INTEGER,
+            open REAL,
+            high REAL,
+            low REAL,
+            close REAL,
+            volume REAL,
+            PRIMARY KEY(symbol, t)
+        )""",
+    ),
+    # 4: per-source fetch watermarks, so incremental REST fetches do not
+    # resume from rows another writer added; seeded from the newest stored
+    # minute bar, the previous resume point
+    (
+        """CREATE TABLE IF NOT EXISTS fetch_state (
+            symbol TEXT NOT NULL,
+            source TEXT NOT NULL,
+            t INTEGER NOT NULL,
+            PRIMARY KEY(symbol, source)
+        ) WITHOUT ROWID""",
+        "INSERT OR IGNORE INTO fetch_state(symbol, source, t) "
+        "SELECT symbol, 'minute_bars', MAX(t) FROM minute_bars "
+        "WHERE symbol IS NOT NULL AND t IS NOT NULL GROUP BY symbol",
+    ),
+]
 
-def init_db(db_file: str) -> sqlite3.Connection:
+
+# Hot dashboard reads: ``/api/overview`` fills one placeholder per watched
+# symbol, ``/api/news`` lists the latest headlines
+OVERVIEW_SQL = (
+    "SELECT symbol, close FROM ohlcv WHERE t=(SELECT MAX(t) FROM ohlcv) "
+    "AND symbol IN ({})"
+)
+NEWS_SQL = "SELECT title, url FROM news ORDER BY published_at DESC LIMIT 5"
+
+
+def migrate(conn: sqlite3.Connection) -> int:
+    """Apply pending :data:`MIGRATIONS` and return the resulting schema version.
+
+    Each migration runs in its own transaction together with the
+    ``user_version`` bump, so an interrupted upgrade resumes where it stopped.
+    """
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    pending = MIGRATIONS[version:]
+    for number, statements in enumerate(pending, start=version + 1):
+        conn.execute("BEGIN")
+        try:
+            for stmt in statements:
+                conn.execute(stmt)
+            conn.execute(f"PRAGMA user_version={number}")
+        except sqlite3.Error:
+            conn.rollback()
+            raise
+        conn.commit()
+    return max(version, len(MIGRATIONS))
+
+
+def init_db(db_file: str, config: Config | None = None) -> sqlite3.Connection:
     """Initialize SQLite database and return connection.
 
+    The connection comes from :func:`trading_platform.db.connect`, so it uses
+    the WAL/pragma profile configured on ``config``.
+
     Tables
     ------
     - ``ohlcv`` (symbol, t, open, high, low, close, volume)
     - ``minute_bars`` (symbol, t, open, high, low, close, volume)
+    - ``stream_minute_bars`` with the ``minute_bars`` columns, written by
+      :mod:`~trading_platform.collector.bars`
     - ``fundamentals`` (symbol, fetched_at, data)
     - ``corporate_actions`` (symbol, execution_date, action, details)
     - ``indicators`` (symbol, t, name, value)
-    - ``realtime_quotes`` (symbol, t, price)
+    - ``realtime_quotes`` (symbol, t, price), a view over ``ticks``
+      (symbol_id, t, price) and ``symbols`` (id, symbol); inserts into it
+      also maintain ``latest_quotes`` (symbol, t, price)
     - ``option_chain`` (symbol, contract, expiration, strike, option_type,
       bid, ask, iv, delta, volume, open_interest)
     - ``news`` (symbol, published_at, title, url, source)
+    - ``fetch_state`` (symbol, source, t), the newest ``t`` fetched per source
     """
     if db_file == ":memory:" or db_file.startswith("file::memory"):
-        conn = sqlite3.connect(db_file, uri=db_file.startswith("file:"))
+        conn = connect(db_file, config)
     else:
         path = Path(db_file)
         if not path.is_absolute():
             path = REPORTS_DIR / path
         try:
             path.parent.mkdir(parents=True, exist_ok=True)
-            conn = sqlite3.connect(path)
+            conn = connect(path, config)
         except sqlite3.OperationalError:
             path.touch()
-            conn = sqlite3.connect(path)
+            conn = connect(path, config)
 
     c = conn.cursor()
     c.execute(
@@ -116,4 +252,93 @@ def init_db(db_file: str) -> sqlite3.Connection:
         )"""
     )
     conn.commit()
+    migrate(conn)
     return conn
+
+
+def insert_rows(
+    conn: sqlite3.Connection,
+    table: str,
+    rows: list[tuple],
+    columns: tuple[str, ...] | None = None,
+    replace: bool = True,
+) -> int:
+    """Write ``rows`` to ``table`` with one ``executemany`` in one transaction.
+
+    Parameters
+    ----------
+    conn : sqlite3.Connection
+        Database connection.
+    table : str
+        Destination table name.
+    rows : list[tuple]
+        Rows of equal width; ``columns`` names them when given.
+    columns : tuple[str, ...], optional
+        Column names for a partial insert.
+    replace : bool, default True
+        Use ``INSERT OR REPLACE`` instead of a plain ``INSERT``.
+
+    Returns
+    -------
+    int
+        Number of rows written.
+    """
+    if not rows:
+        return 0
+    verb = "INSERT OR REPLACE" if replace else "INSERT"
+    cols = f"({', '.join(columns)})" if columns else ""
+    marks = ",".join("?" * len(rows[0]))
+    with conn:
+        conn.executemany(f"{verb} INTO {table}{cols} VALUES ({marks})", rows)
+    telemetry.ROWS_WRITTEN.labels(table).inc(len(rows))
+    return len(rows)
+
+
+def changed_bars(
+    conn: sqlite3.Connection, table: str, symbol: str, bars: list[tuple]
+) -> list[tuple]:
+    """Return the ``bars`` of ``symbol`` missing from or differing in ``table``.
+
+    ``bars`` are ``(symbol, t, open, high, low, close, volume)`` rows as built
+    by :func:`.rows.bar_rows`; stored rows in their time span are read once.
+    """
+    if not bars:
+        return []
+    ts = [bar[1] for bar in bars]
+    stored = {
+        row[0]: row[1:]
+        for row in conn.execute(
+            f"SELECT t, open, high, low, close, volume FROM {table} "
+            "WHERE symbol=? AND t BETWEEN ? AND ?",
+            (symbol, min(ts), max(ts)),
+        )
+    }
+    return [bar for bar in bars if stored.get(bar[1]) != tuple(bar[2:])]
+
+
+def fetch_mark(conn: sqlite3.Connection, symbol: str, source: str) -> int | None:
+    """Return the newest ``t`` fetched for ``symbol`` from ``source``, if any."""
+    row = conn.execute(
+        "SELECT t FROM fetch_state WHERE symbol=? AND source=?", (symbol, source)
+    ).fetchone()
+    return None if row is None else row[0]
+
+
+def set_fetch_mark(conn: sqlite3.Connection, symbol: str, source: str, t: int) -> None:
+    """Advance the fetch watermark of ``symbol`` and ``source`` to ``t``.
+
+    The mark never moves backwards.
+    """
+    with conn:
+        conn.execute(
+            "INSERT INTO fetch_state(symbol, source, t) VALUES (?, ?, ?) "
+            "ON CONFLICT(symbol, source) DO UPDATE SET t = MAX(t, excluded.t)",
+            (symbol, source, t),
+        )
+
+
+def latest_quote(conn: sqlite3.Connection, symbol: str) -> tuple[int, float] | None:
+    """Return ``(t, price)`` of the newest tick for ``symbol`` or ``None``."""
+    return conn.execute(
+        "SELECT t, price FROM latest_quotes WHERE symbol=?", (symbol,)
+    ).fetchone()
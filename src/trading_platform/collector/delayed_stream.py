@@ -2,17 +2,50 @@
 
 from __future__ import annotations
 
+import asyncio
 import json
 import logging
 
 import websocket
 
-from ..webapp import socketio
+from ..webapp import quote_broadcaster
+from . import events
 from .api import WS_URL, _get_polygon_key
+from .broadcast import QuoteBroadcaster
+from .events import Quote
 
 
-def stream_overview(symbols: str = "AAPL") -> None:
-    """Stream delayed quotes for ``symbols`` and emit via Socket.IO."""
+async def emit_overview(sub, broadcaster: QuoteBroadcaster | None = None) -> None:
+    """Publish quotes from hub ``sub`` as batched ``overview_quotes`` frames.
+
+    Parameters
+    ----------
+    sub : Subscription
+        Quote subscription from a :class:`~.stream_async.StreamHub`.
+    broadcaster : QuoteBroadcaster, optional
+        Conflating broadcaster, defaulting to the web app's.
+    """
+    broadcaster = broadcaster or quote_broadcaster
+    flusher = asyncio.ensure_future(broadcaster.run())
+    try:
+        async for evt in sub:
+            if type(evt) is Quote:
+                broadcaster.publish(evt.symbol, evt.price)
+    finally:
+        flusher.cancel()
+        await asyncio.gather(flusher, return_exceptions=True)
+
+
+def stream_overview(
+    symbols: str = "AAPL", broadcaster: QuoteBroadcaster | None = None
+) -> None:
+    """Stream delayed quotes for ``symbols`` and broadcast via Socket.IO.
+
+    Quotes are conflated per symbol and emitted as ``overview_quotes``
+    batches from a background thread of ``broadcaster``, which defaults to
+    the web app's.
+    """
+    broadcaster = broadcaster or quote_broadcaster
 
     def on_open(ws):
         auth = json.dumps({"action": "auth", "params": _get_polygon_key()})
@@ -24,19 +57,11 @@ def stream_overview(symbols: str = "AAPL") -> None:
         ws.send(subs)
 
     def on_message(ws, message):
-        try:
-            events = json.loads(message)
-        except json.JSONDecodeError:
-            return
-        for evt in events:
-            if evt.get("status") == "auth_success":
+        for evt in events.decode(message):
+            if type(evt) is Quote:
+                broadcaster.publish(evt.symbol, evt.price)
+            elif type(evt) is dict and evt.get("status") == "auth_success":
                 subscribe(ws)
-            elif evt.get("ev") == "Q":
-                quote = {
-                    "symbol": evt.get("sym") or evt.get("symbol"),
-                    "p": evt.get("p") or evt.get("ap"),
-                }
-                socketio.emit("overview_quote", quote)
 
     def on_error(ws, error):
         logging.error("WebSocket error: %s", error)
@@ -52,4 +77,8 @@ def stream_overview(symbols: str = "AAPL") -> None:
         on_close=on_close,
     )
     logging.info("Streaming delayed quotes for %s", symbols)
-    ws.run_forever()
+    broadcaster.start()
+    try:
+        ws.run_forever()
+    finally:
+        broadcaster.stop()
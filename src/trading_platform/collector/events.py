@@ -0,0 +1,141 @@
+"""Typed trade and quote events decoded from Polygon WebSocket messages.
+
+Events are :class:`msgspec.Struct` objects built once per message and shared by
+every consumer, so treat them as read-only. Trade and quote messages decode
+straight into them without an intermediate dictionary; they are not
+``frozen`` because frozen construction is slower on the streaming hot path.
+"""
+
+from __future__ import annotations
+
+from typing import Union
+
+import msgspec
+
+from . import codec
+
+
+class Trade(
+    msgspec.Struct,
+    tag_field="ev",
+    tag="T",
+    rename={"symbol": "sym", "price": "p", "size": "s"},
+    gc=False,
+):
+    """Single trade print (``ev == "T"``)."""
+
+    symbol: str
+    price: float
+    size: int
+    t: int
+
+
+class Quote(
+    msgspec.Struct,
+    tag_field="ev",
+    tag="Q",
+    rename={
+        "symbol": "sym",
+        "bid": "bp",
+        "bid_size": "bs",
+        "ask": "ap",
+        "ask_size": "as",
+    },
+    gc=False,
+):
+    """Top-of-book quote (``ev == "Q"``)."""
+
+    symbol: str
+    bid: float
+    bid_size: int
+    ask: float
+    ask_size: int
+    t: int
+
+    @property
+    def price(self) -> float:
+        """Bid price, or the ask when no bid is quoted."""
+        return self.bid or self.ask
+
+
+Event = Union[Trade, Quote, dict]
+
+# Messages made only of complete trades and quotes, as Polygon streams them
+_DECODER = msgspec.json.Decoder(list[Union[Trade, Quote]])
+
+
+def _trade(evt: dict) -> Trade:
+    return Trade(
+        evt.get("sym") or evt.get("symbol") or "",
+        evt.get("p") or 0.0,
+        evt.get("s") or evt.get("size") or evt.get("v") or 0,
+        evt.get("t") or evt.get("timestamp") or 0,
+    )
+
+
+def _quote(evt: dict) -> Quote:
+    return Quote(
+        evt.get("sym") or evt.get("symbol") or "",
+        evt.get("bp") or evt.get("p") or 0.0,
+        evt.get("bs") or 0,
+        evt.get("ap") or 0.0,
+        evt.get("as") or 0,
+        evt.get("t") or evt.get("timestamp") or 0,
+    )
+
+
+def from_event(evt: dict) -> Event:
+    """Return a :class:`Trade` or :class:`Quote` for ``evt``.
+
+    Status and other control messages are returned unchanged. Missing numeric
+    fields become ``0`` so consumers can test them without ``None`` checks.
+    """
+    ev = evt.get("ev")
+    if ev == "T":
+        try:
+            return Trade(evt["sym"], evt["p"], evt["s"], evt["t"])
+        except KeyError:
+            return _trade(evt)
+    if ev == "Q":
+        try:
+            return Quote(
+                evt["sym"], evt["bp"], evt["bs"], evt["ap"], evt["as"], evt["t"]
+            )
+        except KeyError:
+            return _quote(evt)
+    return evt
+
+
+def from_rest_trade(symbol: str, row: dict) -> Trade:
+    """Return a :class:`Trade` for a ``/v3/trades`` result row."""
+    return Trade(
+        symbol,
+        row.get("price") or 0.0,
+        row.get("size") or 0,
+        (row.get("sip_timestamp") or 0) // 1_000_000,
+    )
+
+
+def from_rest_quote(symbol: str, row: dict) -> Quote:
+    """Return a :class:`Quote` for a ``/v3/quotes`` result row."""
+    return Quote(
+        symbol,
+        row.get("bid_price") or 0.0,
+        row.get("bid_size") or 0,
+        row.get("ask_price") or 0.0,
+        row.get("ask_size") or 0,
+        (row.get("sip_timestamp") or 0) // 1_000_000,
+    )
+
+
+def decode(message: str | bytes) -> list[Event]:
+    """Decode a WebSocket ``message`` into typed events.
+
+    Trade and quote batches decode directly into structs. Any other message
+    (status events, other event types, missing fields) goes through
+    :func:`.codec.decode_events` and :func:`from_event` instead.
+    """
+    try:
+        return _DECODER.decode(message)
+    except msgspec.DecodeError:
+        return [from_event(evt) for evt in codec.decode_events(message)]
@@ -1,8 +1,9 @@
+import asyncio
 import logging
 
 from ..config import Config
 from ..load_env import load_env
-from . import api, db, stream
+from . import api, api_async, db, stream
 from .logging_utils import setup_logging
 
 
@@ -24,16 +25,25 @@ def main(
     """
     load_env()
     setup_logging(config.log_file, config.log_level)
-    conn = db.init_db(config.db_file)
-    for sym in config.symbols.split(","):
-        api.fetch_ohlcv(conn, sym)
-        api.fetch_minute_bars(conn, sym)
-        api.fetch_realtime_quote(conn, sym)
-        api.fetch_option_chain(conn, sym)
-        api.fetch_fundamentals(conn, sym)
-        api.fetch_corporate_actions(conn, sym)
-        api.fetch_indicator_sma(conn, sym)
-        api.fetch_news(conn, sym)
+    conn = db.init_db(config.db_file, config)
+    if config.use_async:
+        errors = asyncio.run(
+            api_async.fetch_universe(
+                conn, config.symbols.split(","), concurrency=config.concurrency
+            )
+        )
+        if errors:
+            raise SystemExit(f"Data collection failed for {', '.join(errors)}")
+    else:
+        for sym in config.symbols.split(","):
+            api.fetch_ohlcv(conn, sym)
+            api.fetch_minute_bars(conn, sym)
+            api.fetch_realtime_quote(conn, sym)
+            api.fetch_option_chain(conn, sym)
+            api.fetch_fundamentals(conn, sym)
+            api.fetch_corporate_actions(conn, sym)
+            api.fetch_indicator_sma(conn, sym)
+            api.fetch_news(conn, sym)
     logging.info("Data collection completed")
     if stream_data:
         stream.stream_quotes(config.symbols, realtime=realtime)
@@ -5,14 +5,19 @@ from __future__ import annotations
 import argparse
 import asyncio
 import logging
+import os
 import sqlite3
 from pathlib import Path
+from typing import Iterable
 
 import pandas as pd
 
+from .. import portfolio, telemetry
 from ..portfolio import PORTFOLIO_FILE
 from ..secret_filter import SecretFilter
-from . import db, stream_async
+from . import db, sink, stream_async
+
+WATCH_INTERVAL_SEC = 5.0
 
 
 def portfolio_symbols(portfolio_file: str = PORTFOLIO_FILE) -> list[str]:
@@ -26,37 +31,120 @@ def portfolio_symbols(portfolio_file: str = PORTFOLIO_FILE) -> list[str]:
     return sorted(df["symbol"].unique().tolist())
 
 
-async def _save_event(conn: sqlite3.Connection, event: dict) -> None:
-    """Persist a trade or quote event into ``realtime_quotes``."""
-    if event.get("ev") not in {"T", "Q"}:
-        return
-    sym = event.get("sym") or event.get("symbol")
-    price = event.get("p") or event.get("bp") or event.get("ap")
-    ts = event.get("t") or event.get("timestamp")
-    if sym and price and ts:
-        conn.execute(
-            "INSERT OR REPLACE INTO realtime_quotes VALUES (?,?,?)", (sym, ts, price)
-        )
-        conn.commit()
+def _stamp(portfolio_file: str) -> tuple[int, int] | None:
+    try:
+        st = os.stat(portfolio_file)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+async def watch_portfolio(
+    hub: stream_async.StreamHub,
+    sub: stream_async.Subscription | Iterable[stream_async.Subscription],
+    portfolio_file: str = PORTFOLIO_FILE,
+    interval: float = WATCH_INTERVAL_SEC,
+    extra: Iterable[str] = (),
+) -> None:
+    """Keep ``sub`` subscribed to the open positions in ``portfolio_file``.
+
+    Saves made in this process through :mod:`trading_platform.portfolio` are
+    picked up immediately; writes from other processes are detected by
+    polling the file's modification time every ``interval`` seconds. Symbol
+    changes are applied with :meth:`StreamHub.update`, which sends
+    incremental subscribe/unsubscribe frames on the open connection.
+
+    ``sub`` may be one subscription or several; each follows the open
+    positions plus the fixed ``extra`` symbols.
+    """
+    subs = [sub] if isinstance(sub, stream_async.Subscription) else list(sub)
+    extra = set(extra)
+    loop = asyncio.get_running_loop()
+    changed = asyncio.Event()
+    target = Path(portfolio_file).resolve()
+
+    def notify(path: str) -> None:
+        if Path(path).resolve() == target:
+            loop.call_soon_threadsafe(changed.set)
+
+    portfolio.add_listener(notify)
+    last = _stamp(portfolio_file)
+    try:
+        while True:
+            try:
+                await asyncio.wait_for(changed.wait(), interval)
+            except asyncio.TimeoutError:
+                pass
+            forced = changed.is_set()
+            changed.clear()
+            stamp = _stamp(portfolio_file)
+            if stamp == last and not forced:
+                continue
+            last = stamp
+            try:
+                symbols = set(portfolio_symbols(portfolio_file)) | extra
+            except (pd.errors.EmptyDataError, pd.errors.ParserError) as exc:
+                logging.debug("Portfolio file mid-write, retrying: %s", exc)
+                last = None
+                continue
+            for item in subs:
+                if symbols == item.symbols:
+                    continue
+                logging.info(
+                    "Portfolio symbols changed: +%s -%s",
+                    ",".join(sorted(symbols - item.symbols)) or "none",
+                    ",".join(sorted(item.symbols - symbols)) or "none",
+                )
+                await hub.update(item, symbols)
+    finally:
+        portfolio.remove_listener(notify)
 
 
 async def stream_portfolio_quotes(
     conn: sqlite3.Connection,
     portfolio_file: str = PORTFOLIO_FILE,
     realtime: bool = False,
+    batch_size: int = sink.DEFAULT_BATCH_SIZE,
+    flush_ms: int = sink.DEFAULT_FLUSH_MS,
+    hub: stream_async.StreamHub | None = None,
+    watch_interval: float = WATCH_INTERVAL_SEC,
 ) -> None:
-    """Stream WebSocket quotes for all open positions."""
+    """Stream WebSocket quotes for all open positions.
+
+    Events are written to ``realtime_quotes`` through a :class:`~.sink.TickSink`
+    which commits up to ``batch_size`` rows at a time, at least every
+    ``flush_ms`` milliseconds, and flushes the remainder when the stream ends.
+    Pass ``hub`` to share a :class:`~.stream_async.StreamHub` connection.
+    Ticks missed while the stream reconnects are backfilled over REST, and
+    positions opened or closed later are followed via :func:`watch_portfolio`,
+    so streaming starts even when no position is open yet.
+    """
     symbols = portfolio_symbols(portfolio_file)
     if not symbols:
-        logging.info("No open positions to stream")
-        return
+        logging.info("No open positions yet; waiting for portfolio changes")
+
+    own_hub = hub is None
+    if own_hub:
+        hub = stream_async.StreamHub(realtime=realtime)
+    async with sink.TickSink(conn, batch_size=batch_size, flush_ms=flush_ms) as ticks:
+        sub = await hub.subscribe(symbols, block=True, backfill=True)
+        watcher = asyncio.ensure_future(
+            watch_portfolio(hub, sub, portfolio_file, watch_interval)
+        )
 
-    async def handle(evt: dict) -> None:
-        await _save_event(conn, evt)
+        async def record() -> None:
+            async for evt in sub:
+                await ticks.put(evt, sub.received)
 
-    await stream_async.stream_quotes(
-        ",".join(symbols), realtime=realtime, on_event=handle
-    )
+        try:
+            if own_hub:
+                await asyncio.gather(record(), hub.run())
+            else:
+                await record()
+        finally:
+            watcher.cancel()
+            if own_hub:
+                await hub.close()
 
 
 def main(argv: list[str] | None = None) -> None:
@@ -65,13 +153,29 @@ def main(argv: list[str] | None = None) -> None:
     parser.add_argument("--portfolio-file", default=PORTFOLIO_FILE)
     parser.add_argument("--db-file", default="market_data.db")
     parser.add_argument("--realtime", action="store_true")
+    parser.add_argument("--batch-size", type=int, default=sink.DEFAULT_BATCH_SIZE)
+    parser.add_argument("--flush-ms", type=int, default=sink.DEFAULT_FLUSH_MS)
+    parser.add_argument(
+        "--watch-sec",
+        type=float,
+        default=WATCH_INTERVAL_SEC,
+        help="Seconds between portfolio file checks",
+    )
     parser.add_argument("--log-level", default="INFO")
     args = parser.parse_args(argv)
     logging.basicConfig(level=args.log_level)
     logging.getLogger().addFilter(SecretFilter())
+    telemetry.serve()
     conn = db.init_db(args.db_file)
     asyncio.run(
-        stream_portfolio_quotes(conn, args.portfolio_file, realtime=args.realtime)
+        stream_portfolio_quotes(
+            conn,
+            args.portfolio_file,
+            realtime=args.realtime,
+            batch_size=args.batch_size,
+            flush_ms=args.flush_ms,
+            watch_interval=args.watch_sec,
+        )
     )
 
 
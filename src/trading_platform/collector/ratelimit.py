@@ -0,0 +1,131 @@
+"""Per-host token-bucket rate limiting shared by the sync and async collectors."""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+import time
+from urllib.parse import urlsplit
+
+# Requests per second and burst capacity for each upstream host. Override with
+# ``RATE_LIMITS="api.polygon.io=5:10,newsapi.org=1:1"``.
+DEFAULT_LIMITS: dict[str, tuple[float, float]] = {
+    "api.polygon.io": (5.0, 5.0),
+    "newsapi.org": (1.0, 1.0),
+}
+FALLBACK_LIMIT = (1.0, 1.0)
+
+
+def _parse_limits(value: str | None) -> dict[str, tuple[float, float]]:
+    """Parse ``host=rate[:burst]`` pairs into a limits dictionary."""
+    limits = dict(DEFAULT_LIMITS)
+    if not value:
+        return limits
+    for pair in value.split(","):
+        if "=" not in pair:
+            continue
+        host, spec = pair.split("=", 1)
+        rate, _, burst = spec.partition(":")
+        try:
+            rate_f = float(rate)
+            burst_f = float(burst) if burst else max(rate_f, 1.0)
+        except ValueError:
+            continue
+        limits[host.strip()] = (rate_f, burst_f)
+    return limits
+
+
+class TokenBucket:
+    """Thread-safe token bucket usable from threads and coroutines.
+
+    Parameters
+    ----------
+    rate : float
+        Tokens added per second. ``0`` or less disables limiting.
+    capacity : float
+        Maximum number of tokens, i.e. the allowed burst size.
+    """
+
+    def __init__(self, rate: float, capacity: float) -> None:
+        self.rate = rate
+        self.capacity = max(capacity, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self, tokens: float = 1.0) -> float:
+        """Take ``tokens`` from the bucket and return seconds to wait.
+
+        The balance may go negative so that concurrent callers queue up in
+        arrival order instead of spinning on the lock.
+        """
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            elapsed = now - self._updated
+            self._updated = now
+            self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+            self._tokens -= tokens
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """Block until ``tokens`` are available and return the time waited."""
+        wait = self._reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    async def acquire_async(self, tokens: float = 1.0) -> float:
+        """Asynchronously wait until ``tokens`` are available."""
+        wait = self._reserve(tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+
+_LIMITS = _parse_limits(os.getenv("RATE_LIMITS"))
+_BUCKETS: dict[str, TokenBucket] = {}
+_BUCKETS_LOCK = threading.Lock()
+
+
+def get_bucket(url: str) -> TokenBucket:
+    """Return the shared bucket for the host of ``url``."""
+    host = urlsplit(url).hostname or ""
+    bucket = _BUCKETS.get(host)
+    if bucket is None:
+        with _BUCKETS_LOCK:
+            bucket = _BUCKETS.get(host)
+            if bucket is None:
+                rate, burst = _LIMITS.get(host, FALLBACK_LIMIT)
+                bucket = TokenBucket(rate, burst)
+                _BUCKETS[host] = bucket
+    return bucket
+
+
+def configure(host: str, rate: float, burst: float | None = None) -> None:
+    """Set the rate and burst for ``host``, replacing any existing bucket."""
+    with _BUCKETS_LOCK:
+        _LIMITS[host] = (rate, burst if burst is not None else max(rate, 1.0))
+        _BUCKETS.pop(host, None)
+
+
+def reset() -> None:
+    """Reload limits from ``RATE_LIMITS`` and drop all buckets."""
+    global _LIMITS
+    with _BUCKETS_LOCK:
+        _LIMITS = _parse_limits(os.getenv("RATE_LIMITS"))
+        _BUCKETS.clear()
+
+
+def acquire(url: str) -> float:
+    """Wait for a request slot to the host of ``url``."""
+    return get_bucket(url).acquire()
+
+
+async def acquire_async(url: str) -> float:
+    """Asynchronously wait for a request slot to the host of ``url``."""
+    return await get_bucket(url).acquire_async()
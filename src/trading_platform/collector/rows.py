@@ -0,0 +1,67 @@
+"""Row builders turning Polygon and NewsAPI payloads into DB batches.
+
+Each builder returns a list of tuples ready for
+:func:`trading_platform.collector.db.insert_rows`, shared by the sync and
+async collectors.
+"""
+
+from __future__ import annotations
+
+import json
+
+NEWS_COLUMNS = ("symbol", "title", "url", "published_at")
+
+
+def bar_rows(symbol: str, bars: list[dict]) -> list[tuple]:
+    """Return ``ohlcv``/``minute_bars`` rows from aggregate results."""
+    return [(symbol, b["t"], b["o"], b["h"], b["l"], b["c"], b["v"]) for b in bars]
+
+
+def _quote_price(last_quote: dict, side: str):
+    quote = last_quote.get(side)
+    return quote.get("p") if isinstance(quote, dict) else None
+
+
+def option_rows(symbol: str, options: list[dict]) -> list[tuple]:
+    """Return ``option_chain`` rows from an options snapshot."""
+    rows = []
+    for opt in options:
+        details = opt.get("details", {})
+        greeks = opt.get("greeks", {})
+        last_quote = opt.get("last_quote", {})
+        rows.append(
+            (
+                symbol,
+                details.get("ticker"),
+                details.get("expiration_date"),
+                details.get("strike_price"),
+                details.get("contract_type"),
+                _quote_price(last_quote, "bid"),
+                _quote_price(last_quote, "ask"),
+                opt.get("implied_volatility"),
+                greeks.get("delta"),
+                opt.get("day", {}).get("volume"),
+                opt.get("open_interest"),
+            )
+        )
+    return rows
+
+
+def split_rows(symbol: str, actions: list[dict]) -> list[tuple]:
+    """Return ``corporate_actions`` rows for split events."""
+    return [
+        (symbol, act.get("execution_date"), "split", json.dumps(act)) for act in actions
+    ]
+
+
+def sma_rows(symbol: str, values: list[dict], name: str = "sma50") -> list[tuple]:
+    """Return ``indicators`` rows for an indicator value series."""
+    return [(symbol, v.get("timestamp"), name, v.get("value")) for v in values]
+
+
+def news_rows(symbol: str, articles: list[dict]) -> list[tuple]:
+    """Return ``news`` rows ordered as :data:`NEWS_COLUMNS`."""
+    return [
+        (symbol, art.get("title"), art.get("url"), art.get("publishedAt"))
+        for art in articles
+    ]
@@ -0,0 +1,69 @@
+"""Shared keep-alive HTTP session for the synchronous collectors."""
+
+from __future__ import annotations
+
+import os
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "10"))
+MAX_RETRIES = int(os.getenv("HTTP_RETRIES", "3"))
+BACKOFF_FACTOR = 0.5
+RETRY_STATUSES = (500, 502, 503, 504)
+
+_SESSION: requests.Session | None = None
+_LOCK = threading.Lock()
+
+
+def build_session(
+    pool_size: int = POOL_SIZE, max_retries: int = MAX_RETRIES
+) -> requests.Session:
+    """Return a new session with a sized connection pool and retry adapter.
+
+    Parameters
+    ----------
+    pool_size : int, default ``HTTP_POOL_SIZE`` or 10
+        Maximum number of kept-alive connections per host.
+    max_retries : int, default ``HTTP_RETRIES`` or 3
+        Retries for connection errors and 5xx responses. HTTP 429 is left to
+        :func:`trading_platform.collector.api.rate_limited_get`, so the
+        adapter ignores ``Retry-After`` instead of sleeping on it as well.
+    """
+    retry = Retry(
+        total=max_retries,
+        backoff_factor=BACKOFF_FACTOR,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset({"GET", "HEAD"}),
+        raise_on_status=False,
+        respect_retry_after_header=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry
+    )
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers["Connection"] = "keep-alive"
+    return session
+
+
+def get_session() -> requests.Session:
+    """Return the process-wide pooled session, creating it on first use."""
+    global _SESSION
+    if _SESSION is None:
+        with _LOCK:
+            if _SESSION is None:
+                _SESSION = build_session()
+    return _SESSION
+
+
+def close_session() -> None:
+    """Close the shared session and release pooled connections."""
+    global _SESSION
+    with _LOCK:
+        if _SESSION is not None:
+            _SESSION.close()
+            _SESSION = None
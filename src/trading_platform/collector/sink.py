@@ -0,0 +1,152 @@
+"""Write-behind buffered sink persisting streamed ticks in batches."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import sqlite3
+import time
+
+from .. import telemetry
+from . import db
+from .events import Event, Quote, Trade, from_event
+
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_FLUSH_MS = 250
+DEFAULT_MAX_PENDING = 10_000
+
+
+def quote_row(event: Event) -> tuple | None:
+    """Return a ``realtime_quotes`` row for a trade/quote event or ``None``.
+
+    Raw event dictionaries are converted with :func:`.events.from_event`.
+    """
+    if type(event) is dict:
+        event = from_event(event)
+    if type(event) is not Trade and type(event) is not Quote:
+        return None
+    price = event.price
+    if event.symbol and price and event.t:
+        return (event.symbol, event.t, price)
+    return None
+
+
+class TickSink:
+    """Buffer stream events and write them in one transaction per batch.
+
+    A batch is flushed once ``batch_size`` rows are pending or ``flush_ms``
+    milliseconds after its first row arrived, whichever comes first. When
+    ``max_pending`` rows are queued :meth:`put` waits, pushing back on the
+    stream reader. The time from each row's ``received`` stamp (its message's
+    arrival at the hub, else the :meth:`put` call) to its commit is recorded
+    in ``stream_persist_latency_seconds``. Use as an async context manager so
+    the remaining rows are flushed on shutdown::
+
+        async with TickSink(conn) as sink:
+            await stream_async.stream_quotes(symbols, on_event=sink.put)
+
+    Parameters
+    ----------
+    conn : sqlite3.Connection
+        Database connection owned by the event loop thread.
+    batch_size : int, default 500
+        Maximum rows per transaction.
+    flush_ms : int, default 250
+        Maximum time a row waits before being written.
+    max_pending : int, default 10000
+        Queue bound applying backpressure to producers.
+    table : str, default "realtime_quotes"
+        Destination table.
+    """
+
+    def __init__(
+        self,
+        conn: sqlite3.Connection,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        flush_ms: int = DEFAULT_FLUSH_MS,
+        max_pending: int = DEFAULT_MAX_PENDING,
+        table: str = "realtime_quotes",
+    ) -> None:
+        self.conn = conn
+        self.batch_size = max(batch_size, 1)
+        self.flush_interval = flush_ms / 1000
+        self.max_pending = max_pending
+        self.table = table
+        self.written = 0
+        self._queue: asyncio.Queue | None = None
+        self._task: asyncio.Task | None = None
+
+    async def __aenter__(self) -> "TickSink":
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.close()
+
+    async def start(self) -> None:
+        """Start the background writer task."""
+        if self._task is None:
+            self._queue = asyncio.Queue(self.max_pending)
+            self._task = asyncio.create_task(self._run())
+
+    async def put(self, event: Event, received: float | None = None) -> None:
+        """Queue ``event`` for writing, waiting if the buffer is full.
+
+        ``received`` is the ``perf_counter`` time the event arrived, such as
+        :attr:`.stream_async.Subscription.received`; latency is measured from
+        the call when omitted.
+        """
+        row = quote_row(event)
+        if row is None:
+            return
+        if self._task is None:
+            await self.start()
+        await self._queue.put((received or time.perf_counter(), row))
+
+    async def close(self) -> None:
+        """Flush pending rows and stop the writer task."""
+        if self._task is None:
+            return
+        await self._queue.put(None)
+        await self._task
+        self._task = None
+
+    def _write(self, batch: list[tuple[float, tuple]]) -> None:
+        try:
+            self.written += db.insert_rows(
+                self.conn, self.table, [row for _, row in batch]
+            )
+        except sqlite3.Error as exc:
+            logging.error("Dropping %d ticks after write failure: %s", len(batch), exc)
+            return
+        now = time.perf_counter()
+        observe = telemetry.PERSIST_LATENCY.observe
+        for queued, _ in batch:
+            observe(now - queued)
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        queue = self._queue
+        stopping = False
+        while not stopping:
+            first = await queue.get()
+            if first is None:
+                break
+            batch = [first]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                try:
+                    row = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        row = await asyncio.wait_for(queue.get(), remaining)
+                    except asyncio.TimeoutError:
+                        break
+                if row is None:
+                    stopping = True
+                    break
+                batch.append(row)
+            self._write(batch)
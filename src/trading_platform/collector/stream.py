@@ -1,17 +1,23 @@
 import json
 import logging
+import time
 
 import websocket
 
+from .. import telemetry
+from . import codec
 from .api import _get_polygon_key, REALTIME_WS_URL, WS_URL
+from .stream_async import RECONNECT_CODES, backoff_delay
 
 
-def stream_quotes(symbols="AAPL", realtime=False):
-    """Stream trades and quotes via Polygon's WebSocket."""
+def stream_quotes(symbols="AAPL", realtime=False, max_retries=None):
+    """Stream trades and quotes via Polygon's WebSocket.
 
-    def on_open(ws):
-        auth = json.dumps({"action": "auth", "params": _get_polygon_key()})
-        ws.send(auth)
+    Dropped connections are reopened with jittered exponential backoff and
+    re-authenticate and resubscribe on open. An unauthorized real-time feed
+    falls back to the delayed feed. ``max_retries`` bounds consecutive
+    reconnects; by default they are unlimited.
+    """
 
     def subscribe(ws):
         chans = []
@@ -21,46 +27,75 @@ def stream_quotes(symbols="AAPL", realtime=False):
         subs = json.dumps({"action": "subscribe", "params": ",".join(chans)})
         ws.send(subs)
 
-    def on_message(ws, message):
-        logging.debug(message)
-        try:
-            events = json.loads(message)
-        except json.JSONDecodeError:
-            return
-        for evt in events:
-            if evt.get("status") == "auth_success":
-                subscribe(ws)
-            elif (
-                evt.get("status") == "error" and evt.get("message") == "not authorized"
-            ):
-                if realtime:
-                    logging.warning(
-                        "Real-time feed unauthorized, switching to delayed feed..."
-                    )
-                    ws.close()
-                    stream_quotes(symbols, realtime=False)
-                else:
-                    logging.error(
-                        "Subscription unauthorized; check your plan permissions"
-                    )
+    url = REALTIME_WS_URL if realtime else WS_URL
+    attempt = 0
+    while True:
+        state = {"next": None, "retry": False, "received": False}
 
-    def on_error(ws, error):
-        logging.error("WebSocket error: %s", error)
+        def on_open(ws):
+            auth = json.dumps({"action": "auth", "params": _get_polygon_key()})
+            ws.send(auth)
 
-    def on_close(ws, close_status_code, close_msg):
-        logging.info("WebSocket closed %s %s", close_status_code, close_msg)
+        def on_message(ws, message):
+            logging.debug(message)
+            state["received"] = True
+            start = time.perf_counter()
+            decoded = codec.decode_events(message)
+            telemetry.STREAM_DECODE.observe(time.perf_counter() - start)
+            for evt in decoded:
+                ev = evt.get("ev")
+                if ev in ("T", "Q"):
+                    telemetry.STREAM_EVENTS.labels(ev).inc()
+                elif evt.get("status") == "auth_success":
+                    subscribe(ws)
+                elif (
+                    evt.get("status") == "error"
+                    and evt.get("message") == "not authorized"
+                ):
+                    if url == REALTIME_WS_URL:
+                        logging.warning(
+                            "Real-time feed unauthorized, switching to delayed feed..."
+                        )
+                        state["next"] = WS_URL
+                        ws.close()
+                    else:
+                        logging.error(
+                            "Subscription unauthorized; check your plan permissions"
+                        )
 
-    url = REALTIME_WS_URL if realtime else WS_URL
-    ws = websocket.WebSocketApp(
-        url,
-        on_open=on_open,
-        on_message=on_message,
-        on_error=on_error,
-        on_close=on_close,
-    )
-    logging.info(
-        "Streaming %s data for %s... press Ctrl+C to stop",
-        "real-time" if realtime else "delayed",
-        symbols,
-    )
-    ws.run_forever()
+        def on_error(ws, error):
+            logging.error("WebSocket error: %s", error)
+            state["retry"] = True
+
+        def on_close(ws, close_status_code, close_msg):
+            logging.info("WebSocket closed %s %s", close_status_code, close_msg)
+            if close_status_code in RECONNECT_CODES:
+                state["retry"] = True
+
+        ws = websocket.WebSocketApp(
+            url,
+            on_open=on_open,
+            on_message=on_message,
+            on_error=on_error,
+            on_close=on_close,
+        )
+        logging.info(
+            "Streaming %s data for %s... press Ctrl+C to stop",
+            "real-time" if url == REALTIME_WS_URL else "delayed",
+            symbols,
+        )
+        ws.run_forever()
+        if state["next"]:
+            url = state["next"]
+            continue
+        if not state["retry"]:
+            return
+        if state["received"]:
+            attempt = 0
+        if max_retries is not None and attempt >= max_retries:
+            logging.error("Giving up after %d reconnect attempts", attempt)
+            return
+        delay = backoff_delay(attempt)
+        attempt += 1
+        logging.info("Reconnecting to %s in %.1fs", url, delay)
+        time.sleep(delay)
@@ -2,15 +2,417 @@
 
 from __future__ import annotations
 
+import asyncio
 import inspect
 import json
 import logging
+import random
+import time
+from typing import Iterable
 
 import websockets
+from websockets.exceptions import WebSocketException
 
+from .. import telemetry
+from . import api, events
 from .alerts import AlertAggregator
 from .api_async import REALTIME_WS_URL, WS_URL
 from .api import _get_polygon_key
+from .events import Event, Quote, Trade
+
+CHANNELS = ("T", "Q")
+DEFAULT_QUEUE_SIZE = 10_000
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 60.0
+# Close codes after which the server expects clients to come back: going
+# away, abnormal closure, internal error, service restart, try again later.
+RECONNECT_CODES = {1001, 1006, 1011, 1012, 1013}
+BACKFILL_LIMIT = 50000
+# Outages are backfilled in windows of this size so a long gap is delivered
+# piecewise instead of being held in memory at once
+BACKFILL_CHUNK_MS = 15 * 60 * 1000
+# The backfill window ends at the first live event after a reconnect; without
+# one within this many seconds it ends at the current time less the feed delay
+BACKFILL_WAIT_SEC = 5.0
+FEED_DELAY_MS = {REALTIME_WS_URL: 0, WS_URL: 15 * 60 * 1000}
+
+_EVENT_TYPES = {"T": Trade, "Q": Quote}
+_TRADE_EVENTS = telemetry.STREAM_EVENTS.labels("T")
+_QUOTE_EVENTS = telemetry.STREAM_EVENTS.labels("Q")
+_DECODE = telemetry.STREAM_DECODE
+_QUEUE_WAIT = telemetry.QUEUE_WAIT
+_CLOSED = object()
+
+
+def backoff_delay(
+    attempt: int, base: float = BACKOFF_BASE, cap: float = BACKOFF_MAX
+) -> float:
+    """Return a full-jitter exponential backoff delay in seconds."""
+    return random.uniform(0, min(cap, base * 2**attempt))
+
+
+def rest_events(
+    symbol: str, start_ms: int, end_ms: int, channels: Iterable[str] = CHANNELS
+) -> list[Event]:
+    """Return REST trades and quotes for ``symbol`` in ``[start_ms, end_ms)``."""
+    out: list[Event] = []
+    if "T" in channels:
+        data = api.fetch_trades(symbol, BACKFILL_LIMIT, start_ms, end_ms) or {}
+        out.extend(events.from_rest_trade(symbol, r) for r in data.get("results", []))
+    if "Q" in channels:
+        data = api.fetch_quotes(symbol, BACKFILL_LIMIT, start_ms, end_ms) or {}
+        out.extend(events.from_rest_quote(symbol, r) for r in data.get("results", []))
+    return out
+
+
+class Subscription:
+    """Bounded queue of hub events for one consumer.
+
+    Iterate with ``async for`` to receive :class:`~.events.Trade` and
+    :class:`~.events.Quote` objects; iteration stops when the hub stops.
+    Entries are stamped with the ``perf_counter`` time their WebSocket
+    message arrived. :attr:`received` holds the stamp of the event last
+    returned, and the time spent queued is recorded in
+    ``stream_queue_wait_seconds``.
+
+    Parameters
+    ----------
+    symbols : iterable of str
+        Ticker symbols to receive.
+    channels : iterable of str
+        Polygon channel prefixes, ``"T"`` for trades and ``"Q"`` for quotes.
+    maxsize : int
+        Queue bound.
+    block : bool
+        When ``True`` a full queue makes the hub wait for this consumer, which
+        slows every other consumer too. Otherwise the oldest queued event is
+        dropped and counted in :attr:`dropped`.
+    backfill : bool, default False
+        Also receive events fetched over REST for outage windows after a
+        reconnect. These arrive after, and are older than, live events.
+    """
+
+    def __init__(
+        self,
+        symbols: Iterable[str],
+        channels: Iterable[str],
+        maxsize: int,
+        block: bool,
+        backfill: bool = False,
+    ) -> None:
+        self.symbols = set(symbols)
+        self.channels = tuple(channels)
+        self.block = block
+        self.backfill = backfill
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize)
+        self.dropped = 0
+        self.received = 0.0
+
+    def keys(self) -> set[str]:
+        """Return the upstream channel names this subscription needs."""
+        return {f"{c}.{s}" for c in self.channels for s in self.symbols}
+
+    def _offer(self, item, stamp: float | None = None) -> None:
+        entry = (stamp or time.perf_counter(), item)
+        try:
+            self.queue.put_nowait(entry)
+        except asyncio.QueueFull:
+            self.queue.get_nowait()
+            self.queue.put_nowait(entry)
+            self.dropped += 1
+
+    async def _put(self, item, stamp: float | None = None) -> None:
+        if self.block:
+            await self.queue.put((stamp or time.perf_counter(), item))
+        else:
+            self._offer(item, stamp)
+
+    def __aiter__(self) -> "Subscription":
+        return self
+
+    async def __anext__(self) -> Event:
+        stamp, item = await self.queue.get()
+        if item is _CLOSED:
+            raise StopAsyncIteration
+        self.received = stamp
+        _QUEUE_WAIT.observe(time.perf_counter() - stamp)
+        return item
+
+
+class StreamHub:
+    """Share one Polygon WebSocket between several in-process consumers.
+
+    The hub subscribes upstream to the union of its subscriptions' channels,
+    decodes each message once and routes every event to the queues of the
+    subscriptions that asked for its channel and symbol::
+
+        hub = StreamHub()
+        quotes = await hub.subscribe(["AAPL", "MSFT"], channels=("Q",))
+        asyncio.create_task(hub.run())
+        async for quote in quotes:
+            ...
+
+    Parameters
+    ----------
+    realtime : bool, default False
+        Connect to the real-time feed, falling back to the delayed feed if the
+        plan is not authorized for it.
+    max_retries : int, optional
+        Consecutive failed reconnects before giving up; unlimited by default.
+
+    Dropped connections are retried with jittered exponential backoff. Each
+    new connection re-authenticates and resubscribes, then the whole outage
+    window is fetched over REST, in :data:`BACKFILL_CHUNK_MS` windows, for
+    subscriptions created with ``backfill=True``. The window starts after the
+    last event delivered and ends before the first live event of the new
+    connection, so no event is delivered twice. Windows whose fetch fails
+    are logged and kept in :attr:`missed` as ``(symbol, start_ms, end_ms)``.
+    A normal close (code 1000) ends :meth:`run`.
+    """
+
+    def __init__(self, realtime: bool = False, max_retries: int | None = None) -> None:
+        self.realtime = realtime
+        self.max_retries = max_retries
+        self._subs: list[Subscription] = []
+        self._routes: dict[tuple[type, str], list[Subscription]] = {}
+        self._active: set[str] = set()
+        self._ws = None
+        self._closing = False
+        self._stopped = False
+        self._last_t = 0
+        self._dropped_at: int | None = None
+        self._gap_start: int | None = None
+        self._gap_timer: asyncio.TimerHandle | None = None
+        self._received = False
+        self._backfills: set[asyncio.Task] = set()
+        self.missed: list[tuple[str, int, int]] = []
+
+    async def subscribe(
+        self,
+        symbols: Iterable[str],
+        channels: Iterable[str] = CHANNELS,
+        maxsize: int = DEFAULT_QUEUE_SIZE,
+        block: bool = False,
+        backfill: bool = False,
+    ) -> Subscription:
+        """Register a consumer and return its :class:`Subscription`.
+
+        Subscriptions made after the hub stopped are returned already closed.
+        """
+        sub = Subscription(symbols, channels, maxsize, block, backfill)
+        if self._stopped:
+            sub._offer(_CLOSED)
+            return sub
+        self._subs.append(sub)
+        await self._refresh()
+        return sub
+
+    async def update(self, sub: Subscription, symbols: Iterable[str]) -> None:
+        """Replace the symbols of ``sub`` on the live connection."""
+        sub.symbols = set(symbols)
+        await self._refresh()
+
+    async def unsubscribe(self, sub: Subscription) -> None:
+        """Remove ``sub`` and end its iteration."""
+        if sub in self._subs:
+            self._subs.remove(sub)
+            sub._offer(_CLOSED)
+            await self._refresh()
+
+    def channels(self) -> set[str]:
+        """Return the union of channel names wanted by all subscriptions."""
+        keys: set[str] = set()
+        for sub in self._subs:
+            keys |= sub.keys()
+        return keys
+
+    async def _refresh(self) -> None:
+        routes: dict[tuple[type, str], list[Subscription]] = {}
+        for sub in self._subs:
+            for channel in sub.channels:
+                cls = _EVENT_TYPES[channel]
+                for sym in sub.symbols:
+                    routes.setdefault((cls, sym), []).append(sub)
+        self._routes = routes
+        if self._ws is not None:
+            await self._sync(self._ws)
+
+    async def _sync(self, ws) -> None:
+        """Send subscribe/unsubscribe messages for the channel difference."""
+        wanted = self.channels()
+        added = wanted - self._active
+        removed = self._active - wanted
+        self._active = wanted
+        if removed:
+            params = ",".join(sorted(removed))
+            await ws.send(json.dumps({"action": "unsubscribe", "params": params}))
+        if added:
+            params = ",".join(sorted(added))
+            await ws.send(json.dumps({"action": "subscribe", "params": params}))
+
+    async def run(self) -> None:
+        """Stream until the server closes normally or :meth:`close` is called."""
+        url = REALTIME_WS_URL if self.realtime else WS_URL
+        attempt = 0
+        try:
+            while not self._closing:
+                self._received = False
+                try:
+                    url, retry = await self._session(url)
+                except (OSError, asyncio.TimeoutError, WebSocketException) as exc:
+                    logging.warning("Stream connection lost: %s", exc)
+                    retry = True
+                if url is None or self._closing:
+                    break
+                if not retry:
+                    continue
+                if self._dropped_at is None:
+                    self._dropped_at = int(time.time() * 1000)
+                if self._received:
+                    attempt = 0
+                if self.max_retries is not None and attempt >= self.max_retries:
+                    logging.error("Giving up after %d reconnect attempts", attempt)
+                    break
+                delay = backoff_delay(attempt)
+                attempt += 1
+                logging.info("Reconnecting to %s in %.1fs", url, delay)
+                await asyncio.sleep(delay)
+        finally:
+            if self._gap_timer is not None:
+                self._gap_timer.cancel()
+            if self._backfills:
+                await asyncio.gather(*self._backfills, return_exceptions=True)
+            self._stopped = True
+            for sub in self._subs:
+                sub._offer(_CLOSED)
+
+    async def close(self) -> None:
+        """Stop streaming and close the upstream connection."""
+        self._closing = True
+        if self._ws is not None:
+            await self._ws.close()
+
+    async def _session(self, url: str) -> tuple[str | None, bool]:
+        """Stream from ``url``.
+
+        Returns the URL to connect to next (``None`` to stop) and whether to
+        back off first.
+        """
+        async with websockets.connect(url) as ws:
+            self._ws = ws
+            self._active = set()
+            try:
+                auth = json.dumps({"action": "auth", "params": _get_polygon_key()})
+                await ws.send(auth)
+                await self._sync(ws)
+                if self._dropped_at is not None:
+                    self._open_gap(url)
+                logging.info(
+                    "Streaming %s data for %s... press Ctrl+C to stop",
+                    "real-time" if url == REALTIME_WS_URL else "delayed",
+                    ",".join(sorted({s for sub in self._subs for s in sub.symbols})),
+                )
+                async for message in ws:
+                    logging.debug(message)
+                    self._received = True
+                    start = time.perf_counter()
+                    decoded = events.decode(message)
+                    _DECODE.observe(time.perf_counter() - start)
+                    trades = quotes = 0
+                    for evt in decoded:
+                        if type(evt) is dict:
+                            if (
+                                evt.get("status") == "error"
+                                and evt.get("message") == "not authorized"
+                            ):
+                                return await self._unauthorized(ws, url), False
+                            continue
+                        if type(evt) is Trade:
+                            trades += 1
+                        else:
+                            quotes += 1
+                        if self._gap_start is not None:
+                            self._schedule_backfill(evt.t)
+                        if evt.t > self._last_t:
+                            self._last_t = evt.t
+                        for sub in self._routes.get((type(evt), evt.symbol), ()):
+                            await sub._put(evt, start)
+                    if trades:
+                        _TRADE_EVENTS.inc(trades)
+                    if quotes:
+                        _QUOTE_EVENTS.inc(quotes)
+            finally:
+                self._ws = None
+        code = getattr(ws, "close_code", None)
+        if code in RECONNECT_CODES:
+            logging.warning("Stream closed with code %s", code)
+            return url, True
+        return None, False
+
+    async def _unauthorized(self, ws, url: str) -> str | None:
+        if url == REALTIME_WS_URL:
+            logging.warning("Real-time feed unauthorized, switching to delayed feed...")
+            await ws.close()
+            return WS_URL
+        logging.error("Subscription unauthorized; check your plan permissions")
+        return None
+
+    def _open_gap(self, url: str) -> None:
+        """Start an outage window after the last event delivered.
+
+        It is closed by the first live event or, failing that, after
+        :data:`BACKFILL_WAIT_SEC` at the current time less the feed delay.
+        """
+        self._gap_start = self._last_t + 1 if self._last_t else self._dropped_at
+        self._dropped_at = None
+        if self._gap_timer is not None:
+            self._gap_timer.cancel()
+        delay = FEED_DELAY_MS.get(url, 0)
+        self._gap_timer = asyncio.get_running_loop().call_later(
+            BACKFILL_WAIT_SEC,
+            lambda: self._schedule_backfill(int(time.time() * 1000) - delay),
+        )
+
+    def _schedule_backfill(self, end: int) -> None:
+        """Fetch the open outage window up to ``end`` (exclusive) in the background."""
+        start, self._gap_start = self._gap_start, None
+        if self._gap_timer is not None:
+            self._gap_timer.cancel()
+            self._gap_timer = None
+        if start is None or end <= start:
+            return
+        task = asyncio.ensure_future(self._backfill(start, end))
+        self._backfills.add(task)
+        task.add_done_callback(self._backfills.discard)
+
+    async def _backfill(self, start_ms: int, end_ms: int) -> None:
+        wanted: dict[str, set[str]] = {}
+        for sub in self._subs:
+            if sub.backfill:
+                for sym in sub.symbols:
+                    wanted.setdefault(sym, set()).update(sub.channels)
+        loop = asyncio.get_running_loop()
+        count = 0
+        for sym, channels in wanted.items():
+            for lo in range(start_ms, end_ms, BACKFILL_CHUNK_MS):
+                hi = min(lo + BACKFILL_CHUNK_MS, end_ms)
+                try:
+                    gap = await loop.run_in_executor(
+                        None, rest_events, sym, lo, hi, tuple(channels)
+                    )
+                except Exception as exc:
+                    logging.warning(
+                        "Backfill for %s from %d to %d failed: %s", sym, lo, hi, exc
+                    )
+                    self.missed.append((sym, lo, hi))
+                    continue
+                for evt in gap:
+                    for sub in self._routes.get((type(evt), sym), ()):
+                        if sub.backfill:
+                            await sub._put(evt)
+                count += len(gap)
+        if wanted:
+            logging.info("Backfilled %d events from %d to %d", count, start_ms, end_ms)
 
 
 async def stream_quotes(
@@ -19,6 +421,8 @@ async def stream_quotes(
     alert_agg: AlertAggregator | None = None,
     trade_threshold: int = 10000,
     on_event: callable | None = None,
+    hub: StreamHub | None = None,
+    backfill: bool = False,
 ) -> None:
     """Stream trades and quotes via Polygon's WebSocket asynchronously.
 
@@ -28,52 +432,32 @@ async def stream_quotes(
         Comma-separated ticker symbols to subscribe to.
     realtime : bool, default False
         If ``True`` use the real-time feed, otherwise the delayed feed.
+    hub : StreamHub, optional
+        Shared hub to consume from. Its owner runs it; without one a private
+        hub is created and run for the duration of the call.
+    backfill : bool, default False
+        Also pass events fetched over REST for reconnect gaps to ``on_event``.
     """
+    own_hub = hub is None
+    if own_hub:
+        hub = StreamHub(realtime=realtime)
+    sub = await hub.subscribe(symbols.split(","), block=True, backfill=backfill)
+    is_coro = inspect.iscoroutinefunction(on_event)
 
-    url = REALTIME_WS_URL if realtime else WS_URL
-    async with websockets.connect(url) as ws:
-        auth = json.dumps({"action": "auth", "params": _get_polygon_key()})
-        await ws.send(auth)
-        chans = []
-        for sym in symbols.split(","):
-            chans.append(f"T.{sym}")
-            chans.append(f"Q.{sym}")
-        subs = json.dumps({"action": "subscribe", "params": ",".join(chans)})
-        await ws.send(subs)
-        logging.info(
-            "Streaming %s data for %s... press Ctrl+C to stop",
-            "real-time" if realtime else "delayed",
-            symbols,
-        )
-        async for message in ws:
-            logging.debug(message)
-            try:
-                events = json.loads(message)
-            except json.JSONDecodeError:
-                continue
-            for evt in events:
-                if (
-                    evt.get("status") == "error"
-                    and evt.get("message") == "not authorized"
-                ):
-                    if realtime:
-                        logging.warning(
-                            "Real-time feed unauthorized, switching to delayed feed..."
-                        )
-                        await ws.close()
-                        await stream_quotes(symbols, realtime=False)
-                        return
-                    logging.error(
-                        "Subscription unauthorized; check your plan permissions"
-                    )
-                    return
-                if evt.get("ev") == "T":
-                    size = evt.get("s") or evt.get("size") or evt.get("v")
-                    sym = evt.get("sym") or evt.get("symbol")
-                    if alert_agg and size and size >= trade_threshold:
-                        alert_agg.add_trade(sym, int(size))
-                if on_event:
-                    if inspect.iscoroutinefunction(on_event):
-                        await on_event(evt)
-                    else:
-                        on_event(evt)
+    async def consume() -> None:
+        async for evt in sub:
+            if alert_agg and type(evt) is Trade and evt.size >= trade_threshold:
+                alert_agg.add_trade(evt)
+            if on_event:
+                if is_coro:
+                    await on_event(evt)
+                else:
+                    on_event(evt)
+
+    if not own_hub:
+        await consume()
+        return
+    try:
+        await asyncio.gather(hub.run(), consume())
+    finally:
+        await hub.close()
@@ -0,0 +1,189 @@
+"""Run one shared Polygon WebSocket for the tick sink, alerts and dashboard."""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import os
+import sqlite3
+from typing import Callable, Iterable
+
+from .. import telemetry
+from ..portfolio import PORTFOLIO_FILE
+from ..secret_filter import SecretFilter
+from . import (
+    bars,
+    broadcast,
+    db,
+    delayed_stream,
+    portfolio_stream,
+    sink,
+    stream_async,
+)
+from .alerts import AlertAggregator
+from .events import Trade
+
+ALERT_FLUSH_SEC = 60.0
+
+
+async def emit_alerts(
+    sub: stream_async.Subscription,
+    alert_agg: AlertAggregator,
+    trade_threshold: int = 10000,
+    flush_sec: float = ALERT_FLUSH_SEC,
+) -> None:
+    """Queue large trades from ``sub`` and flush alerts every ``flush_sec``."""
+    loop = asyncio.get_running_loop()
+    next_flush = loop.time() + flush_sec
+    async for evt in sub:
+        if type(evt) is Trade and evt.size >= trade_threshold:
+            alert_agg.add_trade(evt)
+        if loop.time() >= next_flush:
+            next_flush = loop.time() + flush_sec
+            await loop.run_in_executor(None, alert_agg.flush)
+    await loop.run_in_executor(None, alert_agg.flush)
+
+
+async def run_hub(
+    conn: sqlite3.Connection,
+    portfolio_file: str = PORTFOLIO_FILE,
+    symbols: Iterable[str] = (),
+    realtime: bool = False,
+    alert_agg: AlertAggregator | None = None,
+    trade_threshold: int = 10000,
+    emit: Callable | None = None,
+    watch_sets: broadcast.WatchSets | None = None,
+    batch_size: int = sink.DEFAULT_BATCH_SIZE,
+    flush_ms: int = sink.DEFAULT_FLUSH_MS,
+    overview_ms: int = broadcast.INTERVAL_MS,
+    bar_intervals: Iterable[str] = bars.DEFAULT_INTERVALS,
+    watch_interval: float = portfolio_stream.WATCH_INTERVAL_SEC,
+) -> None:
+    """Stream over one connection and fan events out to every consumer.
+
+    Parameters
+    ----------
+    conn : sqlite3.Connection
+        Database receiving ticks for the portfolio symbols.
+    portfolio_file : str
+        Portfolio whose open positions are recorded.
+    symbols : iterable of str
+        Extra symbols for large-trade alerts and dashboard quotes.
+    alert_agg : AlertAggregator, optional
+        Receives trades of at least ``trade_threshold`` shares.
+    emit : callable, optional
+        Socket.IO ``emit`` used for ``overview_quotes`` batches.
+    watch_sets : WatchSets, optional
+        Watchlist rooms of the dashboard clients, each sent one batch of its
+        symbols per interval.
+    overview_ms : int
+        Interval between ``overview_quotes`` batches in milliseconds.
+    bar_intervals : iterable of str
+        Bars built from the trades of every streamed symbol, with outages
+        backfilled; completed 1m bars are written to ``stream_minute_bars``.
+        Empty disables aggregation.
+    watch_interval : float
+        Seconds between portfolio file checks. Bar, alert and quote
+        subscriptions follow the open positions plus ``symbols``.
+    """
+    hub = stream_async.StreamHub(realtime=realtime)
+    symbols = set(symbols)
+    watch = sorted(symbols | set(portfolio_stream.portfolio_symbols(portfolio_file)))
+    consumers = [
+        portfolio_stream.stream_portfolio_quotes(
+            conn,
+            portfolio_file,
+            batch_size=batch_size,
+            flush_ms=flush_ms,
+            hub=hub,
+            watch_interval=watch_interval,
+        )
+    ]
+    watched = []
+    bar_intervals = tuple(bar_intervals)
+    if bar_intervals:
+        prints = await hub.subscribe(watch, channels=("T",), block=True, backfill=True)
+        watched.append(prints)
+        aggregator = bars.BarAggregator(bar_intervals)
+        consumers.append(bars.record_bars(prints, conn, aggregator))
+    if alert_agg is not None:
+        trades = await hub.subscribe(watch, channels=("T",))
+        watched.append(trades)
+        consumers.append(emit_alerts(trades, alert_agg, trade_threshold))
+    if emit is not None:
+        quotes = await hub.subscribe(watch, channels=("Q",))
+        watched.append(quotes)
+        broadcaster = broadcast.QuoteBroadcaster(
+            emit, interval_ms=overview_ms, watch_sets=watch_sets
+        )
+        consumers.append(delayed_stream.emit_overview(quotes, broadcaster))
+    watcher = asyncio.ensure_future(
+        portfolio_stream.watch_portfolio(
+            hub, watched, portfolio_file, watch_interval, extra=symbols
+        )
+    )
+    try:
+        await asyncio.gather(*consumers, hub.run())
+    finally:
+        watcher.cancel()
+        await hub.close()
+
+
+def _socketio_emit() -> Callable | None:
+    """Return a Socket.IO emitter publishing through ``REDIS_URL``."""
+    redis_url = os.getenv("REDIS_URL")
+    if not redis_url:
+        logging.info("REDIS_URL not set; dashboard quotes disabled")
+        return None
+    try:
+        from flask_socketio import SocketIO
+
+        return SocketIO(message_queue=redis_url).emit
+    except Exception as exc:  # pragma: no cover - optional dependency
+        logging.warning("Socket.IO emitter unavailable: %s", exc)
+        return None
+
+
+def main(argv: list[str] | None = None) -> None:
+    """CLI entry point for the shared stream hub."""
+    parser = argparse.ArgumentParser(description="Run the shared stream hub")
+    parser.add_argument("--portfolio-file", default=PORTFOLIO_FILE)
+    parser.add_argument("--db-file", default="market_data.db")
+    parser.add_argument("--symbols", default="", help="Extra watchlist symbols")
+    parser.add_argument("--realtime", action="store_true")
+    parser.add_argument("--trade-threshold", type=int, default=10000)
+    parser.add_argument("--batch-size", type=int, default=sink.DEFAULT_BATCH_SIZE)
+    parser.add_argument("--flush-ms", type=int, default=sink.DEFAULT_FLUSH_MS)
+    parser.add_argument("--overview-ms", type=int, default=broadcast.INTERVAL_MS)
+    parser.add_argument(
+        "--bars",
+        default=",".join(bars.DEFAULT_INTERVALS),
+        help="Bar intervals built from trades; empty disables",
+    )
+    parser.add_argument("--log-level", default="INFO")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=args.log_level)
+    logging.getLogger().addFilter(SecretFilter())
+    telemetry.serve()
+    conn = db.init_db(args.db_file)
+    asyncio.run(
+        run_hub(
+            conn,
+            args.portfolio_file,
+            [s for s in args.symbols.split(",") if s],
+            realtime=args.realtime,
+            alert_agg=AlertAggregator(),
+            trade_threshold=args.trade_threshold,
+            emit=_socketio_emit(),
+            watch_sets=broadcast.make_watch_sets(os.getenv("REDIS_URL")),
+            batch_size=args.batch_size,
+            flush_ms=args.flush_ms,
+            overview_ms=args.overview_ms,
+            bar_intervals=[b for b in args.bars.split(",") if b],
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -32,12 +32,34 @@ class Config:
     symbols: str = "AAPL"
     db_file: str = "market_data.db"
     use_async: bool = False
+    concurrency: int = 8
     log_file: str | None = None
     log_level: str = "INFO"
     polygon_api_key: str | None = None
     news_api_key: str | None = None
     slack_webhook_url: str | None = None
     max_risk: dict[str, float] | None = None
+    sqlite_journal_mode: str = "WAL"
+    sqlite_synchronous: str = "NORMAL"
+    sqlite_cache_kb: int = 65536
+    sqlite_mmap_mb: int = 256
+    sqlite_busy_timeout_ms: int = 5000
+    incremental_features: bool = False
+
+
+def sqlite_env() -> dict:
+    """Return the ``sqlite_*`` :class:`Config` fields set in the environment.
+
+    Only ``os.environ`` is read; ``.env`` files are left to
+    :func:`load_config`.
+    """
+    return {
+        "sqlite_journal_mode": os.getenv("SQLITE_JOURNAL_MODE", "WAL"),
+        "sqlite_synchronous": os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),
+        "sqlite_cache_kb": int(os.getenv("SQLITE_CACHE_KB", "65536")),
+        "sqlite_mmap_mb": int(os.getenv("SQLITE_MMAP_MB", "256")),
+        "sqlite_busy_timeout_ms": int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000")),
+    }
 
 
 def load_config(
@@ -56,19 +78,30 @@ def load_config(
         action="store_true",
         default=os.getenv("USE_ASYNC") == "1",
     )
+    parser.add_argument(
+        "--concurrency", type=int, default=int(os.getenv("CONCURRENCY", "8"))
+    )
     parser.add_argument("--log-file", default=os.getenv("LOG_FILE"))
     parser.add_argument("--log-level", default=os.getenv("LOG_LEVEL", "INFO"))
     parser.add_argument("--max-risk", default=os.getenv("MAX_RISK"))
+    parser.add_argument(
+        "--incremental-features",
+        action="store_true",
+        default=os.getenv("FEATURES_INCREMENTAL") == "1",
+    )
     args, _ = parser.parse_known_args(argv)
 
     return Config(
         symbols=args.symbols,
         db_file=args.db_file,
         use_async=args.use_async,
+        concurrency=args.concurrency,
         log_file=args.log_file,
         log_level=args.log_level,
         polygon_api_key=os.getenv("POLYGON_API_KEY"),
         news_api_key=os.getenv("NEWS_API_KEY"),
         slack_webhook_url=os.getenv("SLACK_WEBHOOK_URL"),
         max_risk=_parse_risk(args.max_risk),
+        **sqlite_env(),
+        incremental_features=args.incremental_features,
     )
@@ -3,16 +3,54 @@
 from __future__ import annotations
 
 import csv
+import os
 import sqlite3
 from pathlib import Path
 
+from .config import Config, sqlite_env
+
 DATA_FILE = Path(__file__).resolve().parent.parent / "data" / "demo_news.csv"
 
 
-def bootstrap(path: Path) -> sqlite3.Connection:
+def connect(
+    path: str | os.PathLike[str],
+    config: Config | None = None,
+    **kwargs,
+) -> sqlite3.Connection:
+    """Open a SQLite connection tuned for concurrent readers and writers.
+
+    Applies the journal mode (WAL by default), ``synchronous`` level, page
+    cache size, ``mmap_size``, in-memory temp storage and busy timeout from
+    ``config``; when omitted the ``SQLITE_*`` variables currently in the
+    environment are used, without loading ``.env``.
+
+    Parameters
+    ----------
+    path : str or PathLike
+        Database file, ``:memory:`` or a ``file:`` URI.
+    config : Config, optional
+        Configuration providing the ``sqlite_*`` settings.
+    **kwargs
+        Extra keyword arguments for :func:`sqlite3.connect`.
+    """
+    cfg = config or Config(**sqlite_env())
+    kwargs.setdefault("timeout", cfg.sqlite_busy_timeout_ms / 1000)
+    if isinstance(path, str) and path.startswith("file:"):
+        kwargs.setdefault("uri", True)
+    conn = sqlite3.connect(path, **kwargs)
+    conn.execute(f"PRAGMA busy_timeout={int(cfg.sqlite_busy_timeout_ms)}")
+    conn.execute(f"PRAGMA journal_mode={cfg.sqlite_journal_mode}")
+    conn.execute(f"PRAGMA synchronous={cfg.sqlite_synchronous}")
+    conn.execute(f"PRAGMA cache_size=-{int(cfg.sqlite_cache_kb)}")
+    conn.execute(f"PRAGMA mmap_size={int(cfg.sqlite_mmap_mb) * 1024 * 1024}")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    return conn
+
+
+def bootstrap(path: Path, config: Config | None = None) -> sqlite3.Connection:
     """Ensure required tables exist and return connection."""
     path.parent.mkdir(parents=True, exist_ok=True)
-    conn = sqlite3.connect(path)
+    conn = connect(path, config)
     conn.execute(
         """CREATE TABLE IF NOT EXISTS news(
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -21,6 +59,10 @@ def bootstrap(path: Path) -> sqlite3.Connection:
             published_at DATETIME
         )"""
     )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_news_published "
+        "ON news(published_at, title, url)"
+    )
     cur = conn.cursor()
     cur.execute("SELECT COUNT(*) FROM news")
     if cur.fetchone()[0] == 0 and DATA_FILE.exists():
@@ -40,19 +40,14 @@ def evaluate_positions(
         logging.info("No open positions to evaluate")
         return
 
-    cur = conn.cursor()
     for _, row in df.iterrows():
         symbol = row["symbol"]
         avg_price = float(row["avg_price"])
         api.fetch_realtime_quote(conn, symbol)
-        cur.execute(
-            "SELECT price FROM realtime_quotes WHERE symbol=? ORDER BY t DESC LIMIT 1",
-            (symbol,),
-        )
-        fetched = cur.fetchone()
+        fetched = db.latest_quote(conn, symbol)
         if not fetched:
             continue
-        price = float(fetched[0])
+        price = float(fetched[1])
         change = (price - avg_price) / avg_price
         if change <= -stop_loss or change >= take_profit:
             close_position(symbol, price, portfolio_file, pnl_file)
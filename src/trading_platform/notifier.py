@@ -2,7 +2,7 @@ import logging
 import os
 from typing import Optional
 
-import requests
+from .collector.session import get_session
 
 
 def send_slack(message: str, webhook_url: Optional[str] = None) -> None:
@@ -22,7 +22,7 @@ def send_slack(message: str, webhook_url: Optional[str] = None) -> None:
         return
 
     try:
-        resp = requests.post(url, json={"text": message}, timeout=10)
+        resp = get_session().post(url, json={"text": message}, timeout=10)
         resp.raise_for_status()
     except Exception as exc:  # pragma: no cover - log only
         logging.error("Failed to send Slack message: %s", exc)
@@ -4,9 +4,18 @@ from pathlib import Path
 import lightgbm as lgb
 import pandas as pd
 
+from features.store import read_features
+
+# Feature columns used by the scoring rule besides the model inputs
+CONTEXT_COLUMNS = ["news_sent", "iv_edge", "uoa", "garch_spike"]
+
 
 def generate_playbook(
-    features_csv: str, model_file: str, out_dir: str = "playbooks"
+    features_csv: str,
+    model_file: str,
+    out_dir: str = "playbooks",
+    symbols: list[str] | None = None,
+    start: str | None = None,
 ) -> str:
     """Generate daily options trade playbook.
 
@@ -18,21 +27,29 @@ def generate_playbook(
     Parameters
     ----------
     features_csv : str
-        Path to the engineered features CSV.
+        Feature store directory or engineered features CSV.
     model_file : str
         Path to the trained LightGBM model.
     out_dir : str, optional
         Output directory for playbook JSON, by default ``playbooks``.
+    symbols : list of str, optional
+        Symbols to score; every stored symbol by default.
+    start : str, optional
+        First ``YYYY-MM-DD`` day scored; the whole history by default.
 
     Returns
     -------
     str
         Path to the written JSON playbook.
     """
-    df = pd.read_csv(features_csv)
     model = lgb.Booster(model_file=model_file)
-
     model_features = list(model.feature_name())
+    df = read_features(
+        features_csv,
+        symbols,
+        start=start,
+        columns=["t", "close", "sma20", *CONTEXT_COLUMNS, *model_features],
+    )
     for feat in model_features:
         if feat not in df.columns:
             df[feat] = 0
@@ -66,6 +83,8 @@ def generate_playbook(
             "garch_spike",
         ]
     ].round(4)
+    if pd.api.types.is_datetime64_any_dtype(top_rounded["t"]):
+        top_rounded["t"] = top_rounded["t"].dt.strftime("%Y-%m-%d")
 
     Path(out_dir).mkdir(parents=True, exist_ok=True)
     date = pd.Timestamp.utcnow().date().isoformat()
@@ -2,8 +2,10 @@
 
 from __future__ import annotations
 
+import logging
 from datetime import datetime
 from pathlib import Path
+from typing import Callable
 
 import pandas as pd
 
@@ -12,6 +14,19 @@ from trading_platform.reports import REPORTS_DIR
 PORTFOLIO_FILE = str(REPORTS_DIR / "portfolio.csv")
 PNL_FILE = str(REPORTS_DIR / "pnl.csv")
 
+_LISTENERS: list[Callable[[str], None]] = []
+
+
+def add_listener(callback: Callable[[str], None]) -> None:
+    """Call ``callback(path)`` whenever a portfolio file is saved."""
+    _LISTENERS.append(callback)
+
+
+def remove_listener(callback: Callable[[str], None]) -> None:
+    """Stop notifying ``callback`` of portfolio saves."""
+    if callback in _LISTENERS:
+        _LISTENERS.remove(callback)
+
 
 def load_portfolio(path: str = PORTFOLIO_FILE) -> pd.DataFrame:
     """Load portfolio CSV or return empty DataFrame."""
@@ -26,6 +41,11 @@ def save_portfolio(df: pd.DataFrame, path: str = PORTFOLIO_FILE) -> str:
     file = Path(path)
     file.parent.mkdir(parents=True, exist_ok=True)
     df.to_csv(file, index=False)
+    for callback in list(_LISTENERS):
+        try:
+            callback(str(file))
+        except Exception as exc:  # pragma: no cover - listener bug
+            logging.warning("Portfolio listener failed: %s", exc)
     return str(file)
 
 
@@ -2,30 +2,38 @@
 
 from pathlib import Path
 
-import pandas as pd
 import plotly.express as px
 
+from features.store import read_features
+
 from . import REPORTS_DIR
 
 
 def generate_feature_dashboard(
-    csv_file: str, out_file: str = str(REPORTS_DIR / "feature_dashboard.html")
+    csv_file: str,
+    out_file: str = str(REPORTS_DIR / "feature_dashboard.html"),
+    symbols: list[str] | None = None,
+    start: str | None = None,
 ) -> str:
     """Create an interactive dashboard showing feature distributions.
 
     Parameters
     ----------
     csv_file : str
-        Path to the features CSV file.
+        Feature store directory or features CSV file.
     out_file : str, optional
         Destination HTML file, by default ``REPORTS_DIR / 'feature_dashboard.html'``.
+    symbols : list of str, optional
+        Symbols to plot; every stored symbol by default.
+    start : str, optional
+        First ``YYYY-MM-DD`` day plotted; the whole history by default.
 
     Returns
     -------
     str
         Path to the written HTML file.
     """
-    df = pd.read_csv(csv_file)
+    df = read_features(csv_file, symbols, start=start)
     numeric = df.select_dtypes(include="number")
     if numeric.empty:
         raise ValueError("no numeric columns")
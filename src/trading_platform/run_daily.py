@@ -1,8 +1,10 @@
 """Daily pipeline orchestration."""
 
 import asyncio
+import dataclasses
 import json
 import logging
+from datetime import date, timedelta
 from pathlib import Path
 
 from features import run_pipeline
@@ -12,7 +14,7 @@ from trading_platform.reports.dashboard import generate_dashboard
 from trading_platform.reports.feature_dashboard import generate_feature_dashboard
 from trading_platform.reports.scoreboard import update_scoreboard
 
-from . import notifier
+from . import notifier, telemetry
 from .collector import api, api_async, db, verify
 from .collector.alerts import AlertAggregator
 from .config import Config, load_config
@@ -41,34 +43,58 @@ def run(config: Config) -> str:
     if not verify.verify(config.symbols):
         raise SystemExit("Connectivity check failed")
 
-    conn = db.init_db(config.db_file)
+    conn = db.init_db(config.db_file, config)
     agg = AlertAggregator(config.slack_webhook_url)
-    for sym in config.symbols.split(","):
+    with telemetry.stage("fetch"):
         if config.use_async:
-            asyncio.run(api_async.fetch_all(conn, sym, aggregator=agg))
+            symbols = config.symbols.split(",")
+            errors = asyncio.run(
+                api_async.fetch_universe(
+                    conn,
+                    symbols,
+                    concurrency=config.concurrency,
+                    aggregator=agg,
+                )
+            )
+            if errors:
+                failed = ", ".join(f"{sym} ({exc})" for sym, exc in errors.items())
+                notifier.send_slack(f"Fetch failed for {failed}")
+                if len(errors) == len(symbols):
+                    raise SystemExit("Fetch failed for every symbol")
         else:
-            api.fetch_ohlcv(conn, sym)
-            api.fetch_option_chain(conn, sym)
-            api.fetch_news(conn, sym, aggregator=agg)
+            for sym in config.symbols.split(","):
+                api.fetch_ohlcv(conn, sym)
+                api.fetch_option_chain(conn, sym)
+                api.fetch_news(conn, sym, aggregator=agg)
 
     try:
-        feat_csv = run_pipeline(config, [config.symbols.split(",")[0]])
-        res = train_model(feat_csv, "models", symbol=config.symbols.split(",")[0])
+        symbol = config.symbols.split(",")[0]
+        with telemetry.stage("features"):
+            store = run_pipeline(config, [symbol])
+        with telemetry.stage("train"):
+            res = train_model(store, "models", symbol=symbol)
         if not res.model_path:
             raise RuntimeError("drift guard triggered")
-        generate_dashboard(res.train_auc, res.test_auc, cv_auc=res.cv_auc)
-        generate_feature_dashboard(feat_csv)
-        pb_path = generate_playbook(feat_csv, res.model_path)
-        update_scoreboard(
-            pb_path,
-            res.test_auc,
-            model_path=res.model_path,
-            train_auc=res.train_auc,
-            test_auc=res.test_auc,
-            cv_auc=res.cv_auc,
-            window_days=res.window_days,
-            holdout_auc=res.holdout_auc,
-        )
+        # the store keeps symbols of earlier configs; read only this run's
+        start = (date.today() - timedelta(days=res.window_days)).isoformat()
+        with telemetry.stage("reports"):
+            generate_dashboard(res.train_auc, res.test_auc, cv_auc=res.cv_auc)
+            generate_feature_dashboard(store, symbols=[symbol], start=start)
+        with telemetry.stage("playbook"):
+            pb_path = generate_playbook(
+                store, res.model_path, symbols=[symbol], start=start
+            )
+        with telemetry.stage("scoreboard"):
+            update_scoreboard(
+                pb_path,
+                res.test_auc,
+                model_path=res.model_path,
+                train_auc=res.train_auc,
+                test_auc=res.test_auc,
+                cv_auc=res.cv_auc,
+                window_days=res.window_days,
+                holdout_auc=res.holdout_auc,
+            )
         with open(pb_path) as f:
             pb = json.load(f)
         headers = [
@@ -123,9 +149,13 @@ def run(config: Config) -> str:
 
 
 def run_intraday(config: Config) -> None:
-    """Lightweight intraday refresh pipeline."""
+    """Lightweight intraday refresh pipeline.
+
+    Features are updated incrementally so each refresh only computes the rows
+    for bars added since the previous run.
+    """
     try:
-        run(config)
+        run(dataclasses.replace(config, incremental_features=True))
     except Exception as exc:  # pragma: no cover - just log
         logging.error("intraday job failed: %s", exc)
 
@@ -133,7 +163,10 @@ def run_intraday(config: Config) -> None:
 def main(argv: list[str] | None = None) -> None:
     """Entry point for the daily pipeline CLI."""
     config = load_config(argv)
-    run(config)
+    try:
+        run(config)
+    finally:
+        telemetry.push("run_daily")
 
 
 if __name__ == "__main__":
@@ -2,8 +2,7 @@
 
 from pathlib import Path
 
-import pandas as pd
-
+from features.store import read_features
 from trading_platform import portfolio
 from trading_platform.reports import REPORTS_DIR
 from trading_platform.reports.scoreboard import update_scoreboard
@@ -19,26 +18,37 @@ def simulate(
     portfolio_file: str = portfolio.PORTFOLIO_FILE,
     pnl_file: str = portfolio.PNL_FILE,
     symbol: str | None = None,
+    start: str | None = None,
 ) -> str:
     """Simulate a strategy on historical prices and record PnL.
 
     Parameters
     ----------
     features_csv : str
-        Features CSV containing a ``close`` column.
+        Feature store directory or features CSV with a ``close`` column.
     strategy : str, optional
         Strategy name, by default ``"buy_hold"``.
     capital : float, optional
         Starting capital for the trade, by default ``10000``.
     out_file : str, optional
         Scoreboard CSV path, by default ``REPORTS_DIR / 'scoreboard.csv'``.
+    symbol : str, optional
+        Symbol whose rows are read; required when the features hold more than
+        one. Defaults to the file name for labelling.
+    start : str, optional
+        First ``YYYY-MM-DD`` day simulated; the whole history by default.
 
     Returns
     -------
     str
         Path to the scoreboard CSV after update.
     """
-    df = pd.read_csv(features_csv)
+    symbols = None if symbol is None else [symbol]
+    df = read_features(
+        features_csv, symbols, start=start, columns=["symbol", "t", "close"]
+    )
+    if "symbol" in df.columns and df["symbol"].nunique() > 1:
+        raise ValueError("features hold several symbols; pass symbol")
     if "close" not in df.columns:
         raise ValueError("close column required")
 
@@ -81,6 +91,7 @@ def main(argv: list[str] | None = None) -> None:
     parser.add_argument("--portfolio-file", default=portfolio.PORTFOLIO_FILE)
     parser.add_argument("--pnl-file", default=portfolio.PNL_FILE)
     parser.add_argument("--symbol")
+    parser.add_argument("--start", help="First day simulated (YYYY-MM-DD)")
     args = parser.parse_args(argv)
     simulate(
         args.features_csv,
@@ -89,6 +100,7 @@ def main(argv: list[str] | None = None) -> None:
         portfolio_file=args.portfolio_file,
         pnl_file=args.pnl_file,
         symbol=args.symbol,
+        start=args.start,
     )
 
 
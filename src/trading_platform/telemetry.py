@@ -0,0 +1,146 @@
+"""Prometheus metrics for the collectors, stream handlers and daily pipeline.
+
+Metrics are registered in the default ``prometheus_client`` registry, which the
+web app serves at ``/metrics``. Long-running CLIs call :func:`serve` to expose
+their own endpoint on ``METRICS_PORT`` and batch jobs call :func:`push` to send
+their samples to ``PUSHGATEWAY_URL``.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import re
+import time
+from contextlib import contextmanager
+from typing import Iterator
+from urllib.parse import urlsplit
+
+from prometheus_client import (
+    REGISTRY,
+    Counter,
+    Histogram,
+    push_to_gateway,
+    start_http_server,
+)
+
+# Latency buckets in seconds, from sub-millisecond sink commits to slow HTTP
+LATENCY_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+STAGE_BUCKETS = (1, 5, 15, 30, 60, 120, 300, 600, 1800, 3600)
+
+HTTP_LATENCY = Histogram(
+    "polygon_request_seconds",
+    "Latency of upstream HTTP requests by endpoint",
+    ["endpoint"],
+    buckets=LATENCY_BUCKETS,
+)
+HTTP_REQUESTS = Counter(
+    "polygon_requests_total",
+    "Upstream HTTP responses by endpoint and status code",
+    ["endpoint", "status"],
+)
+STREAM_EVENTS = Counter(
+    "stream_events_total",
+    "WebSocket events decoded by channel",
+    ["channel"],
+)
+STREAM_DECODE = Histogram(
+    "stream_decode_seconds",
+    "Time to decode one WebSocket message",
+    buckets=LATENCY_BUCKETS,
+)
+PERSIST_LATENCY = Histogram(
+    "stream_persist_latency_seconds",
+    "Time from a tick's WebSocket message arriving to its commit",
+    buckets=LATENCY_BUCKETS,
+)
+QUEUE_WAIT = Histogram(
+    "stream_queue_wait_seconds",
+    "Time an event waits in a stream hub subscription queue",
+    buckets=LATENCY_BUCKETS,
+)
+ROWS_WRITTEN = Counter(
+    "collector_rows_written_total",
+    "Rows written by the collectors per table",
+    ["table"],
+)
+STAGE_SECONDS = Histogram(
+    "pipeline_stage_seconds",
+    "Duration of each daily pipeline stage",
+    ["stage"],
+    buckets=STAGE_BUCKETS,
+)
+INDICATOR_SECONDS = Histogram(
+    "feature_indicator_seconds",
+    "Time to compute each feature indicator over all symbols of a run",
+    ["indicator"],
+    buckets=LATENCY_BUCKETS,
+)
+
+# Path segments holding tickers, contracts, dates or numbers
+_VARIABLE = re.compile(r"^(?=.*[A-Z0-9])[A-Z0-9.:_\-]+$")
+
+
+def endpoint(url: str) -> str:
+    """Return a low-cardinality label for ``url`` with variable parts masked.
+
+    ``https://api.polygon.io/v2/aggs/ticker/AAPL/prev`` becomes
+    ``/v2/aggs/ticker/{}/prev``.
+    """
+    parts = urlsplit(url).path.split("/")
+    return "/".join("{}" if _VARIABLE.match(p) else p for p in parts)
+
+
+def observe_request(url: str, status: int | str, seconds: float) -> None:
+    """Record one upstream request to ``url``."""
+    label = endpoint(url)
+    HTTP_LATENCY.labels(label).observe(seconds)
+    HTTP_REQUESTS.labels(label, str(status)).inc()
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Time the enclosed block as pipeline stage ``name``."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.labels(name).observe(time.perf_counter() - start)
+
+
+def serve(port: int | None = None) -> bool:
+    """Expose metrics over HTTP on ``port`` or ``METRICS_PORT`` if set."""
+    port = port or int(os.getenv("METRICS_PORT", "0"))
+    if not port:
+        return False
+    start_http_server(port)
+    logging.info("Serving metrics on :%d", port)
+    return True
+
+
+def push(job: str, gateway: str | None = None) -> bool:
+    """Push all metrics to ``gateway`` or ``PUSHGATEWAY_URL`` if set."""
+    gateway = gateway or os.getenv("PUSHGATEWAY_URL")
+    if not gateway:
+        return False
+    try:
+        push_to_gateway(gateway, job=job, registry=REGISTRY)
+    except OSError as exc:
+        logging.warning("Metrics push to %s failed: %s", gateway, exc)
+        return False
+    return True
@@ -5,6 +5,7 @@ from __future__ import annotations
 import json
 import logging
 import os
+import re
 import sqlite3
 import subprocess
 from pathlib import Path
@@ -13,7 +14,16 @@ from threading import Thread
 from trading_platform import reports
 
 from . import risk_report
+from .collector.broadcast import (
+    MAX_WATCH_SYMBOLS,
+    OVERVIEW_ROOM,
+    QuoteBroadcaster,
+    WatchSets,
+    make_watch_sets,
+)
+from .collector.db import NEWS_SQL, OVERVIEW_SQL
 from .db import bootstrap as bootstrap_db
+from .db import connect
 from .secret_filter import SecretFilter
 
 DEMO_DIR = Path(__file__).resolve().parent / "reports" / "demo"
@@ -22,10 +32,10 @@ DEMO_DIR = Path(__file__).resolve().parent / "reports" / "demo"
 def get_connection(db_path: Path):
     """Return writable SQLite connection, creating file if needed."""
     try:
-        return sqlite3.connect(db_path, check_same_thread=False)
+        return connect(db_path, check_same_thread=False)
     except sqlite3.OperationalError:  # pragma: no cover - touch fallback
         db_path.touch()
-        return sqlite3.connect(db_path, check_same_thread=False)
+        return connect(db_path, check_same_thread=False)
 
 
 import pandas as pd
@@ -40,13 +50,42 @@ from flask import (
     Response,
     Blueprint,
 )
-from flask_socketio import SocketIO
+from flask_socketio import SocketIO, join_room, leave_room
 from prometheus_client import generate_latest
 
 # Reduce noisy "Invalid session" warnings and allow cross-origin clients
 socketio = SocketIO(
     logger=False, engineio_logger=False, async_mode="eventlet", cors_allowed_origins="*"
 )
+# Batched ``overview_quotes`` frames; watching clients join one room per
+# watchlist, registered in ``watch_sets`` (in Redis once ``create_app`` runs
+# with ``REDIS_URL``, so ``stream-hub`` sees them)
+watch_sets: WatchSets = WatchSets()
+quote_broadcaster = QuoteBroadcaster(socketio.emit, watch_sets=watch_sets)
+_WATCH_ROOMS: dict[str, str] = {}
+_SYMBOL_RE = re.compile(r"[A-Z0-9.:\-]{1,32}")
+
+
+def _watch_symbols(data) -> set[str]:
+    """Return the valid ticker symbols of a ``watch`` payload.
+
+    Items that are not ticker strings are ignored, and only the first
+    :data:`~.collector.broadcast.MAX_WATCH_SYMBOLS` are kept.
+    """
+    items = data.get("symbols") if isinstance(data, dict) else None
+    if not isinstance(items, list):
+        return set()
+    symbols: set[str] = set()
+    for item in items:
+        if not isinstance(item, str):
+            continue
+        symbol = item.strip().upper()
+        if _SYMBOL_RE.fullmatch(symbol):
+            symbols.add(symbol)
+            if len(symbols) == MAX_WATCH_SYMBOLS:
+                break
+    return symbols
+
 
 from dotenv import load_dotenv
 
@@ -192,7 +231,9 @@ DASH_TEMPLATE = """
 const socket=io();
 socket.on('trade',t=>addTradeRow(t));
 socket.on('pnl_update',d=>showEquity(d));
-socket.on('overview_quote',q=>updateOverview(q));
+socket.on('overview_quotes',qs=>qs.forEach(updateOverview));
+let watchSyms=null;
+socket.on('connect',()=>{if(watchSyms)socket.emit('watch',{symbols:watchSyms});});
 let seenAlerts=new Set();
 let seenNews=new Set();
 let trades=[];
@@ -219,7 +260,13 @@ function load(){
   fetch('/api/metrics/strategy').then(r=>r.json()).then(showStrategy);
   fetch('/api/metrics/performance').then(r=>r.json()).then(renderPerformance);
   fetch('/api/positions').then(r=>r.json()).then(showPositions);
-  fetch('/api/watchlist').then(r=>r.json()).then(showWatchlist);
+  fetch('/api/watchlist').then(r=>r.json()).then(list=>{
+    showWatchlist(list);
+    if(JSON.stringify(list)!==JSON.stringify(watchSyms)){
+      watchSyms=list;
+      socket.emit('watch',{symbols:list});
+    }
+  });
   fetch('/api/overview').then(r=>r.json()).then(showOverview);
   fetch('/api/flow').then(r=>r.json()).then(showFlow);
 }
@@ -509,8 +556,10 @@ def create_app(env_path: str | os.PathLike[str] = ".env") -> Flask:
 
     reports.REPORTS_DIR = Path(os.getenv("REPORTS_DIR", str(reports.REPORTS_DIR)))
     app = Flask(__name__, static_folder="static", static_url_path="")
+    global watch_sets
     redis_url = os.getenv("REDIS_URL")
     socketio.init_app(app, message_queue=redis_url, ping_timeout=20)
+    watch_sets = quote_broadcaster.watch_sets = make_watch_sets(redis_url)
     flt = SecretFilter()
     app.logger.addFilter(flt)
     logging.getLogger("werkzeug").addFilter(flt)
@@ -727,7 +776,7 @@ def create_app(env_path: str | os.PathLike[str] = ".env") -> Flask:
         from .collector import db
 
         def task() -> None:
-            conn = db.init_db(cfg.db_file)
+            conn = db.init_db(cfg.db_file, cfg)
             backfill_mod.fetch_range(conn, symbol, start, end)
 
         Thread(target=task).start()
@@ -805,10 +854,7 @@ def create_app(env_path: str | os.PathLike[str] = ".env") -> Flask:
             return jsonify({"items": []})
         conn = get_connection(db_path)
         try:
-            df = pd.read_sql(
-                "SELECT title, url FROM news ORDER BY published_at DESC LIMIT 5",
-                conn,
-            )
+            df = pd.read_sql(NEWS_SQL, conn)
         except Exception:
             conn.close()
             demo = DEMO_DIR / "news.csv"
@@ -945,10 +991,7 @@ def create_app(env_path: str | os.PathLike[str] = ".env") -> Flask:
                     break
         if not syms:
             syms = os.getenv("SYMBOLS", "AAPL").split(",")
-        query = (
-            "SELECT symbol, close FROM ohlcv WHERE t=(SELECT MAX(t) FROM ohlcv) "
-            "AND symbol IN (%s)" % ",".join("?" * len(syms))
-        )
+        query = OVERVIEW_SQL.format(",".join("?" * len(syms)))
         try:
             df = pd.read_sql(query, conn, params=syms)
         except Exception:
@@ -989,10 +1032,29 @@ def create_app(env_path: str | os.PathLike[str] = ".env") -> Flask:
 
     @socketio.on("connect")
     def on_connect():
-        pass
+        join_room(OVERVIEW_ROOM)
+
+    @socketio.on("watch")
+    def on_watch(data):
+        """Move the client to the quote room of its watchlist ``symbols``."""
+        symbols = _watch_symbols(data)
+        room = _WATCH_ROOMS.pop(request.sid, None)
+        if room is not None:
+            leave_room(room)
+            watch_sets.discard(room)
+        if not symbols:
+            join_room(OVERVIEW_ROOM)
+            return
+        leave_room(OVERVIEW_ROOM)
+        room = watch_sets.add(symbols)
+        join_room(room)
+        _WATCH_ROOMS[request.sid] = room
 
     @socketio.on("disconnect")
     def on_disconnect():
+        room = _WATCH_ROOMS.pop(request.sid, None)
+        if room is not None:
+            watch_sets.discard(room)
         current_app.logger.info("Client disconnected")
 
     return app
@@ -0,0 +1,101 @@
+"""Independent pandas reference for the panel feature engine.
+
+Shared by ``tests/test_features.py`` and ``scripts/bench_features.py``.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+from features import pipeline
+from features.indicators import GARCH_ALPHA, GARCH_BETA, TRADING_DAYS
+
+
+def _symbol_features(df: pd.DataFrame) -> pd.DataFrame:
+    """Compute the feature schema for one symbol with plain pandas.
+
+    Written independently of :mod:`features.indicators` so it can check the
+    panel engine: rolling windows use ``Series.rolling``, Wilder smoothing an
+    SMA-seeded ``ewm`` and the GARCH recursion a scalar loop.
+    """
+    df = df.dropna(subset=pipeline.PRICE_COLUMNS).sort_values("t")
+    df = df.reset_index(drop=True)
+    high, low, close = df["high"], df["low"], df["close"]
+    prev = close.shift(1)
+    tr = pd.concat([high - low, (high - prev).abs(), (low - prev).abs()], axis=1)
+    df["atr14"] = tr.max(axis=1).rolling(14).mean()
+    df["gap_pct"] = close / prev - 1
+    df["momentum"] = close / close.shift(5) - 1
+    df["sma20"] = close.rolling(20).mean()
+
+    change = close.diff()
+    averages = []
+    for move in (change.clip(lower=0), (-change).clip(lower=0)):
+        seeded = move.iloc[14:].copy()
+        if len(seeded):
+            seeded.iloc[0] = move.iloc[1:15].mean()
+        smoothed = seeded.ewm(alpha=1 / 14, adjust=False).mean()
+        averages.append(smoothed.reindex(df.index))
+    gain, loss = averages
+    rsi = 100 - 100 / (1 + gain / loss)
+    rsi[(loss == 0) & (gain > 0)] = 100.0
+    rsi[(loss == 0) & (gain == 0)] = 50.0
+    df["rsi14"] = rsi
+
+    returns = np.log(close / prev)
+    df["hv30"] = returns.rolling(30).std() * np.sqrt(TRADING_DAYS)
+    long_var = ((df["hv30"] / np.sqrt(TRADING_DAYS)) ** 2).tolist()
+    omega = 1 - GARCH_ALPHA - GARCH_BETA
+    var, h = [], np.nan
+    for lv, r in zip(long_var, returns.tolist()):
+        if np.isnan(h):
+            h = lv
+        else:
+            h = omega * lv + GARCH_ALPHA * r * r + GARCH_BETA * h
+        var.append(h)
+    df["garch_sigma"] = np.sqrt(np.array(var) * TRADING_DAYS)
+    df["garch_spike"] = (df["garch_sigma"] > df["hv30"]).astype(int)
+
+    df = df.dropna(subset=pipeline.BAR_FEATURES).reset_index(drop=True)
+    df["iv30"] = np.nan
+    df["iv_edge"] = df["uoa"] = df["news_sent"] = 0.0
+    df["target"] = (df["close"].shift(-1) > df["close"]).astype(int)
+    return df
+
+
+def loop_features(prices: pd.DataFrame) -> pd.DataFrame:
+    """Compute features one symbol at a time with a pandas reference.
+
+    Returns the :func:`~features.pipeline.compute_features_panel` layout, so
+    the two can be compared frame for frame.
+    """
+    frames = []
+    for sym, df in prices.groupby("symbol"):
+        feats = _symbol_features(df[pipeline.PRICE_COLUMNS].copy())
+        feats["symbol"] = sym
+        frames.append(feats)
+    columns = [
+        *pipeline.PRICE_COLUMNS,
+        *pipeline.BAR_FEATURES,
+        "garch_spike",
+        *pipeline.CONTEXT_FEATURES,
+        "target",
+        "symbol",
+    ]
+    return pd.concat(frames, ignore_index=True)[columns]
+
+
+def assert_same_features(left: pd.DataFrame, right: pd.DataFrame) -> None:
+    """Assert two feature frames match up to floating-point rounding.
+
+    Each symbol's first GARCH forecast equals its ``hv30``, so ``garch_spike``
+    is only compared on rows where the two are not tied.
+    """
+    pd.testing.assert_frame_equal(
+        left.drop(columns="garch_spike"), right.drop(columns="garch_spike")
+    )
+    clear = ~np.isclose(left["garch_sigma"], left["hv30"])
+    pd.testing.assert_series_equal(
+        left["garch_spike"][clear], right["garch_spike"][clear]
+    )
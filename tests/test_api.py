@@ -2,6 +2,7 @@
 
 import importlib
 import os
+from types import SimpleNamespace
 
 # Ensure API keys for module import
 os.environ.setdefault("POLYGON_API_KEY", "test")
@@ -43,17 +44,15 @@ def test_http_cache(monkeypatch):
 
         class Resp:
             status_code = 200
-
-            def json(self):
-                return {"ok": True}
+            content = b'{"ok": true}'
 
             def raise_for_status(self):
                 pass
 
         return Resp()
 
-    monkeypatch.setattr(api, "RATE_LIMIT_SEC", 0)
-    monkeypatch.setattr(api.requests, "get", fake_get)
+    monkeypatch.setattr(api.ratelimit, "acquire", lambda url: 0.0)
+    monkeypatch.setattr(api, "get_session", lambda: SimpleNamespace(get=fake_get))
 
     api.rate_limited_get("https://example.com", {"q": "a"})
     api.rate_limited_get("https://example.com", {"q": "a"})
@@ -81,3 +80,115 @@ def test_fetch_news(monkeypatch):
     api.fetch_news(conn, "AAPL")
     count = conn.execute("SELECT COUNT(*) FROM news").fetchone()[0]
     assert count == 1
+
+
+def test_insert_rows_single_transaction():
+    conn = db.init_db(":memory:")
+    statements = []
+    conn.set_trace_callback(statements.append)
+    bars = [{"t": i, "o": 1, "h": 2, "l": 0.5, "c": 1.5, "v": 10} for i in range(500)]
+    assert db.insert_rows(conn, "minute_bars", api.rows.bar_rows("AAPL", bars)) == 500
+    assert conn.execute("SELECT COUNT(*) FROM minute_bars").fetchone()[0] == 500
+    assert sum(s.startswith("BEGIN") for s in statements) == 1
+    assert sum(s == "COMMIT" for s in statements) == 1
+
+
+def test_fetch_option_chain_batch(monkeypatch):
+    importlib.reload(api)
+    conn = db.init_db(":memory:")
+
+    def fake_get(url, params=None):
+        return {
+            "results": [
+                {
+                    "details": {
+                        "ticker": f"O:AAPL{i}",
+                        "expiration_date": "2099-01-01",
+                    },
+                    "last_quote": {"bid": {"p": 1.0}, "ask": "n/a"},
+                    "greeks": {"delta": 0.5},
+                    "implied_volatility": 0.3,
+                }
+                for i in range(3)
+            ]
+        }
+
+    monkeypatch.setattr(api, "rate_limited_get", fake_get)
+    api.fetch_option_chain(conn, "AAPL")
+    rows = conn.execute("SELECT contract, bid, ask FROM option_chain").fetchall()
+    assert len(rows) == 3
+    assert rows[0][1:] == (1.0, None)
+
+
+def test_fetch_minute_bars_resumes_pages_and_skips_unchanged(monkeypatch):
+    importlib.reload(api)
+    conn = db.init_db(":memory:")
+    now = 1_700_000_000_000
+    bar = {"o": 1, "h": 2, "l": 0.5, "c": 1.5, "v": 10}
+    stored = [{"t": now - 180_000 + i * 60_000, **bar} for i in range(2)]
+    db.insert_rows(conn, "minute_bars", api.rows.bar_rows("AAPL", stored))
+    last = stored[-1]["t"]
+    db.set_fetch_mark(conn, "AAPL", "minute_bars", last)
+    calls = []
+
+    def fake_get(url, params=None):
+        calls.append(url)
+        if "cursor" in url:
+            return {"results": [{"t": last + 60_000, **bar}]}
+        return {
+            "results": [{**stored[-1], "c": 1.75}],
+            "next_url": "https://api.polygon.io/v2/aggs/ticker/AAPL/x?cursor=1",
+        }
+
+    monkeypatch.setattr(api, "rate_limited_get", fake_get)
+    monkeypatch.setattr(api.time, "time", lambda: now / 1000)
+    writes = []
+    insert = db.insert_rows
+    monkeypatch.setattr(
+        api.db, "insert_rows", lambda c, t, r: writes.append(r) or insert(c, t, r)
+    )
+
+    assert api.fetch_minute_bars(conn, "AAPL") == 2
+    assert calls[0].endswith(f"/range/1/minute/{last}/{now}")
+    assert len(calls) == 2
+    assert conn.execute("SELECT COUNT(*) FROM minute_bars").fetchone()[0] == 3
+    assert conn.execute(
+        "SELECT close FROM minute_bars WHERE t=?", (last,)
+    ).fetchone() == (1.75,)
+    assert db.fetch_mark(conn, "AAPL", "minute_bars") == last + 60_000
+
+    # Same data again: nothing changed, nothing rewritten
+    calls.clear()
+    monkeypatch.setattr(
+        api,
+        "rate_limited_get",
+        lambda url, params=None: {"results": [{**stored[-1], "c": 1.75}]},
+    )
+    monkeypatch.setattr(api.time, "time", lambda: (now + 120_000) / 1000)
+    assert api.fetch_minute_bars(conn, "AAPL") == 0
+    assert writes[-1] == []
+
+
+def test_minute_bars_window_skips_current_minute():
+    importlib.reload(api)
+    conn = db.init_db(":memory:")
+    now = 1_700_000_000_000
+    assert api.minute_bars_window(conn, "AAPL", now) == ("2023-11-13", "2023-11-14")
+    api.store_minute_bars(conn, "AAPL", [("AAPL", now - 30_000, 1, 1, 1, 1, 1)])
+    assert api.minute_bars_window(conn, "AAPL", now) is None
+    conn.execute("DELETE FROM fetch_state")
+    api.store_minute_bars(
+        conn, "AAPL", [("AAPL", now - 30 * api.DAY_MS, 1, 1, 1, 1, 1)]
+    )
+    start, end = api.minute_bars_window(conn, "AAPL", now)
+    assert (start, end) == (now - api.MINUTE_BARS_MAX_DAYS * api.DAY_MS, now)
+
+
+def test_minute_bars_window_ignores_other_writers():
+    importlib.reload(api)
+    conn = db.init_db(":memory:")
+    now = 1_700_000_000_000
+    api.store_minute_bars(conn, "AAPL", [("AAPL", now - 600_000, 1, 1, 1, 1, 1)])
+    # a newer row from another writer leaves a gap the next fetch must cover
+    db.insert_rows(conn, "minute_bars", [("AAPL", now - 30_000, 1, 1, 1, 1, 1)])
+    assert api.minute_bars_window(conn, "AAPL", now) == (now - 600_000, now)
@@ -1,6 +1,8 @@
 """Tests for async collector API."""
 
+import asyncio
 import importlib
+import json
 import os
 
 import pytest
@@ -24,8 +26,8 @@ class FakeResp:
     async def __aexit__(self, exc_type, exc, tb):
         pass
 
-    async def json(self):
-        return self.data
+    async def read(self):
+        return json.dumps(self.data).encode()
 
     def raise_for_status(self):
         pass
@@ -63,3 +65,145 @@ async def test_fetch_all(monkeypatch):
     )
 
     await api_async.fetch_all(conn, "AAPL")
+
+
+@pytest.mark.asyncio
+async def test_fetch_universe_bounded(monkeypatch):
+    importlib.reload(api_async)
+    conn = db.init_db(":memory:")
+    sessions = []
+
+    class FakeClient:
+        def __init__(self, *a, **kw):
+            sessions.append(self)
+
+        async def __aenter__(self):
+            return FakeSession()
+
+        async def __aexit__(self, exc_type, exc, tb):
+            pass
+
+    monkeypatch.setattr(
+        api_async, "aiohttp", type("A", (), {"ClientSession": FakeClient})
+    )
+
+    in_flight = 0
+    peak = 0
+    seen = []
+
+    async def fake_symbol(session, conn, symbol, aggregator=None):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        seen.append(symbol)
+        if symbol == "BAD":
+            raise RuntimeError("boom")
+
+    monkeypatch.setattr(api_async, "fetch_symbol", fake_symbol)
+    symbols = ["AAPL", "MSFT", "BAD", "NVDA", "AMZN"]
+    errors = await api_async.fetch_universe(conn, symbols, concurrency=2)
+
+    assert len(sessions) == 1
+    assert peak == 2
+    assert sorted(seen) == sorted(symbols)
+    assert list(errors) == ["BAD"]
+
+
+@pytest.mark.asyncio
+async def test_fetch_symbol_covers_all_endpoints(monkeypatch):
+    importlib.reload(api_async)
+    conn = db.init_db(":memory:")
+    urls = []
+
+    class RecordingSession(FakeSession):
+        def get(self, url, params=None):
+            urls.append(url)
+            return FakeResp({})
+
+    api_async.cache.get_cache().clear()
+    await api_async.fetch_symbol(RecordingSession(), conn, "AAPL")
+    paths = " ".join(urls)
+    for part in [
+        "/range/1/day/",
+        "/range/1/minute/",
+        "/v3/snapshot",
+        "/v3/snapshot/options/",
+        "/reference/financials",
+        "/reference/splits",
+        "/indicators/sma/",
+        "newsapi.org",
+    ]:
+        assert part in paths
+
+
+@pytest.mark.asyncio
+async def test_fetch_symbol_waits_for_every_endpoint_before_raising(monkeypatch):
+    importlib.reload(api_async)
+    done = []
+
+    async def fail(session, conn, symbol, **kw):
+        raise RuntimeError("boom")
+
+    async def slow(session, conn, symbol, **kw):
+        await asyncio.sleep(0.01)
+        done.append(symbol)
+
+    for name in [
+        "fetch_ohlcv",
+        "fetch_minute_bars",
+        "fetch_realtime_quote",
+        "fetch_option_chain",
+        "fetch_fundamentals",
+        "fetch_corporate_actions",
+        "fetch_indicator_sma",
+    ]:
+        monkeypatch.setattr(api_async, name, slow)
+    monkeypatch.setattr(api_async, "fetch_news", fail)
+
+    with pytest.raises(RuntimeError, match="boom"):
+        await api_async.fetch_symbol(FakeSession(), None, "AAPL")
+    assert done == ["AAPL"] * 7
+
+
+@pytest.mark.asyncio
+async def test_fetch_news_writes_columns(monkeypatch):
+    importlib.reload(api_async)
+    conn = db.init_db(":memory:")
+    article = {
+        "publishedAt": "2025-07-30T00:00:00Z",
+        "title": "Foo rises",
+        "url": "https://example.com/foo",
+    }
+
+    class NewsSession(FakeSession):
+        def get(self, url, params=None):
+            return FakeResp({"articles": [article, article]})
+
+    await api_async.fetch_news(NewsSession(), conn, "AAPL")
+    rows = conn.execute("SELECT symbol, title, url, published_at FROM news").fetchall()
+    assert (
+        rows
+        == [("AAPL", "Foo rises", "https://example.com/foo", article["publishedAt"])]
+        * 2
+    )
+
+
+@pytest.mark.asyncio
+async def test_fetch_minute_bars_follows_next_url(monkeypatch):
+    importlib.reload(api_async)
+    conn = db.init_db(":memory:")
+    bar = {"o": 1, "h": 2, "l": 0.5, "c": 1.5, "v": 10}
+    pages = {
+        "first": {"results": [{"t": 1, **bar}], "next_url": "https://x/next"},
+        "https://x/next": {"results": [{"t": 2, **bar}]},
+    }
+
+    class PagedSession(FakeSession):
+        def get(self, url, params=None):
+            return FakeResp(pages.get(url, pages["first"]))
+
+    api_async.cache.get_cache().clear()
+    assert await api_async.fetch_minute_bars(PagedSession(), conn, "AAPL") == 2
+    assert await api_async.fetch_minute_bars(PagedSession(), conn, "AAPL") == 0
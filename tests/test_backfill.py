@@ -1,10 +1,15 @@
 """Tests for historical backfill utility."""
 
 import importlib
-from datetime import datetime
+import os
+from datetime import date, datetime, timedelta
+
+os.environ.setdefault("POLYGON_API_KEY", "test")
 
 from trading_platform.collector import api, backfill, db
 
+BAR = {"o": 1, "h": 1, "l": 1, "c": 1, "v": 20}
+
 
 def test_fetch_range_inserts(monkeypatch):
     importlib.reload(backfill)
@@ -25,3 +30,92 @@ def test_fetch_range_inserts(monkeypatch):
     count = backfill.fetch_range(conn, "AAPL", "2025-01-02", "2025-01-02")
     assert count == 1
     assert conn.execute("SELECT COUNT(*) FROM ohlcv").fetchone()[0] == 2
+
+
+def _day_ms(day):
+    return int(datetime.fromisoformat(day).timestamp() * 1000)
+
+
+def test_chunk_ranges_split_gaps_and_length():
+    days = backfill.trading_days(date(2025, 1, 1), date(2025, 1, 31))
+    missing = [d for d in days if d.day not in (10, 13)]
+    ranges = backfill.chunk_ranges(missing, days, chunk_days=7)
+    assert ranges[0] == (date(2025, 1, 2), date(2025, 1, 8))
+    assert (date(2025, 1, 14), date(2025, 1, 17)) in ranges
+    assert all((hi - lo).days < 7 for lo, hi in ranges)
+    assert sorted(d for lo, hi in ranges for d in missing if lo <= d <= hi) == missing
+
+
+def test_backfill_chunks_pages_and_resumes(monkeypatch, tmp_path):
+    conn = db.init_db(":memory:")
+    db.insert_rows(conn, "ohlcv", [("AAPL", _day_ms("2025-01-06"), 1, 1, 1, 1, 1)])
+    statements = []
+    conn.set_trace_callback(statements.append)
+    calls = []
+
+    def fake_get(url, params=None):
+        calls.append(url)
+        if "cursor" in url:
+            return {"results": [{"t": _day_ms("2025-01-03"), **BAR}]}
+        if url.endswith("/2025-01-02/2025-01-03"):
+            return {
+                "results": [{"t": _day_ms("2025-01-02"), **BAR}],
+                "next_url": url + "?cursor=1",
+            }
+        if "MSFT" in url and url.endswith("/2025-01-06/2025-01-07"):
+            raise RuntimeError("boom")
+        days = url.rsplit("/", 2)[1:]
+        return {"results": [{"t": _day_ms(d), **BAR} for d in days]}
+
+    monkeypatch.setattr(api, "rate_limited_get", fake_get)
+    ckpt = tmp_path / "ckpt.json"
+    counts = backfill.backfill(
+        conn,
+        ["AAPL", "MSFT"],
+        "2025-01-01",
+        "2025-01-08",
+        chunk_days=2,
+        concurrency=3,
+        checkpoint=ckpt,
+    )
+    # 01-02..03 arrive over two pages; MSFT's 01-06..07 chunk fails
+    assert counts == {"AAPL": 4, "MSFT": 3}
+    assert sum("EXCEPT" in s for s in statements) == 1
+    assert not any(s.startswith("SELECT 1 FROM ohlcv") for s in statements)
+    assert len(calls) == 7
+
+    calls.clear()
+    counts = backfill.backfill(
+        conn, ["AAPL", "MSFT"], "2025-01-01", "2025-01-08", checkpoint=ckpt
+    )
+    assert calls == [
+        "https://api.polygon.io/v2/aggs/ticker/MSFT/range/1/day/2025-01-06/2025-01-07"
+    ]
+
+
+def test_checkpoint_skips_truncated_and_recent_chunks(monkeypatch, tmp_path):
+    conn = db.init_db(":memory:")
+    today = date.today()
+    calls = []
+
+    def fake_get(url, params=None):
+        calls.append(url)
+        if "2025-01-0" in url:
+            return None  # 403 for a closed market
+        return {"results": []}
+
+    monkeypatch.setattr(api, "rate_limited_get", fake_get)
+    ckpt = tmp_path / "ckpt.json"
+    start = str(today - timedelta(days=10))
+    backfill.backfill(conn, ["AAPL"], "2025-01-02", "2025-01-08", checkpoint=ckpt)
+    backfill.backfill(conn, ["AAPL"], start, str(today), checkpoint=ckpt)
+    state = backfill.Checkpoint(ckpt)
+    assert not state.covers("AAPL", date(2025, 1, 2))
+    recent = backfill.trading_days(today - timedelta(days=10), today)
+    settled = [d for d in recent if d < today - timedelta(days=1)]
+    assert all(state.covers("AAPL", d) for d in settled)
+    assert not any(state.covers("AAPL", d) for d in recent if d not in settled)
+
+    calls.clear()
+    backfill.backfill(conn, ["AAPL"], "2025-01-02", "2025-01-08", checkpoint=ckpt)
+    assert len(calls) == 1
@@ -27,3 +27,34 @@ def test_backtest(tmp_path, days):
     )
     out_df = pd.read_csv(path)
     assert len(out_df) >= days
+
+
+def test_backtest_reads_one_symbol_of_a_store(tmp_path):
+    from features.store import write_features
+
+    dates = pd.date_range("2025-01-01", periods=40)
+    frames = [
+        pd.DataFrame(
+            {
+                "symbol": sym,
+                "t": dates,
+                "close": [base + i for i in range(40)],
+                "sma20": range(40),
+                "rsi14": range(40),
+                "target": [0, 1] * 20,
+            }
+        )
+        for sym, base in (("AAA", 0), ("OLD", 1000))
+    ]
+    store = tmp_path / "store"
+    write_features(store, pd.concat(frames))
+    res = train(str(store), model_dir=str(tmp_path / "models"), symbol="AAA")
+    pnl = tmp_path / "pnl.csv"
+    with pytest.raises(ValueError):
+        backtest.backtest(str(store), res.model_path, days=5, out_file=str(pnl))
+    path = backtest.backtest(
+        str(store), res.model_path, days=5, out_file=str(pnl), symbol="AAA"
+    )
+    out = pd.read_csv(path)
+    assert out["date"].tolist() == [f"2025-02-0{d}" for d in range(4, 9)]
+    assert set(out["symbol"]) == {"AAA"}
@@ -0,0 +1,126 @@
+import asyncio
+
+import pytest
+
+from trading_platform.collector import db
+from trading_platform.collector.bars import BarAggregator, BarRing, record_bars
+from trading_platform.collector.events import Trade
+
+T0 = 1_700_000_040_000  # minute boundary
+
+
+def test_ring_builds_ohlcv_and_wraps():
+    ring = BarRing(width=1_000, capacity=3)
+    assert ring.add(T0, 10.0, 1) == []
+    assert ring.add(T0 + 10, 12.0, 2) == []
+    assert ring.add(T0 + 20, 9.0, 3) == []
+    slot = ring.add(T0 + 1_500, 11.0, 4)
+    assert ring.row(slot[0]) == (T0, 10.0, 12.0, 9.0, 9.0, 6.0)
+    for i in range(2, 6):
+        ring.add(T0 + i * 1_000, float(i), 1)
+    df = ring.frame()
+    assert df["t"].tolist() == [T0 + 2_000, T0 + 3_000, T0 + 4_000, T0 + 5_000]
+    assert df["close"].tolist() == [2.0, 3.0, 4.0, 5.0]
+    assert len(ring.frame(include_open=False)) == 3
+
+
+def test_late_trade_amends_retained_bar():
+    ring = BarRing(width=1_000, capacity=4)
+    ring.add(T0, 10.0, 1)
+    ring.add(T0 + 600, 12.0, 1)
+    ring.add(T0 + 1_000, 11.0, 1)
+    (slot,) = ring.add(T0 + 500, 15.0, 2)
+    assert ring.row(slot) == (T0, 10.0, 15.0, 10.0, 12.0, 4.0)
+    ring.add(T0 + 900, 14.0, 1)
+    assert ring.row(slot) == (T0, 10.0, 15.0, 10.0, 14.0, 5.0)
+
+
+def test_backfilled_trades_insert_missing_bars():
+    ring = BarRing(width=1_000, capacity=3)
+    for dt in (0, 3_000, 4_000):
+        ring.add(T0 + dt, 10.0, 1)
+    (slot,) = ring.add(T0 + 1_000, 5.0, 1)
+    assert ring.add(T0 + 1_500, 6.0, 2) == [slot]
+    assert ring.row(slot) == (T0 + 1_000, 5.0, 6.0, 5.0, 6.0, 3.0)
+    assert ring.frame(include_open=False)["t"].tolist() == [T0, T0 + 1_000, T0 + 3_000]
+
+    # a full ring drops its oldest bar, and bars older than that are ignored
+    ring.add(T0 + 2_000, 7.0, 1)
+    assert ring.add(T0 + 500, 1.0, 1) == []
+    ring.add(T0 + 5_000, 8.0, 1)
+    df = ring.frame()
+    assert df["t"].tolist() == [T0 + 2_000, T0 + 3_000, T0 + 4_000, T0 + 5_000]
+    assert df["close"].tolist() == [7.0, 10.0, 10.0, 8.0]
+
+
+def test_aggregator_flushes_minute_bars_after_watermark():
+    conn = db.init_db(":memory:")
+    agg = BarAggregator(lateness_ms=1_000)
+    # the first bar began before the stream and is never written
+    agg.add(Trade("AAPL", 9.5, 1, T0 - 1))
+    agg.add(Trade("AAPL", 10.0, 5, T0))
+    agg.add(Trade("AAPL", 11.0, 5, T0 + 30_000))
+    agg.add(Trade("MSFT", 20.0, 1, T0 + 60_500))
+    agg.roll()
+    assert agg.flush(conn) == 0
+    agg.add(Trade("MSFT", 21.0, 1, T0 + 61_000))
+    agg.roll()
+    assert agg.flush(conn) == 1
+    rows = conn.execute("SELECT * FROM stream_minute_bars").fetchall()
+    assert rows == [("AAPL", T0, 10.0, 11.0, 10.0, 11.0, 10.0)]
+    assert agg.bars("AAPL", "1m")["t"].tolist() == [T0 - 60_000, T0]
+    assert agg.bars("AAPL", "5m")["volume"].tolist() == [11.0]
+    assert agg.bars("MSFT", "1s")["t"].tolist() == [T0 + 60_000, T0 + 61_000]
+
+    agg.add(Trade("AAPL", 9.0, 1, T0 + 59_000))
+    agg.flush(conn)
+    rows = conn.execute("SELECT * FROM stream_minute_bars").fetchall()
+    assert rows == [("AAPL", T0, 10.0, 11.0, 9.0, 9.0, 11.0)]
+    assert conn.execute("SELECT COUNT(*) FROM minute_bars").fetchone() == (0,)
+
+
+def test_repeated_trades_are_counted_once():
+    agg = BarAggregator(dedupe_ms=60_000)
+    trade = Trade("AAPL", 10.0, 100, T0)
+    agg.add(trade)
+    agg.add(Trade("AAPL", 11.0, 1, T0 + 1_000))
+    agg.add(Trade("AAPL", 10.0, 100, T0))
+    assert agg.bars("AAPL", "1m")["volume"].tolist() == [101.0]
+
+    # once forgotten, the same print counts again
+    agg.add(Trade("AAPL", 12.0, 1, T0 + 120_000))
+    agg.add(trade)
+    assert agg.bars("AAPL", "1m")["volume"].tolist() == [201.0, 1.0]
+
+
+def test_unknown_interval_rejected():
+    with pytest.raises(ValueError):
+        BarAggregator(["2m"])
+
+
+@pytest.mark.asyncio
+async def test_record_bars_skips_partial_bars():
+    class Sub:
+        def __aiter__(self):
+            async def gen():
+                yield Trade("AAPL", 9.0, 1, T0 - 1)
+                yield Trade("AAPL", 10.0, 5, T0)
+                await asyncio.sleep(0)
+                yield {"status": "connected"}
+                yield Trade("AAPL", 12.0, 5, T0 + 1)
+                yield Trade("AAPL", 13.0, 5, T0 + 125_000)
+                # backfilled print of a minute the stream missed
+                yield Trade("AAPL", 11.0, 2, T0 + 60_000)
+
+            return gen()
+
+    conn = db.init_db(":memory:")
+    agg = await record_bars(Sub(), conn)
+    assert agg.pending() == 0
+    rows = conn.execute("SELECT * FROM stream_minute_bars").fetchall()
+    assert rows == [
+        ("AAPL", T0, 10.0, 12.0, 10.0, 12.0, 10.0),
+        ("AAPL", T0 + 60_000, 11.0, 11.0, 11.0, 11.0, 2.0),
+    ]
+    # the bar still open at the end is kept in memory only
+    assert agg.bars("AAPL")["t"].tolist()[-1] == T0 + 120_000
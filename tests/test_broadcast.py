@@ -0,0 +1,208 @@
+import asyncio
+import threading
+
+import pytest
+
+from trading_platform.collector.broadcast import (
+    MAX_WATCH_SYMBOLS,
+    QuoteBroadcaster,
+    RedisWatchSets,
+    WatchSets,
+    watch_room,
+)
+
+
+def _collect():
+    frames = []
+    return frames, lambda event, data, to=None: frames.append((event, data, to))
+
+
+def test_flush_conflates_latest_quote_per_symbol():
+    frames, emit = _collect()
+    b = QuoteBroadcaster(emit)
+    b.publish("AAPL", 1)
+    b.publish("MSFT", 2)
+    b.publish("AAPL", 3)
+    assert b.flush() == 1
+    assert frames == [
+        (
+            "overview_quotes",
+            [{"symbol": "AAPL", "p": 3}, {"symbol": "MSFT", "p": 2}],
+            "overview",
+        )
+    ]
+    assert b.flush() == 0
+
+
+def test_watch_rooms_get_one_frame_of_their_symbols():
+    frames, emit = _collect()
+    sets = WatchSets()
+    b = QuoteBroadcaster(emit, default_room=None, watch_sets=sets)
+    room = sets.add(["MSFT", "AAPL"])
+    assert sets.add(["AAPL", "MSFT", "AAPL"]) == room == "watch:AAPL,MSFT"
+    sets.add(["NVDA"])
+    b.publish("AAPL", 1)
+    b.publish("TSLA", 5)
+    b.publish("MSFT", 2)
+    b.publish("AAPL", 3)
+    assert b.flush() == 1
+    assert frames == [
+        (
+            "overview_quotes",
+            [{"symbol": "AAPL", "p": 3}, {"symbol": "MSFT", "p": 2}],
+            room,
+        )
+    ]
+    sets.discard(room)
+    assert sorted(sets.rooms()) == [room, watch_room(["NVDA"])]
+    sets.discard(room)
+    assert sets.rooms() == [watch_room(["NVDA"])]
+
+
+def test_redis_watch_sets_count_clients_per_room():
+    class FakeRedis:
+        def __init__(self):
+            self.hashes = {}
+
+        def hincrby(self, key, field, amount):
+            h = self.hashes.setdefault(key, {})
+            h[field] = h.get(field, 0) + amount
+            return h[field]
+
+        def hdel(self, key, field):
+            self.hashes[key].pop(field, None)
+
+        def hkeys(self, key):
+            return [f.encode() for f in self.hashes.get(key, {})]
+
+    sets = RedisWatchSets(FakeRedis())
+    room = sets.add(["AAPL"])
+    sets.add(["AAPL"])
+    sets.discard(room)
+    assert sets.rooms() == ["watch:AAPL"]
+    sets.discard(room)
+    assert sets.rooms() == []
+
+
+def test_publish_is_safe_against_a_concurrent_flush():
+    frames, emit = _collect()
+    b = QuoteBroadcaster(emit)
+    symbols = [f"S{i}" for i in range(200)]
+
+    def producer():
+        for _ in range(50):
+            for sym in symbols:
+                b.publish(sym, 1)
+
+    threads = [threading.Thread(target=producer) for _ in range(4)]
+    for t in threads:
+        t.start()
+    while any(t.is_alive() for t in threads):
+        b.flush()
+    b.flush()
+    assert {q["symbol"] for _, batch, _ in frames for q in batch} == set(symbols)
+
+
+@pytest.mark.asyncio
+async def test_run_flushes_each_interval_and_on_cancel():
+    frames, emit = _collect()
+    b = QuoteBroadcaster(emit, interval_ms=10)
+    task = asyncio.ensure_future(b.run())
+    b.publish("AAPL", 1)
+    await asyncio.sleep(0.05)
+    assert len(frames) == 1
+    b.publish("AAPL", 2)
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+    assert frames[-1][1] == [{"symbol": "AAPL", "p": 2}]
+
+
+def test_thread_flush_stop_drains_pending():
+    frames, emit = _collect()
+    b = QuoteBroadcaster(emit, interval_ms=60000)
+    b.start()
+    b.publish("AAPL", 1)
+    b.stop()
+    assert frames == [("overview_quotes", [{"symbol": "AAPL", "p": 1}], "overview")]
+
+
+def _quotes(client):
+    return [
+        m["args"][0] for m in client.get_received() if m["name"] == "overview_quotes"
+    ]
+
+
+def test_webapp_clients_get_their_watchlist(monkeypatch, tmp_path):
+    from trading_platform import webapp
+
+    env = tmp_path / ".env"
+    env.write_text("POLYGON_API_KEY=abc\n")
+    app = webapp.create_app(env_path=env)
+    monkeypatch.setattr(
+        webapp,
+        "quote_broadcaster",
+        QuoteBroadcaster(webapp.socketio.emit, watch_sets=webapp.watch_sets),
+    )
+    webapp.quote_broadcaster.start()
+    watcher = webapp.socketio.test_client(app)
+    viewer = webapp.socketio.test_client(app)
+    watcher.emit("watch", {"symbols": ["aapl", " nvda "]})
+
+    webapp.quote_broadcaster.publish("AAPL", 1)
+    webapp.quote_broadcaster.publish("MSFT", 2)
+    webapp.quote_broadcaster.publish("NVDA", 3)
+    webapp.quote_broadcaster.stop()
+
+    assert _quotes(watcher) == [
+        [{"symbol": "AAPL", "p": 1}, {"symbol": "NVDA", "p": 3}]
+    ]
+    assert _quotes(viewer) == [
+        [
+            {"symbol": "AAPL", "p": 1},
+            {"symbol": "MSFT", "p": 2},
+            {"symbol": "NVDA", "p": 3},
+        ]
+    ]
+
+    watcher.emit("watch", {"symbols": []})
+    webapp.socketio.emit("overview_quotes", [{"symbol": "MSFT", "p": 3}], to="overview")
+    assert _quotes(watcher) == [[{"symbol": "MSFT", "p": 3}]]
+    watcher.disconnect()
+    viewer.disconnect()
+    assert webapp._WATCH_ROOMS == {}
+    assert webapp.watch_sets.rooms() == []
+
+
+def test_webapp_watch_ignores_bad_items_and_caps_the_list(tmp_path):
+    from trading_platform import webapp
+
+    env = tmp_path / ".env"
+    env.write_text("POLYGON_API_KEY=abc\n")
+    app = webapp.create_app(env_path=env)
+    client = webapp.socketio.test_client(app)
+    client.emit("watch", {"symbols": ["aapl", 5, None, {"s": 1}, "a,b", " ", "AAPL"]})
+    assert webapp.watch_sets.rooms() == ["watch:AAPL"]
+    client.emit("watch", {"symbols": [f"S{i}" for i in range(200)]})
+    (room,) = webapp.watch_sets.rooms()
+    assert len(room.split(",")) == MAX_WATCH_SYMBOLS
+    client.emit("watch", {"symbols": "AAPL"})
+    client.emit("watch", ["AAPL"])
+    assert webapp.watch_sets.rooms() == []
+    client.disconnect()
+
+
+def test_webapp_watchers_get_quotes_from_another_process(tmp_path):
+    from trading_platform import webapp
+
+    env = tmp_path / ".env"
+    env.write_text("POLYGON_API_KEY=abc\n")
+    app = webapp.create_app(env_path=env)
+    watcher = webapp.socketio.test_client(app)
+    watcher.emit("watch", {"symbols": ["AAPL"]})
+    # frames published by stream-hub through the message queue
+    remote = QuoteBroadcaster(webapp.socketio.emit, watch_sets=webapp.watch_sets)
+    remote.publish("AAPL", 1)
+    remote.publish("MSFT", 2)
+    remote.flush()
+    assert _quotes(watcher) == [[{"symbol": "AAPL", "p": 1}]]
+    watcher.disconnect()
@@ -0,0 +1,57 @@
+"""Tests for the shared HTTP response cache."""
+
+from trading_platform.collector import cache
+
+
+def test_lru_evicts_oldest():
+    c = cache.ResponseCache(max_entries=2, max_bytes=1_000_000)
+    c.set("a", {"v": 1}, ttl=60)
+    c.set("b", {"v": 2}, ttl=60)
+    assert c.get("a") == {"v": 1}
+    c.set("c", {"v": 3}, ttl=60)
+    assert c.get("b") is None
+    assert c.get("a") == {"v": 1}
+    assert len(c) == 2
+
+
+def test_max_bytes_bound():
+    c = cache.ResponseCache(max_entries=100, max_bytes=30)
+    c.set("a", {"v": "x" * 10}, ttl=60)
+    c.set("b", {"v": "y" * 10}, ttl=60)
+    assert c.get("a") is None
+    assert c.get("b") is not None
+    assert c.nbytes <= 30
+
+
+def test_expired_entries_are_misses(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, "time", lambda: now[0])
+    c = cache.ResponseCache()
+    c.set("a", {"v": 1}, ttl=5)
+    assert c.get("a") == {"v": 1}
+    now[0] += 6
+    assert c.get("a") is None
+
+
+def test_hits_are_copies():
+    c = cache.ResponseCache()
+    c.set("a", {"results": [1]}, ttl=60)
+    c.get("a")["results"].append(2)
+    assert c.get("a") == {"results": [1]}
+
+
+def test_disk_backend_survives_restart(tmp_path):
+    path = tmp_path / "http_cache.db"
+    cache.ResponseCache(path=path).set("a", {"v": 1}, ttl=60)
+    assert cache.ResponseCache(path=path).get("a") == {"v": 1}
+
+
+def test_ttl_for_and_key_strip_secrets():
+    url = "https://api.polygon.io/vX/reference/financials"
+    assert cache.ttl_for(url, 60) == 86400
+    assert cache.ttl_for("https://api.polygon.io/v3/snapshot/options/AAPL", 60) == 5
+    assert cache.ttl_for("https://api.polygon.io/v2/aggs/ticker/AAPL", 7) == 7
+    # CACHE_TTL=0 turns the endpoint TTLs off too
+    assert cache.ttl_for(url) == 0
+    key = cache.cache_key("https://x", {"apiKey": "secret", "q": "a"})
+    assert "secret" not in key
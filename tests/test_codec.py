@@ -0,0 +1,31 @@
+import json
+
+import pytest
+
+from trading_platform.collector import codec
+
+
+@pytest.fixture
+def restore_backend():
+    backend = codec.BACKEND
+    yield
+    codec.use(backend)
+
+
+@pytest.mark.parametrize("name", ["json", "orjson"])
+def test_decode_events(name, restore_backend):
+    if name == "orjson":
+        pytest.importorskip("orjson")
+    assert codec.use(name) == name
+    msg = json.dumps([{"ev": "T", "sym": "AAPL", "p": 1.5}])
+    assert codec.decode_events(msg) == [{"ev": "T", "sym": "AAPL", "p": 1.5}]
+    assert codec.decode_events(msg.encode()) == [{"ev": "T", "sym": "AAPL", "p": 1.5}]
+    assert codec.decode_events('{"status": "ok"}') == [{"status": "ok"}]
+    assert codec.decode_events("not json") == []
+    assert codec.decode_events("3") == []
+    assert json.loads(codec.dumps({"a": [1, 2]})) == {"a": [1, 2]}
+
+
+def test_unknown_backend_falls_back(restore_backend):
+    assert codec.use("missing") == "json"
+    assert codec.loads(b"[1]") == [1]
@@ -1,4 +1,18 @@
-from trading_platform.db import bootstrap
+import os
+import sqlite3
+
+from trading_platform.collector.db import (
+    MIGRATIONS,
+    NEWS_SQL,
+    OVERVIEW_SQL,
+    fetch_mark,
+    init_db,
+    latest_quote,
+    migrate,
+    set_fetch_mark,
+)
+from trading_platform.config import Config
+from trading_platform.db import bootstrap, connect
 
 
 def test_bootstrap_creates_news_table(tmp_path):
@@ -8,3 +22,107 @@ def test_bootstrap_creates_news_table(tmp_path):
     cur.execute("SELECT COUNT(*) FROM news")
     assert cur.fetchone()[0] >= 0
     conn.close()
+
+
+def test_connect_applies_pragmas(tmp_path):
+    cfg = Config(sqlite_cache_kb=1024, sqlite_mmap_mb=8, sqlite_busy_timeout_ms=1234)
+    conn = connect(tmp_path / "tuned.db", cfg)
+
+    def pragma(name):
+        return conn.execute(f"PRAGMA {name}").fetchone()[0]
+
+    assert pragma("journal_mode") == "wal"
+    assert pragma("synchronous") == 1  # NORMAL
+    assert pragma("cache_size") == -1024
+    assert pragma("mmap_size") == 8 * 1024 * 1024
+    assert pragma("temp_store") == 2  # MEMORY
+    assert pragma("busy_timeout") == 1234
+    conn.close()
+
+
+def test_connect_reads_sqlite_env_without_loading_dotenv(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / ".env").write_text("SQLITE_MMAP_MB=1\nDOTENV_PROBE=1\n")
+    monkeypatch.delenv("DOTENV_PROBE", raising=False)
+    monkeypatch.delenv("SQLITE_MMAP_MB", raising=False)
+    for kb in (1024, 2048):
+        monkeypatch.setenv("SQLITE_CACHE_KB", str(kb))
+        conn = connect(tmp_path / "env.db")
+        assert conn.execute("PRAGMA cache_size").fetchone()[0] == -kb
+        assert conn.execute("PRAGMA mmap_size").fetchone()[0] == 256 * 1024 * 1024
+        conn.close()
+    assert "DOTENV_PROBE" not in os.environ
+
+
+def test_init_db_uses_profile(tmp_path):
+    conn = init_db(str(tmp_path / "collector.db"), Config())
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    conn.close()
+
+
+def test_migrations_create_covering_indexes():
+    conn = init_db(":memory:")
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == len(MIGRATIONS)
+    assert migrate(conn) == len(MIGRATIONS)
+    plan = " ".join(row[-1] for row in conn.execute("EXPLAIN QUERY PLAN " + NEWS_SQL))
+    assert "COVERING INDEX idx_news_published" in plan
+    plan = " ".join(
+        row[-1]
+        for row in conn.execute(
+            "EXPLAIN QUERY PLAN " + OVERVIEW_SQL.format("?"), ("AAPL",)
+        )
+    )
+    assert "idx_ohlcv_t" in plan
+
+
+def test_fetch_state_is_seeded_and_only_moves_forward():
+    conn = init_db(":memory:")
+    # a schema 3 database whose bars predate the watermarks
+    conn.execute("PRAGMA user_version=3")
+    conn.executemany(
+        "INSERT INTO minute_bars(symbol, t) VALUES (?, ?)",
+        [("AAPL", 60_000), ("AAPL", 120_000), ("MSFT", 60_000)],
+    )
+    conn.commit()
+    migrate(conn)
+    assert fetch_mark(conn, "AAPL", "minute_bars") == 120_000
+    assert fetch_mark(conn, "MSFT", "minute_bars") == 60_000
+    set_fetch_mark(conn, "AAPL", "minute_bars", 60_000)
+    assert fetch_mark(conn, "AAPL", "minute_bars") == 120_000
+    set_fetch_mark(conn, "AAPL", "minute_bars", 180_000)
+    assert fetch_mark(conn, "AAPL", "minute_bars") == 180_000
+    assert fetch_mark(conn, "AAPL", "ohlcv") is None
+
+
+def test_tick_store_keeps_same_millisecond_ticks():
+    conn = init_db(":memory:")
+    conn.executemany(
+        "INSERT OR REPLACE INTO realtime_quotes VALUES (?,?,?)",
+        [("AAPL", 1, 100.0), ("MSFT", 1, 200.0), ("AAPL", 3, 101.0)],
+    )
+    conn.execute(
+        "INSERT OR REPLACE INTO realtime_quotes VALUES (?,?,?)", ("AAPL", 2, 99.0)
+    )
+    conn.commit()
+    assert conn.execute("SELECT COUNT(*) FROM realtime_quotes").fetchone()[0] == 4
+    assert latest_quote(conn, "AAPL") == (3, 101.0)
+    assert latest_quote(conn, "MSFT") == (1, 200.0)
+    assert latest_quote(conn, "NVDA") is None
+
+
+def test_migration_moves_legacy_quotes(tmp_path):
+    path = str(tmp_path / "legacy.db")
+    legacy = sqlite3.connect(path)
+    legacy.execute(
+        "CREATE TABLE realtime_quotes (symbol TEXT, t INTEGER PRIMARY KEY, price REAL)"
+    )
+    legacy.executemany(
+        "INSERT INTO realtime_quotes VALUES (?,?,?)",
+        [("AAPL", 1, 1.0), ("AAPL", 2, 2.0), ("MSFT", 3, 3.0)],
+    )
+    legacy.commit()
+    legacy.close()
+    conn = init_db(path)
+    rows = conn.execute("SELECT * FROM realtime_quotes ORDER BY t").fetchall()
+    assert rows == [("AAPL", 1, 1.0), ("AAPL", 2, 2.0), ("MSFT", 3, 3.0)]
+    assert latest_quote(conn, "AAPL") == (2, 2.0)
@@ -5,19 +5,20 @@ os.environ.setdefault("POLYGON_API_KEY", "x")
 os.environ.setdefault("NEWS_API_KEY", "x")
 
 from trading_platform.collector import delayed_stream
+from trading_platform.collector.broadcast import QuoteBroadcaster
 
 
 class DummySocket:
     def __init__(self):
         self.emitted = []
 
-    def emit(self, event, data):
-        self.emitted.append((event, data))
+    def emit(self, event, data, to=None):
+        self.emitted.append((event, data, to))
 
 
 def test_stream_overview(monkeypatch):
     sock = DummySocket()
-    monkeypatch.setattr(delayed_stream, "socketio", sock)
+    broadcaster = QuoteBroadcaster(sock.emit, interval_ms=60000)
 
     def ws_app(url, on_open=None, on_message=None, on_error=None, on_close=None):
         class WS:
@@ -28,7 +29,11 @@ def test_stream_overview(monkeypatch):
                 if on_open:
                     on_open(self_inner)
                 msg = json.dumps(
-                    [{"status": "auth_success"}, {"ev": "Q", "sym": "AAPL", "p": 100}]
+                    [
+                        {"status": "auth_success"},
+                        {"ev": "Q", "sym": "AAPL", "p": 99},
+                        {"ev": "Q", "sym": "AAPL", "p": 100},
+                    ]
                 )
                 if on_message:
                     on_message(self_inner, msg)
@@ -36,5 +41,7 @@ def test_stream_overview(monkeypatch):
         return WS()
 
     monkeypatch.setattr(delayed_stream.websocket, "WebSocketApp", ws_app)
-    delayed_stream.stream_overview("AAPL")
-    assert ("overview_quote", {"symbol": "AAPL", "p": 100}) in sock.emitted
+    delayed_stream.stream_overview("AAPL", broadcaster)
+    assert sock.emitted == [
+        ("overview_quotes", [{"symbol": "AAPL", "p": 100}], "overview"),
+    ]
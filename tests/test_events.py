@@ -0,0 +1,52 @@
+import json
+
+import pytest
+
+from trading_platform.collector import alerts, events
+
+
+def test_decode_typed_events():
+    msg = json.dumps(
+        [
+            {"status": "auth_success"},
+            {"ev": "T", "sym": "AAPL", "p": 101.5, "s": 200, "t": 5},
+            {"ev": "Q", "sym": "MSFT", "bp": 10, "bs": 1, "ap": 11, "as": 2, "t": 6},
+        ]
+    )
+    status, trade, quote = events.decode(msg)
+    assert status == {"status": "auth_success"}
+    assert trade == events.Trade("AAPL", 101.5, 200, 5)
+    assert quote == events.Quote("MSFT", 10, 1, 11, 2, 6)
+    assert quote.price == 10
+    assert events.Quote("MSFT", 0, 0, 11, 2, 6).price == 11
+
+
+def test_decode_ignores_extra_fields():
+    msg = json.dumps(
+        [{"ev": "T", "sym": "AAPL", "p": 1.5, "s": 10, "t": 3, "x": 4, "c": [12]}]
+    )
+    assert events.decode(msg) == [events.Trade("AAPL", 1.5, 10, 3)]
+    assert events.decode(msg.encode())[0].price == 1.5
+    assert events.decode("not json") == []
+
+
+def test_missing_fields_default_to_zero():
+    trade = events.from_event({"ev": "T", "symbol": "AAPL", "size": 5})
+    assert trade == events.Trade("AAPL", 0.0, 5, 0)
+
+
+def test_events_are_slotted():
+    trade = events.Trade("AAPL", 1.0, 1, 1)
+    assert not hasattr(trade, "__dict__")
+    with pytest.raises(AttributeError):
+        trade.extra = 1
+
+
+def test_add_trade_accepts_struct():
+    agg = alerts.AlertAggregator(webhook_url=None)
+    agg.add_trade(events.Trade("AAPL", 1.0, 15000, 1))
+    agg.add_trade("MSFT", 20000)
+    assert agg._messages == [
+        "Large trade AAPL size 15000",
+        "Large trade MSFT size 20000",
+    ]
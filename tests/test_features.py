@@ -1,6 +1,9 @@
+from pathlib import Path
+
 import pandas as pd
 
 from features import load_pipeline
+from features.store import read_features
 
 
 def test_load_pipeline_callable():
@@ -12,16 +15,256 @@ def test_run_pipeline(monkeypatch, tmp_path):
     monkeypatch.setenv("NEWS_API_KEY", "y")
     from features import pipeline
 
+    today = pd.Timestamp.now(tz="UTC").normalize()
+    stamps = [(today - pd.Timedelta(days=i)).value // 1_000_000 for i in range(80)]
+
     def fake_get(url, params=None):
         return {
             "results": [
-                {"t": 0, "o": 1, "h": 1, "l": 1, "c": 1},
-                {"t": 86400000, "o": 2, "h": 2, "l": 2, "c": 2},
+                {"t": t, "o": 1 + i % 3, "h": 4, "l": 0.5, "c": 2 + i % 2}
+                for i, t in enumerate(sorted(stamps))
             ]
         }
 
     monkeypatch.setattr(pipeline.api, "rate_limited_get", fake_get)
     cfg = type("C", (), {"reports_dir": tmp_path})
-    out = pipeline.run_pipeline(cfg, ["AAPL"], since="1d")
-    df = pd.read_csv(out)
+    out = pipeline.run_pipeline(cfg, ["AAPL"], since="20d")
+    df = read_features(out)
     assert set(["atr14", "gap_pct", "momentum", "target"]).issubset(df.columns)
+    assert pd.api.types.is_datetime64_any_dtype(df["t"]) and len(df) >= 20
+    assert (df["t"] >= today.tz_localize(None) - pd.Timedelta("20d")).all()
+
+
+def _bar(t, c):
+    return {"t": t, "o": c, "h": c + 1, "l": c - 1, "c": c, "v": 100}
+
+
+def test_from_db_reads_all_symbols_in_one_query():
+    from features import pipeline
+    from trading_platform.collector import db
+
+    conn = db.init_db(":memory:")
+    day = 86_400_000
+    base = int(pd.Timestamp("2025-01-02", tz="America/New_York").value // 1_000_000)
+    rows = [
+        (sym, base + i * day, 1, 2, 0.5, 1.5 + i, 10)
+        for sym in ("AAPL", "MSFT", "NVDA")
+        for i in range(3)
+    ]
+    db.insert_rows(conn, "ohlcv", rows)
+    statements = []
+    conn.set_trace_callback(statements.append)
+    df = pipeline.from_db(conn, ["MSFT", "AAPL"], "2025-01-03", "2025-01-04")
+    assert len([s for s in statements if "FROM ohlcv" in s]) == 1
+    assert df["symbol"].tolist() == ["AAPL", "AAPL", "MSFT", "MSFT"]
+    assert df["t"].tolist() == ["2025-01-03", "2025-01-04"] * 2
+    assert list(df.columns) == [
+        "symbol",
+        "t",
+        "open",
+        "high",
+        "low",
+        "close",
+        "volume",
+    ]
+
+
+def test_run_pipeline_uses_db_and_fetches_only_gaps(monkeypatch, tmp_path):
+    monkeypatch.setenv("POLYGON_API_KEY", "x")
+    from features import pipeline
+    from trading_platform.collector import db
+
+    db_file = tmp_path / "market.db"
+    conn = db.init_db(str(db_file))
+    days = pipeline.backfill.trading_days(
+        (
+            pd.Timestamp.now(tz="UTC")
+            - pd.Timedelta("40d")
+            - pd.Timedelta(pipeline.WARMUP)
+        ).date(),
+        (pd.Timestamp.now(tz="UTC") - pd.Timedelta("1d")).date(),
+    )
+    stamp = [
+        int(pd.Timestamp(d, tz="America/New_York").value // 1_000_000) for d in days
+    ]
+    db.insert_rows(
+        conn,
+        "ohlcv",
+        [("AAPL", t, i, i + 1, i - 1, i, 1) for i, t in enumerate(stamp, 1)]
+        + [("MSFT", t, i, i + 1, i - 1, i, 1) for i, t in enumerate(stamp[:-3], 1)],
+    )
+    conn.close()
+    calls = []
+
+    def fake_get(url, params=None):
+        calls.append(url)
+        return {"results": [_bar(t, 50) for t in stamp[-3:]]}
+
+    monkeypatch.setattr(pipeline.api, "rate_limited_get", fake_get)
+    cfg = type("C", (), {"reports_dir": tmp_path, "db_file": str(db_file)})
+    out = pipeline.run_pipeline(cfg, ["AAPL", "MSFT"], since="40d")
+
+    assert len(calls) == 1 and "/MSFT/" in calls[0]
+    df = read_features(out)
+    assert set(df["symbol"]) == {"AAPL", "MSFT"}
+    assert (df.loc[df["symbol"] == "MSFT", "close"].tail(3) == 50).all()
+
+
+def test_load_prices_does_not_request_empty_days_again(monkeypatch, tmp_path):
+    monkeypatch.setenv("POLYGON_API_KEY", "x")
+    from features import pipeline
+
+    today = pd.Timestamp.now(tz="UTC").date()
+    days = pipeline.backfill.trading_days(today - pd.Timedelta(days=30), today)
+    _seed(tmp_path / "market.db", days[:5] + days[-3:], range(8))
+    calls = []
+
+    def fake_get(url, params=None):
+        calls.append(url)
+        return {"results": []}  # halted: no bars for the gap
+
+    monkeypatch.setattr(pipeline.api, "rate_limited_get", fake_get)
+    cfg = type("C", (), {"db_file": str(tmp_path / "market.db")})
+    start, end = str(days[0]), str(today)
+    pipeline.load_prices(cfg, ["AAPL"], start, end)
+    assert len(calls) == 1
+    assert (tmp_path / "market.backfill.json").exists()
+    calls.clear()
+    pipeline.load_prices(cfg, ["AAPL"], start, end)
+    assert calls == []
+
+
+def _seed(db_file, days, closes):
+    from trading_platform.collector import db
+
+    conn = db.init_db(str(db_file))
+    db.insert_rows(
+        conn,
+        "ohlcv",
+        [
+            ("AAPL", int(pd.Timestamp(d, tz="America/New_York").value // 1_000_000))
+            + (c, c + 1, c - 1, c, 1)
+            for d, c in zip(days, closes)
+        ],
+    )
+    conn.close()
+
+
+def test_incremental_run_merges_only_new_rows(monkeypatch, tmp_path):
+    monkeypatch.setenv("REPORTS_DIR", str(tmp_path))
+    from features import pipeline
+
+    days = pipeline.backfill.trading_days(
+        (pd.Timestamp.now(tz="UTC") - pd.Timedelta("60d")).date(),
+        (pd.Timestamp.now(tz="UTC") - pd.Timedelta("1d")).date(),
+    )
+    closes = [10 + (i * 7) % 5 + i * 0.1 for i in range(len(days))]
+    db_file = tmp_path / "market.db"
+    _seed(db_file, days[:-2], closes[:-2])
+    monkeypatch.setattr(pipeline.backfill, "backfill", lambda *a, **k: {})
+    cfg = type(
+        "C",
+        (),
+        {
+            "reports_dir": tmp_path,
+            "db_file": str(db_file),
+            "incremental_features": True,
+        },
+    )
+    out = pipeline.run_pipeline(cfg, ["AAPL"], since="60d")
+    first = len(read_features(out))
+    assert (Path(out) / pipeline.STATE_FILE).exists()
+
+    # Unchanged bars add nothing; two new bars replace the old newest row
+    pipeline.run_pipeline(cfg, ["AAPL"], since="60d")
+    assert len(read_features(out)) == first
+    _seed(db_file, days[-2:], closes[-2:])
+    loaded = []
+    load_prices = pipeline.load_prices
+
+    def spy(cfg, symbols, start, end):
+        df = load_prices(cfg, symbols, start, end)
+        loaded.append(len(df))
+        return df
+
+    monkeypatch.setattr(pipeline, "load_prices", spy)
+    pipeline.run_pipeline(cfg, ["AAPL"], since="60d")
+    assert loaded == [3]
+    incremental = read_features(out)
+    assert len(incremental) == first + 2
+    assert incremental["target"].iloc[-3] == int(closes[-2] > closes[-3])
+
+    cfg.incremental_features = False
+    full = read_features(pipeline.run_pipeline(cfg, ["AAPL"], since="60d"))
+    pd.testing.assert_frame_equal(incremental, full)
+    assert not (Path(out) / pipeline.STATE_FILE).exists()
+
+
+def test_compute_features_panel_matches_per_symbol_loop():
+    import numpy as np
+    from _reference import assert_same_features, loop_features
+
+    from features import pipeline
+
+    rng = np.random.default_rng(0)
+    frames = []
+    for sym, n in (("MSFT", 60), ("AAPL", 45), ("TINY", 20)):
+        close = 100 + rng.normal(size=n).cumsum()
+        frames.append(
+            pd.DataFrame(
+                {
+                    "symbol": sym,
+                    "t": pd.date_range("2025-01-01", periods=n).astype(str),
+                    "open": close + rng.normal(size=n),
+                    "high": close + 2,
+                    "low": close - 2,
+                    "close": close,
+                }
+            ).sample(frac=1, random_state=1)
+        )
+    prices = pd.concat(frames, ignore_index=True)
+    prices.loc[3, "close"] = np.nan
+
+    # independent per-symbol pandas implementation
+    expected = loop_features(prices)
+
+    panel = pipeline.compute_features_panel(prices)
+    assert set(panel["symbol"]) == {"AAPL", "MSFT"}
+    assert_same_features(panel, expected)
+    single = pipeline.compute_features(prices[prices["symbol"] == "AAPL"])
+    assert_same_features(
+        single, expected[expected["symbol"] == "AAPL"].drop(columns="symbol")
+    )
+
+
+def test_panel_schema_and_context_columns():
+    import numpy as np
+
+    from features import pipeline
+
+    n = 45
+    close = 100 + np.sin(np.arange(n))
+    prices = pd.DataFrame(
+        {
+            "symbol": "AAPL",
+            "t": pd.bdate_range("2025-01-02", periods=n).strftime("%Y-%m-%d"),
+            "open": close,
+            "high": close + 1,
+            "low": close - 1,
+            "close": close,
+        }
+    )
+    last = prices["t"].iloc[-1]
+    context = pd.DataFrame(
+        {"symbol": ["AAPL"], "t": [last], "iv30": [0.5], "uoa": [2.0]}
+    )
+    timings = {}
+    df = pipeline.compute_features_panel(prices, context, timings=timings)
+
+    assert len(df) == n - 30
+    for col in pipeline.BAR_FEATURES + pipeline.CONTEXT_FEATURES + ["garch_spike"]:
+        assert col in df.columns
+    assert set(pipeline.BAR_FEATURES) <= set(timings)
+    row = df.iloc[-1]
+    assert row["iv_edge"] == row["iv30"] - row["hv30"] and row["uoa"] == 2.0
+    assert (df["iv_edge"].iloc[:-1] == 0).all() and df["iv30"].iloc[:-1].isna().all()
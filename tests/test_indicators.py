@@ -0,0 +1,98 @@
+import numpy as np
+import pandas as pd
+
+from features import indicators
+
+
+def _walk(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return 100 + rng.normal(size=n).cumsum()
+
+
+def test_rolling_windows_match_pandas_per_row():
+    a, b = _walk(50), _walk(35, seed=1)
+    m = np.full((2, 50), np.nan)
+    m[0], m[1, :35] = a, b
+    for series, row in ((a, 0), (b, 1)):
+        s = pd.Series(series)
+        n = len(series)
+        np.testing.assert_allclose(
+            indicators.rolling_mean(m, 20)[row, :n], s.rolling(20).mean()
+        )
+        np.testing.assert_allclose(
+            indicators.rolling_std(m, 30)[row, :n], s.rolling(30).std(), rtol=1e-6
+        )
+
+
+def test_rsi_matches_wilder_loop_and_resumes_from_state():
+    close = _walk(60)
+    change = np.diff(close)
+    gain, loss = np.clip(change, 0, None), np.clip(-change, 0, None)
+    ag, al = gain[:14].mean(), loss[:14].mean()
+    expected = [100 - 100 / (1 + ag / al)]
+    for g, lo in zip(gain[14:], loss[14:]):
+        ag, al = (ag * 13 + g) / 14, (al * 13 + lo) / 14
+        expected.append(100 - 100 / (1 + ag / al))
+
+    value, avg_gain, avg_loss = indicators.rsi(close[None, :])
+    assert np.isnan(value[0, :14]).all()
+    np.testing.assert_allclose(value[0, 14:], expected)
+
+    k = 40
+    resumed, _, _ = indicators.rsi(
+        close[None, k - 20 :], init=(avg_gain[:, k], avg_loss[:, k]), start=20
+    )
+    np.testing.assert_allclose(resumed[0, 20:], value[0, k:])
+
+
+def test_garch_targets_realised_variance():
+    close = _walk(120)[None, :]
+    returns = indicators.log_returns(close)
+    hv = indicators.realized_vol(returns, 30)
+    long_var = (hv / np.sqrt(indicators.TRADING_DAYS)) ** 2
+    h = indicators.garch_variance(returns, long_var)
+    assert np.isnan(h[0, :30]).all()
+    assert h[0, 30] == long_var[0, 30]
+    step = (
+        0.05 * long_var[0, 31]
+        + indicators.GARCH_ALPHA * returns[0, 31] ** 2
+        + indicators.GARCH_BETA * h[0, 30]
+    )
+    assert np.isclose(h[0, 31], step)
+
+
+def test_headline_sentiment():
+    titles = pd.Series(["Shares surge on record profit", "Probe hits stock", None])
+    assert indicators.headline_sentiment(titles).tolist() == [1.0, -1.0, 0.0]
+
+
+def test_pipeline_context_from_option_chain_and_news():
+    from features import pipeline
+    from trading_platform.collector import db
+
+    conn = db.init_db(":memory:")
+    db.insert_rows(
+        conn,
+        "option_chain",
+        [
+            ("AAPL", "C1", "2025-01-20", 100, "call", 1, 1.1, 0.2, 0.5, 30, 100),
+            ("AAPL", "C2", "2025-01-31", 100, "call", 1, 1.1, 0.4, 0.5, 10, 100),
+            ("AAPL", "C3", "2025-06-20", 100, "call", 1, 1.1, 0.9, 0.5, 0, 200),
+        ],
+    )
+    db.insert_rows(
+        conn,
+        "news",
+        [
+            ("AAPL", "AAPL shares surge", "u1", "2025-01-09T14:00:00Z"),
+            ("AAPL", "AAPL faces probe", "u2", "2025-01-09T15:00:00Z"),
+            ("AAPL", "AAPL beats estimates", "u3", "2025-01-10T12:00:00Z"),
+        ],
+        columns=("symbol", "title", "url", "published_at"),
+        replace=False,
+    )
+    options = pipeline.options_context(conn, ["AAPL"], "2025-01-10")
+    assert np.isclose(options.loc[0, "iv30"], 0.3)
+    assert np.isclose(options.loc[0, "uoa"], 0.1)
+    news = pipeline.news_context(conn, ["AAPL"], "2025-01-01", "2025-01-10")
+    assert news["news_sent"].tolist() == [0.0, 1.0]
@@ -21,7 +21,9 @@ def test_send_slack_success(monkeypatch):
         calls["payload"] = json
         return SimpleNamespace(status_code=200, raise_for_status=lambda: None)
 
-    monkeypatch.setattr(notifier.requests, "post", fake_post)
+    monkeypatch.setattr(
+        notifier, "get_session", lambda: SimpleNamespace(post=fake_post)
+    )
     notifier.send_slack("msg", webhook_url="http://example.com")
     assert calls["url"] == "http://example.com"
     assert calls["payload"] == {"text": "msg"}
@@ -31,6 +33,8 @@ def test_send_slack_error(monkeypatch):
     def fake_post(url, json=None, timeout=10):
         raise ValueError("boom")
 
-    monkeypatch.setattr(notifier.requests, "post", fake_post)
+    monkeypatch.setattr(
+        notifier, "get_session", lambda: SimpleNamespace(post=fake_post)
+    )
     with pytest.raises(Exception):
         notifier.send_slack("msg", webhook_url="http://example.com")
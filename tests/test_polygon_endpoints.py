@@ -29,3 +29,29 @@ def test_helper_urls(monkeypatch):
     assert calls[2].endswith("/v3/trades/AAPL")
     assert calls[3].endswith("/v3/quotes/AAPL")
     assert calls[4].endswith("/v2/snapshot/locale/us/markets/stocks/tickers")
+
+
+def test_fetch_trades_window_follows_pages(monkeypatch):
+    calls = []
+    pages = {
+        "https://api.polygon.io/v3/trades/AAPL": {
+            "results": [{"price": 1}],
+            "next_url": "https://api.polygon.io/v3/trades/AAPL?cursor=abc",
+        },
+        "https://api.polygon.io/v3/trades/AAPL?cursor=abc": {"results": [{"price": 2}]},
+    }
+
+    def fake_get(url, params=None):
+        calls.append((url, params))
+        return pages[url]
+
+    monkeypatch.setattr(api, "rate_limited_get", fake_get)
+    monkeypatch.setattr(api, "is_equity_session", lambda now=None: False)
+
+    data = api.fetch_trades("AAPL", limit=100, start_ms=1, end_ms=2)
+
+    assert data == {"results": [{"price": 1}, {"price": 2}]}
+    assert calls[0][1]["timestamp.gte"] == 1_000_000
+    assert calls[0][1]["timestamp.lt"] == 2_000_000
+    assert calls[0][1]["order"] == "asc"
+    assert "cursor" not in calls[1][1]
@@ -1,3 +1,4 @@
+import asyncio
 import importlib
 import json
 
@@ -67,3 +68,106 @@ async def test_stream_portfolio_quotes(monkeypatch, tmp_path):
     row = conn.execute("SELECT symbol, price FROM realtime_quotes").fetchone()
     assert row == ("AAPL", 101)
     assert urls == [stream_async.WS_URL]
+
+
+@pytest.mark.asyncio
+async def test_watch_portfolio_updates_live_subscription(tmp_path):
+    from trading_platform import portfolio
+
+    pf = tmp_path / "portfolio.csv"
+    portfolio.record_trade("AAPL", "s", 1, 100, portfolio_file=str(pf))
+    sent = []
+
+    class WS:
+        async def send(self, msg):
+            sent.append(json.loads(msg))
+
+    hub = stream_async.StreamHub()
+    sub = await hub.subscribe(["AAPL"], channels=("T",))
+    hub._ws = WS()
+    await hub._sync(hub._ws)
+    watcher = asyncio.ensure_future(
+        portfolio_stream.watch_portfolio(hub, sub, str(pf), interval=10)
+    )
+    await asyncio.sleep(0)
+
+    async def settle():
+        for _ in range(50):
+            await asyncio.sleep(0.01)
+            if len(sent) > count:
+                return
+
+    count = len(sent)
+    portfolio.record_trade("MSFT", "s", 2, 50, portfolio_file=str(pf))
+    await settle()
+    count = len(sent)
+    portfolio.close_position(
+        "AAPL", 110, portfolio_file=str(pf), pnl_file=str(tmp_path / "pnl.csv")
+    )
+    await settle()
+    watcher.cancel()
+    await asyncio.gather(watcher, return_exceptions=True)
+
+    assert sent == [
+        {"action": "subscribe", "params": "T.AAPL"},
+        {"action": "subscribe", "params": "T.MSFT"},
+        {"action": "unsubscribe", "params": "T.AAPL"},
+    ]
+    assert sub.symbols == {"MSFT"}
+    assert portfolio._LISTENERS == []
+
+
+@pytest.mark.asyncio
+async def test_watch_portfolio_polls_external_writes(tmp_path):
+    pf = tmp_path / "portfolio.csv"
+    pd.DataFrame([{"symbol": "AAPL", "qty": 1}]).to_csv(pf, index=False)
+    hub = stream_async.StreamHub()
+    sub = await hub.subscribe(["AAPL"])
+    watcher = asyncio.ensure_future(
+        portfolio_stream.watch_portfolio(hub, sub, str(pf), interval=0.01)
+    )
+    await asyncio.sleep(0.02)
+    pd.DataFrame([{"symbol": "TSLA", "qty": 1}, {"symbol": "AAPL", "qty": 1}]).to_csv(
+        pf, index=False
+    )
+    for _ in range(100):
+        await asyncio.sleep(0.01)
+        if sub.symbols == {"AAPL", "TSLA"}:
+            break
+    watcher.cancel()
+    await asyncio.gather(watcher, return_exceptions=True)
+    assert sub.symbols == {"AAPL", "TSLA"}
+    assert hub.channels() == {"T.AAPL", "Q.AAPL", "T.TSLA", "Q.TSLA"}
+
+
+@pytest.mark.asyncio
+async def test_empty_portfolio_keeps_streaming_and_follows_new_positions(tmp_path):
+    from trading_platform import portfolio
+
+    pf = tmp_path / "portfolio.csv"
+    hub = stream_async.StreamHub()
+    quotes = await hub.subscribe(["SPY"], channels=("Q",))
+    conn = db.init_db(":memory:")
+    task = asyncio.ensure_future(
+        portfolio_stream.stream_portfolio_quotes(conn, str(pf), hub=hub)
+    )
+    watcher = asyncio.ensure_future(
+        portfolio_stream.watch_portfolio(hub, [quotes], str(pf), 10, extra=["SPY"])
+    )
+    await asyncio.sleep(0.01)
+    assert not task.done()
+    assert hub.channels() == {"Q.SPY"}
+
+    portfolio.record_trade("AAPL", "s", 1, 100, portfolio_file=str(pf))
+    for _ in range(50):
+        await asyncio.sleep(0.01)
+        if quotes.symbols == {"AAPL", "SPY"}:
+            break
+    assert quotes.symbols == {"AAPL", "SPY"}
+    assert hub.channels() == {"T.AAPL", "Q.AAPL", "Q.SPY"}
+
+    watcher.cancel()
+    for sub in list(hub._subs):
+        await hub.unsubscribe(sub)
+    await asyncio.wait_for(task, 1)
+    assert portfolio._LISTENERS == []
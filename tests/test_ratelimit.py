@@ -0,0 +1,55 @@
+"""Tests for the per-host token-bucket rate limiter."""
+
+import pytest
+
+from trading_platform.collector import ratelimit
+
+
+def test_burst_does_not_wait():
+    bucket = ratelimit.TokenBucket(rate=1, capacity=3)
+    waits = [bucket.acquire() for _ in range(3)]
+    assert waits == [0.0, 0.0, 0.0]
+
+
+def test_exhausted_bucket_waits(monkeypatch):
+    slept = []
+    monkeypatch.setattr(ratelimit.time, "sleep", slept.append)
+    bucket = ratelimit.TokenBucket(rate=2, capacity=1)
+    bucket.acquire()
+    bucket.acquire()
+    bucket.acquire()
+    assert len(slept) == 2
+    assert slept[0] == pytest.approx(0.5, abs=0.05)
+    assert slept[1] == pytest.approx(1.0, abs=0.05)
+
+
+def test_zero_rate_disables_limit():
+    bucket = ratelimit.TokenBucket(rate=0, capacity=1)
+    assert all(bucket.acquire() == 0.0 for _ in range(10))
+
+
+def test_buckets_are_per_host(monkeypatch):
+    monkeypatch.setenv("RATE_LIMITS", "api.polygon.io=10:4,newsapi.org=0.5")
+    ratelimit.reset()
+    poly = ratelimit.get_bucket("https://api.polygon.io/v2/aggs")
+    news = ratelimit.get_bucket("https://newsapi.org/v2/everything")
+    assert poly is ratelimit.get_bucket("https://api.polygon.io/v3/trades/AAPL")
+    assert (poly.rate, poly.capacity) == (10.0, 4.0)
+    assert (news.rate, news.capacity) == (0.5, 1.0)
+    monkeypatch.delenv("RATE_LIMITS")
+    ratelimit.reset()
+
+
+@pytest.mark.asyncio
+async def test_acquire_async_shares_budget(monkeypatch):
+    slept = []
+
+    async def fake_sleep(delay):
+        slept.append(delay)
+
+    monkeypatch.setattr(ratelimit.asyncio, "sleep", fake_sleep)
+    ratelimit.configure("example.com", rate=1, burst=1)
+    ratelimit.acquire("https://example.com/a")
+    await ratelimit.acquire_async("https://example.com/b")
+    assert slept and slept[0] == pytest.approx(1.0, abs=0.05)
+    ratelimit.reset()
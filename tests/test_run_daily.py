@@ -2,6 +2,7 @@
 
 import importlib
 import json
+from datetime import date
 from pathlib import Path
 
 import pytest
@@ -21,6 +22,28 @@ def test_run_daily_abort(monkeypatch):
         run_daily.run(cfg)
 
 
+def test_run_daily_reports_fetch_errors(monkeypatch, tmp_path):
+    importlib.reload(run_daily)
+
+    monkeypatch.setattr(run_daily.verify, "verify", lambda symbols: True)
+
+    async def fake_universe(conn, symbols, concurrency=1, aggregator=None):
+        return {sym: RuntimeError("timeout") for sym in symbols}
+
+    monkeypatch.setattr(run_daily.api_async, "fetch_universe", fake_universe)
+    sent = []
+    monkeypatch.setattr(
+        run_daily.notifier, "send_slack", lambda msg, webhook_url=None: sent.append(msg)
+    )
+
+    cfg = Config(
+        symbols="AAPL,MSFT", db_file=str(tmp_path / "db.sqlite"), use_async=True
+    )
+    with pytest.raises(SystemExit):
+        run_daily.run(cfg)
+    assert sent == ["Fetch failed for AAPL (timeout), MSFT (timeout)"]
+
+
 def test_run_daily_notify_failure(monkeypatch, tmp_path):
     importlib.reload(run_daily)
 
@@ -83,7 +106,7 @@ def test_run_daily_success(monkeypatch, tmp_path, capsys):
         assert isinstance(cfg, Config)
         assert symbols == ["AAPL"]
         path = tmp_path / "feat.csv"
-        path.write_text("t,close\n1,1")
+        path.write_text(f"t,close\n{date.today()},1")
         return str(path)
 
     monkeypatch.setattr(run_daily, "run_pipeline", fake_run_pipeline)
@@ -110,7 +133,8 @@ def test_run_daily_success(monkeypatch, tmp_path, capsys):
     monkeypatch.setattr(run_daily, "generate_dashboard", lambda *a, **k: "dash.html")
     monkeypatch.setattr(run_daily, "update_scoreboard", lambda *a, **k: "sb.csv")
 
-    def fake_generate(csv, model_file, out_dir="playbooks"):
+    def fake_generate(csv, model_file, out_dir="playbooks", symbols=None, start=None):
+        assert symbols == ["AAPL"] and start
         path = tmp_path / "pb.json"
         pb = {
             "trades": [
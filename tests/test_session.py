@@ -0,0 +1,23 @@
+"""Tests for the pooled collector HTTP session."""
+
+from trading_platform.collector import session
+
+
+def test_get_session_is_shared():
+    session.close_session()
+    first = session.get_session()
+    assert session.get_session() is first
+    session.close_session()
+    assert session.get_session() is not first
+    session.close_session()
+
+
+def test_build_session_pool_and_retries():
+    sess = session.build_session(pool_size=4, max_retries=2)
+    adapter = sess.get_adapter("https://api.polygon.io")
+    assert adapter._pool_maxsize == 4
+    assert adapter.max_retries.total == 2
+    assert 503 in adapter.max_retries.status_forcelist
+    assert 429 not in adapter.max_retries.status_forcelist
+    assert not adapter.max_retries.respect_retry_after_header
+    sess.close()
@@ -1,4 +1,6 @@
 from datetime import datetime
+from types import SimpleNamespace
+
 from trading_platform.collector import api
 
 
@@ -19,7 +21,7 @@ def test_is_market_open(monkeypatch):
 
         return R()
 
-    monkeypatch.setattr(api.requests, "get", fake_get)
+    monkeypatch.setattr(api, "get_session", lambda: SimpleNamespace(get=fake_get))
     assert api.is_market_open("stocks")
 
 
@@ -32,6 +34,31 @@ def test_skip_fetch_if_closed(monkeypatch):
         raise AssertionError("should not be called")
 
     monkeypatch.setattr(api, "is_equity_session", lambda now=None: False)
-    monkeypatch.setattr(api.requests, "get", fake_get)
+    monkeypatch.setattr(api, "get_session", lambda: SimpleNamespace(get=fake_get))
     api.fetch_trades("AAPL")
     assert not called
+
+
+def test_session_table_built_once_per_day(monkeypatch):
+    calls = []
+    real_schedule = api.nyse.schedule
+
+    def counting_schedule(*args, **kwargs):
+        calls.append(kwargs)
+        return real_schedule(*args, **kwargs)
+
+    monkeypatch.setattr(api.nyse, "schedule", counting_schedule)
+    monkeypatch.setattr(api, "_SESSIONS_BUILT", None)
+    monkeypatch.delenv("TESTING", raising=False)
+    now = datetime.now(api.EASTERN)
+    for _ in range(5):
+        api.is_equity_session(now)
+        api.is_options_session(now)
+    assert len(calls) == 1
+
+
+def test_session_times_half_day():
+    times = api.session_times(datetime(2026, 11, 27).date())
+    close = datetime(2026, 11, 27, 13, 0, tzinfo=api.EASTERN)
+    assert times.close_ms == int(close.timestamp() * 1000)
+    assert api.session_times(datetime(2026, 11, 26).date()) is None
@@ -0,0 +1,68 @@
+import asyncio
+
+import pytest
+
+from trading_platform.collector import db, events, sink
+
+
+def _count(conn):
+    return conn.execute("SELECT COUNT(*) FROM realtime_quotes").fetchone()[0]
+
+
+def test_quote_row():
+    assert sink.quote_row(events.Trade("AAPL", 1.5, 10, 2)) == ("AAPL", 2, 1.5)
+    assert sink.quote_row(events.Quote("AAPL", 0, 0, 3.5, 1, 4)) == ("AAPL", 4, 3.5)
+    assert sink.quote_row({"ev": "T", "sym": "AAPL", "p": 1.5, "t": 2}) == (
+        "AAPL",
+        2,
+        1.5,
+    )
+    assert sink.quote_row({"ev": "Q", "sym": "AAPL", "bp": 3, "t": 4}) == (
+        "AAPL",
+        4,
+        3,
+    )
+    assert sink.quote_row({"ev": "status", "message": "ok"}) is None
+    assert sink.quote_row({"ev": "T", "sym": "AAPL"}) is None
+
+
+@pytest.mark.asyncio
+async def test_sink_flushes_full_batches():
+    conn = db.init_db(":memory:")
+    async with sink.TickSink(conn, batch_size=3, flush_ms=10_000) as ticks:
+        for t in range(1, 4):
+            await ticks.put({"ev": "T", "sym": "AAPL", "p": 100 + t, "t": t})
+        await ticks.put({"ev": "status"})
+        for _ in range(20):
+            if ticks.written:
+                break
+            await asyncio.sleep(0.01)
+        assert _count(conn) == 3
+        await ticks.put({"ev": "T", "sym": "AAPL", "p": 104, "t": 4})
+        await asyncio.sleep(0.01)
+        assert _count(conn) == 3
+    assert _count(conn) == 4
+    assert ticks.written == 4
+    assert db.latest_quote(conn, "AAPL") == (4, 104)
+
+
+@pytest.mark.asyncio
+async def test_sink_flushes_after_interval():
+    conn = db.init_db(":memory:")
+    async with sink.TickSink(conn, batch_size=100, flush_ms=20) as ticks:
+        await ticks.put({"ev": "T", "sym": "MSFT", "p": 10, "t": 1})
+        await asyncio.sleep(0.1)
+        assert _count(conn) == 1
+
+
+@pytest.mark.asyncio
+async def test_sink_backpressure_and_shutdown_flush():
+    conn = db.init_db(":memory:")
+    ticks = sink.TickSink(conn, batch_size=2, flush_ms=5, max_pending=2)
+    await ticks.start()
+    await asyncio.gather(
+        *(ticks.put({"ev": "T", "sym": "AAPL", "p": 1, "t": t}) for t in range(1, 51))
+    )
+    await ticks.close()
+    assert _count(conn) == 50
+    await ticks.close()
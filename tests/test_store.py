@@ -0,0 +1,76 @@
+import pandas as pd
+import pytest
+
+from features import store
+
+
+def _rows(symbol, start, periods, value=0.0):
+    t = pd.date_range(start, periods=periods, freq="D")
+    return pd.DataFrame(
+        {
+            "symbol": symbol,
+            "t": t,
+            "close": [value + i for i in range(periods)],
+            "rsi14": value,
+        }
+    )
+
+
+def test_write_partitions_and_merges_newest_rows(tmp_path):
+    df = pd.concat([_rows("AAPL", "2025-01-30", 4), _rows("MSFT", "2025-02-01", 2)])
+    assert store.write_features(tmp_path, df) == 6
+    parts = sorted(
+        p.relative_to(tmp_path).parent.as_posix() for p in tmp_path.rglob("part-*")
+    )
+    assert parts == [
+        "symbol=AAPL/month=2025-01",
+        "symbol=AAPL/month=2025-02",
+        "symbol=MSFT/month=2025-02",
+    ]
+
+    # a recomputed row replaces the stored one for the same day
+    store.write_features(tmp_path, _rows("AAPL", "2025-02-02", 2, value=10.0))
+    aapl = store.read_features(tmp_path, symbols=["AAPL"])
+    assert len(aapl) == 5
+    assert aapl["rsi14"].tolist() == [0.0, 0.0, 0.0, 10.0, 10.0]
+    assert pd.api.types.is_datetime64_any_dtype(aapl["t"])
+
+    store.write_features(tmp_path, _rows("AAPL", "2025-03-01", 1), replace=["AAPL"])
+    assert store.read_features(tmp_path, symbols=["AAPL"])["t"].tolist() == [
+        pd.Timestamp("2025-03-01")
+    ]
+    assert len(store.read_features(tmp_path, symbols=["MSFT"])) == 2
+
+
+def test_read_filters_and_projects(tmp_path):
+    df = pd.concat([_rows("AAPL", "2025-01-25", 20), _rows("MSFT", "2025-01-25", 20)])
+    store.write_features(tmp_path, df)
+    out = store.read_features(
+        tmp_path,
+        symbols=["MSFT"],
+        start="2025-02-01",
+        end="2025-02-05",
+        columns=["t", "close", "missing"],
+    )
+    assert list(out.columns) == ["t", "close"]
+    assert out["t"].dt.strftime("%Y-%m-%d").tolist() == [
+        f"2025-02-0{d}" for d in range(1, 6)
+    ]
+    assert store.read_features(tmp_path / "empty").empty
+
+
+def test_read_single_file_keeps_newest_copy(tmp_path):
+    path = tmp_path / "features.csv"
+    df = _rows("AAPL", "2025-01-01", 3)
+    pd.concat([df, df.tail(1).assign(rsi14=5.0)]).to_csv(path, index=False)
+    out = store.read_features(path, start="2025-01-02")
+    assert out["rsi14"].tolist() == [0.0, 5.0]
+
+
+def test_parquet_roundtrip_types(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    store.write_features(tmp_path, _rows("AAPL", "2025-01-30", 4))
+    schema = pq.read_schema(next(tmp_path.rglob(store.PART_FILE)))
+    assert str(schema.field("t").type) == "date32[day]"
+    out = store.read_features(tmp_path, start="2025-02-01", columns=["t", "close"])
+    assert len(out) == 2 and pd.api.types.is_datetime64_any_dtype(out["t"])
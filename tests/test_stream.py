@@ -54,3 +54,35 @@ def test_stream_quotes_reconnect(monkeypatch):
     stream.stream_quotes("AAPL", realtime=True)
 
     assert urls == [stream.REALTIME_WS_URL, stream.WS_URL]
+
+
+def test_stream_quotes_reconnects_after_error(monkeypatch):
+    importlib.reload(stream)
+    runs = []
+
+    class FakeWS:
+        def __init__(
+            self, url, on_open=None, on_message=None, on_error=None, on_close=None
+        ):
+            self.on_open = on_open
+            self.on_error = on_error
+            self.on_close = on_close
+
+        def send(self, msg):
+            pass
+
+        def run_forever(self):
+            runs.append(1)
+            self.on_open(self)
+            if len(runs) == 1:
+                self.on_error(self, ConnectionResetError("reset"))
+                self.on_close(self, None, None)
+            else:
+                self.on_close(self, 1000, "bye")
+
+    monkeypatch.setattr(stream.websocket, "WebSocketApp", FakeWS)
+    monkeypatch.setattr(stream, "backoff_delay", lambda attempt: 0)
+
+    stream.stream_quotes("AAPL")
+
+    assert len(runs) == 2
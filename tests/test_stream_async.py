@@ -1,14 +1,16 @@
 """Tests for async WebSocket streaming."""
 
+import asyncio
 import importlib
 import json
 import os
+import time
 
 import pytest
 
 os.environ.setdefault("POLYGON_API_KEY", "test")
 
-from trading_platform.collector import alerts, stream_async
+from trading_platform.collector import alerts, events, stream_async
 
 
 class FakeWS:
@@ -78,3 +80,138 @@ async def test_stream_quotes_alert(monkeypatch):
     agg = alerts.AlertAggregator(webhook_url=None)
     await stream_async.stream_quotes("AAPL", alert_agg=agg, trade_threshold=10000)
     assert any("Large trade" in m for m in agg._messages)
+
+
+T0 = int(time.time() * 1000) - 5000
+
+
+class DroppingWS(FakeWS):
+    """Delivers one trade at ``t`` then fails like an abnormal closure."""
+
+    def __init__(self, url, urls, sent, drop, t=T0):
+        self.url = url
+        urls.append(url)
+        self.sent = sent
+        self.drop = drop
+        self.messages = [
+            json.dumps([{"ev": "T", "sym": "AAPL", "p": 100, "s": 1, "t": t}])
+        ]
+
+    async def send(self, msg):
+        self.sent.append(json.loads(msg)["action"])
+
+    def __aiter__(self):
+        async def gen():
+            for m in self.messages:
+                yield m
+            if self.drop:
+                raise OSError("connection reset")
+
+        return gen()
+
+
+@pytest.mark.asyncio
+async def test_hub_reconnects_and_backfills(monkeypatch):
+    importlib.reload(stream_async)
+    urls, sent = [], []
+
+    def fake_connect(url):
+        first = len(urls) == 0
+        return DroppingWS(url, urls, sent, drop=first, t=T0 if first else T0 + 1000)
+
+    windows = []
+
+    def fake_rest(symbol, start_ms, end_ms, channels):
+        windows.append((symbol, start_ms, end_ms, sorted(channels)))
+        return [events.Trade(symbol, 99.5, 5, T0 + 500)]
+
+    monkeypatch.setattr(
+        stream_async, "websockets", type("W", (), {"connect": fake_connect})
+    )
+    monkeypatch.setattr(stream_async, "backoff_delay", lambda attempt: 0)
+    monkeypatch.setattr(stream_async, "rest_events", fake_rest)
+
+    received = []
+    await stream_async.stream_quotes("AAPL", on_event=received.append, backfill=True)
+
+    assert urls == [stream_async.WS_URL, stream_async.WS_URL]
+    assert sent == ["auth", "subscribe", "auth", "subscribe"]
+    # the window starts after the last event and ends at the first live one
+    assert windows == [("AAPL", T0 + 1, T0 + 1000, ["Q", "T"])]
+    assert [e.t for e in received] == [T0, T0 + 1000, T0 + 500]
+
+
+@pytest.mark.asyncio
+async def test_long_outage_is_backfilled_in_chunks(monkeypatch):
+    importlib.reload(stream_async)
+    chunk = stream_async.BACKFILL_CHUNK_MS
+    windows = []
+
+    def fake_rest(symbol, start_ms, end_ms, channels):
+        windows.append((start_ms, end_ms))
+        if len(windows) == 2:
+            raise OSError("timeout")
+        return [events.Trade(symbol, 1.0, 1, start_ms)]
+
+    monkeypatch.setattr(stream_async, "rest_events", fake_rest)
+    hub = stream_async.StreamHub()
+    sub = await hub.subscribe(["AAPL"], channels=("T",), backfill=True)
+    await hub._backfill(0, 3 * chunk + 10)
+
+    assert windows == [
+        (0, chunk),
+        (chunk, 2 * chunk),
+        (2 * chunk, 3 * chunk),
+        (3 * chunk, 3 * chunk + 10),
+    ]
+    assert hub.missed == [("AAPL", chunk, 2 * chunk)]
+    assert [sub.queue.get_nowait()[1].t for _ in range(3)] == [0, 2 * chunk, 3 * chunk]
+
+
+@pytest.mark.asyncio
+async def test_quiet_reconnect_backfills_up_to_the_feed_delay(monkeypatch):
+    importlib.reload(stream_async)
+    monkeypatch.setattr(stream_async, "BACKFILL_WAIT_SEC", 0)
+    windows = []
+
+    def fake_rest(symbol, start_ms, end_ms, channels):
+        windows.append((start_ms, end_ms))
+        return []
+
+    monkeypatch.setattr(stream_async, "rest_events", fake_rest)
+    hub = stream_async.StreamHub()
+    await hub.subscribe(["AAPL"], channels=("T",), backfill=True)
+    for url in (stream_async.REALTIME_WS_URL, stream_async.WS_URL):
+        hub._last_t, hub._dropped_at = T0, T0 + 10
+        hub._open_gap(url)
+        await asyncio.sleep(0.01)
+        await asyncio.gather(*hub._backfills)
+
+    # the delayed feed has not yet published anything after the drop
+    ((start, end),) = windows
+    assert start == T0 + 1
+    assert T0 < end <= time.time() * 1000
+
+
+@pytest.mark.asyncio
+async def test_hub_gives_up_after_max_retries(monkeypatch):
+    importlib.reload(stream_async)
+    attempts = []
+
+    def fake_connect(url):
+        attempts.append(url)
+        raise OSError("unreachable")
+
+    monkeypatch.setattr(
+        stream_async, "websockets", type("W", (), {"connect": fake_connect})
+    )
+    monkeypatch.setattr(stream_async, "backoff_delay", lambda attempt: 0)
+    hub = stream_async.StreamHub(max_retries=2)
+    await hub.run()
+    assert len(attempts) == 3
+
+
+def test_backoff_delay_is_bounded():
+    for attempt in range(10):
+        delay = stream_async.backoff_delay(attempt, base=1.0, cap=8.0)
+        assert 0 <= delay <= min(8.0, 2**attempt)
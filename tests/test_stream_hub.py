@@ -0,0 +1,146 @@
+"""Tests for the shared WebSocket stream hub."""
+
+import asyncio
+import importlib
+import json
+import os
+
+import pandas as pd
+import pytest
+
+os.environ.setdefault("POLYGON_API_KEY", "test")
+
+from trading_platform.collector import (
+    alerts,
+    broadcast,
+    db,
+    events,
+    stream_async,
+    stream_hub,
+)
+
+
+class FakeWS:
+    def __init__(self, url, urls, sent):
+        self.urls = urls
+        self.sent = sent
+        urls.append(url)
+        self.messages = [
+            json.dumps([{"status": "auth_success"}]),
+            json.dumps(
+                [
+                    {"ev": "T", "sym": "AAPL", "p": 101, "s": 50000, "t": 1},
+                    {"ev": "Q", "sym": "AAPL", "bp": 100, "ap": 102, "t": 2},
+                    {"ev": "Q", "sym": "MSFT", "bp": 300, "ap": 301, "t": 3},
+                    {"ev": "T", "sym": "MSFT", "p": 300, "s": 10, "t": 4},
+                    {"ev": "T", "sym": "MSFT", "p": 301, "s": 10, "t": 60_000},
+                    {"ev": "T", "sym": "MSFT", "p": 302, "s": 10, "t": 120_000},
+                ]
+            ),
+        ]
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        pass
+
+    async def send(self, msg):
+        self.sent.append(json.loads(msg))
+
+    def __aiter__(self):
+        async def gen():
+            for m in self.messages:
+                yield m
+
+        return gen()
+
+    async def close(self):
+        pass
+
+
+@pytest.mark.asyncio
+async def test_run_hub_fans_out_one_connection(monkeypatch, tmp_path):
+    importlib.reload(stream_async)
+    importlib.reload(stream_hub)
+    urls, sent = [], []
+    monkeypatch.setattr(
+        stream_async,
+        "websockets",
+        type("W", (), {"connect": lambda url: FakeWS(url, urls, sent)}),
+    )
+    pf = tmp_path / "portfolio.csv"
+    pd.DataFrame(
+        [{"symbol": "AAPL", "strategy": "s", "qty": 1, "avg_price": 1, "opened_at": 0}]
+    ).to_csv(pf, index=False)
+    agg = alerts.AlertAggregator(webhook_url=None)
+    monkeypatch.setattr(agg, "flush", lambda: None)
+    emitted = []
+    watch_sets = broadcast.WatchSets()
+    watch_sets.add(["NVDA", "MSFT"])
+
+    conn = db.init_db(":memory:")
+    await stream_hub.run_hub(
+        conn,
+        str(pf),
+        symbols=["MSFT"],
+        alert_agg=agg,
+        emit=lambda event, data, to=None: emitted.append((event, data, to)),
+        watch_sets=watch_sets,
+        overview_ms=60000,
+    )
+
+    assert urls == [stream_async.WS_URL]
+    subscribed = {
+        p for m in sent if m["action"] == "subscribe" for p in m["params"].split(",")
+    }
+    assert subscribed == {"T.AAPL", "Q.AAPL", "T.MSFT", "Q.MSFT"}
+    rows = conn.execute("SELECT symbol, t, price FROM realtime_quotes").fetchall()
+    assert sorted(rows) == [("AAPL", 1, 101), ("AAPL", 2, 100)]
+    assert agg._messages == ["Large trade AAPL size 50000"]
+    # first bars started before the stream and the last is still open
+    bars = conn.execute("SELECT * FROM stream_minute_bars").fetchall()
+    assert bars == [("MSFT", 60_000, 301, 301, 301, 301, 10)]
+    assert conn.execute("SELECT COUNT(*) FROM minute_bars").fetchone() == (0,)
+    assert emitted == [
+        (
+            "overview_quotes",
+            [{"symbol": "AAPL", "p": 100}, {"symbol": "MSFT", "p": 300}],
+            "overview",
+        ),
+        ("overview_quotes", [{"symbol": "MSFT", "p": 300}], "watch:MSFT,NVDA"),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_hub_update_sends_channel_diff():
+    hub = stream_async.StreamHub()
+    sent = []
+
+    class WS:
+        async def send(self, msg):
+            sent.append(json.loads(msg))
+
+    first = await hub.subscribe(["AAPL"], channels=("Q",))
+    await hub.subscribe(["AAPL"], channels=("T",))
+    hub._ws = WS()
+    await hub._sync(hub._ws)
+    await hub.update(first, ["MSFT"])
+    await hub.unsubscribe(first)
+    assert sent == [
+        {"action": "subscribe", "params": "Q.AAPL,T.AAPL"},
+        {"action": "unsubscribe", "params": "Q.AAPL"},
+        {"action": "subscribe", "params": "Q.MSFT"},
+        {"action": "unsubscribe", "params": "Q.MSFT"},
+    ]
+    assert [item async for item in first] == []
+
+
+@pytest.mark.asyncio
+async def test_subscription_drops_oldest_when_full():
+    sub = stream_async.Subscription(["AAPL"], ("T",), maxsize=2, block=False)
+    for t in range(1, 4):
+        await sub._put(events.Trade("AAPL", 1.0, 1, t))
+    assert sub.dropped == 1
+    assert [sub.queue.get_nowait()[1].t for _ in range(2)] == [2, 3]
+    await asyncio.sleep(0)
@@ -0,0 +1,113 @@
+"""Tests for Prometheus instrumentation."""
+
+import asyncio
+import os
+import time
+from types import SimpleNamespace
+
+import pytest
+from prometheus_client import REGISTRY
+
+os.environ.setdefault("POLYGON_API_KEY", "test")
+os.environ.setdefault("NEWS_API_KEY", "test")
+
+from trading_platform import telemetry
+from trading_platform.collector import api, db
+from trading_platform.collector.events import Quote
+from trading_platform.collector.sink import TickSink
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def test_endpoint_masks_variable_segments():
+    assert (
+        telemetry.endpoint("https://api.polygon.io/v2/aggs/ticker/AAPL/prev")
+        == "/v2/aggs/ticker/{}/prev"
+    )
+    assert (
+        telemetry.endpoint(
+            "https://api.polygon.io/v2/aggs/ticker/BRK.B/range/1/minute/"
+            "2024-01-02/2024-01-03"
+        )
+        == "/v2/aggs/ticker/{}/range/{}/minute/{}/{}"
+    )
+    assert (
+        telemetry.endpoint("https://api.polygon.io/v3/snapshot/options/O:AAPL250117C1")
+        == "/v3/snapshot/options/{}"
+    )
+
+
+def test_rate_limited_get_records_latency_and_status(monkeypatch):
+    def fake_get(url, params=None, **kwargs):
+        return SimpleNamespace(
+            status_code=200, content=b'{"ok": true}', raise_for_status=lambda: None
+        )
+
+    monkeypatch.setattr(api, "CACHE_TTL", 0)
+    monkeypatch.setattr(api.ratelimit, "acquire", lambda url: 0.0)
+    monkeypatch.setattr(api, "get_session", lambda: SimpleNamespace(get=fake_get))
+    label = "/v2/aggs/ticker/{}/prev"
+    before = sample("polygon_requests_total", endpoint=label, status="200")
+    count = sample("polygon_request_seconds_count", endpoint=label)
+
+    api.rate_limited_get("https://api.polygon.io/v2/aggs/ticker/MSFT/prev")
+
+    assert sample("polygon_requests_total", endpoint=label, status="200") == before + 1
+    assert sample("polygon_request_seconds_count", endpoint=label) == count + 1
+
+
+def test_insert_rows_counts_rows_per_table():
+    conn = db.init_db(":memory:")
+    before = sample("collector_rows_written_total", table="ohlcv")
+    db.insert_rows(conn, "ohlcv", [("AAPL", t, 1, 1, 1, 1, 10) for t in range(3)])
+    assert sample("collector_rows_written_total", table="ohlcv") == before + 3
+
+
+@pytest.mark.asyncio
+async def test_sink_records_persist_latency():
+    conn = db.init_db(":memory:")
+    before = sample("stream_persist_latency_seconds_count")
+    async with TickSink(conn, batch_size=2, flush_ms=10) as sink:
+        await sink.put(Quote("AAPL", 1.0, 1, 1.1, 1, 1))
+        await sink.put(Quote("AAPL", 2.0, 1, 2.1, 1, 2))
+        await asyncio.sleep(0)
+    assert sample("stream_persist_latency_seconds_count") == before + 2
+
+
+@pytest.mark.asyncio
+async def test_persist_latency_starts_at_message_arrival():
+    from trading_platform.collector import stream_async
+
+    conn = db.init_db(":memory:")
+    hub = stream_async.StreamHub()
+    sub = await hub.subscribe(["AAPL"], channels=("Q",))
+    waited = sample("stream_queue_wait_seconds_count")
+    arrived = time.perf_counter() - 5
+    await sub._put(Quote("AAPL", 1.0, 1, 1.1, 1, 1), arrived)
+    hub_sum = sample("stream_persist_latency_seconds_sum")
+    async with TickSink(conn, batch_size=1) as sink:
+        evt = await sub.__anext__()
+        assert sub.received == arrived
+        await sink.put(evt, sub.received)
+    assert sample("stream_queue_wait_seconds_count") == waited + 1
+    assert sample("stream_queue_wait_seconds_sum") >= 5
+    assert sample("stream_persist_latency_seconds_sum") - hub_sum >= 5
+
+
+def test_stage_times_block():
+    before = sample("pipeline_stage_seconds_count", stage="unit")
+    with telemetry.stage("unit"):
+        pass
+    with pytest.raises(ValueError):
+        with telemetry.stage("unit"):
+            raise ValueError
+    assert sample("pipeline_stage_seconds_count", stage="unit") == before + 2
+
+
+def test_push_and_serve_are_opt_in(monkeypatch):
+    monkeypatch.delenv("PUSHGATEWAY_URL", raising=False)
+    monkeypatch.delenv("METRICS_PORT", raising=False)
+    assert telemetry.push("job") is False
+    assert telemetry.serve() is False
@@ -50,3 +50,42 @@ def test_train_window_filter(tmp_path):
     res = train_model(str(fpath), model_dir=str(tmp_path), window_days=30, symbol="C")
     assert res.window_days == 30
     assert Path(res.model_path).exists()
+
+
+def test_train_skips_unlabelled_rows_and_option_snapshots(tmp_path, monkeypatch):
+    import sys
+
+    import lightgbm as lgb
+
+    frames = []
+    for sym in ("A", "B"):
+        df = pd.DataFrame(
+            {
+                "symbol": sym,
+                "t": pd.date_range("2025-01-01", periods=20),
+                "sma20": range(20),
+                "rsi14": range(20, 40),
+                "target": [0, 1] * 10,
+                "iv_edge": 0.0,
+                "uoa": 0.0,
+            }
+        )
+        # the option snapshot sits on the newest row, whose target is unknown
+        df.loc[19, ["iv_edge", "uoa", "target"]] = [0.3, 2.0, 0]
+        frames.append(df)
+    fpath = tmp_path / "features.csv"
+    pd.concat(frames).to_csv(fpath, index=False)
+
+    module = sys.modules["models.train"]
+    seen = []
+    cross_val_score = module.cross_val_score
+    monkeypatch.setattr(
+        module,
+        "cross_val_score",
+        lambda model, X, y, **kw: seen.append(len(X))
+        or cross_val_score(model, X, y, **kw),
+    )
+    res = train_model(str(fpath), model_dir=str(tmp_path))
+    assert seen[0] == 38
+    booster = lgb.Booster(model_file=res.model_path)
+    assert booster.feature_name() == ["sma20", "rsi14"]